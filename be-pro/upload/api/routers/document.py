@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+from typing import Dict
 from typing import List
 from typing import Optional
 
+from application.upload import IndexedCopy
 from application.upload import UploadDocumentApplication
 from application.upload import UploadDocumentInput
 from application.upload import UploadMultipleDocumentsInput
@@ -16,6 +18,7 @@ from infra.db import Conversation
 from infra.db import Document
 from infra.db import SessionLocal
 from shared.settings import Settings
+from shared.utils import file_sha256
 from sqlalchemy.orm import Session
 
 router = APIRouter(tags=['documents'])
@@ -40,6 +43,20 @@ def get_upload_application(request: Request) -> UploadDocumentApplication:
     )
 
 
+def find_indexed_copies(db: Session, content_hashes: List[str]) -> Dict[str, IndexedCopy]:
+    """Latest completed upload of each content hash, if any."""
+    documents = (
+        db.query(Document)
+        .filter(Document.content_hash.in_(set(content_hashes)), Document.indexed_chunks.isnot(None))
+        .order_by(Document.id)
+        .all()
+    )
+    return {
+        doc.content_hash: IndexedCopy(conversation_id=doc.conversation_id, chunk_count=doc.indexed_chunks)
+        for doc in documents
+    }
+
+
 @router.post('/upload')
 def upload_documents(
     files: List[UploadFile],
@@ -62,17 +79,33 @@ def upload_documents(
     db.commit()
     db.refresh(conversation)
     # Create document records
-    for file in files:
-        doc = Document(conversation_id=conversation.id, name=file.filename, size=file.size)
+    content_hashes = [file_sha256(file.file) for file in files]
+    indexed_copies = find_indexed_copies(db, content_hashes)
+    documents = []
+    for file, content_hash in zip(files, content_hashes):
+        doc = Document(conversation_id=conversation.id, name=file.filename, size=file.size, content_hash=content_hash)
         db.add(doc)
+        documents.append(doc)
     db.commit()
     # Use multi-worker processing as before
     upload_input = UploadMultipleDocumentsInput(
         files=files,
         max_workers=max_workers,
-        conversation_id=conversation.id
+        conversation_id=conversation.id,
+        content_hashes=content_hashes,
+        indexed_copies=[indexed_copies.get(content_hash) for content_hash in content_hashes],
     )
     result = application.upload_multiple_documents(upload_input)
+    # Record completed uploads; only these are reused by later uploads of the same file
+    indexed_chunks = {
+        file_result.content_hash: file_result.reused_chunks or file_result.embeddings_created
+        for file_result in result.file_results
+        if file_result.content_hash
+    }
+    for doc in documents:
+        if indexed_chunks.get(doc.content_hash):
+            doc.indexed_chunks = indexed_chunks[doc.content_hash]
+    db.commit()
     # Format response, include conversation_id
     return {
         'conversation_id': conversation.id,
@@ -94,6 +127,9 @@ def upload_documents(
                 'embeddings_created': file_result.embeddings_created,
                 'processing_time': file_result.processing_time,
                 'error': file_result.error,
+                'reused_chunks': file_result.reused_chunks,
+                'page_stats': {name: stats.model_dump() for name, stats in file_result.page_stats.items()},
+                'heading_stats': file_result.heading_stats.model_dump() if file_result.heading_stats else None,
             }
             for file_result in result.file_results
         ],
@@ -137,6 +173,9 @@ async def upload_single_document(
             'embeddings_created': result.embeddings_created,
             'processing_time': result.processing_time,
             'error': result.error,
+            'reused_chunks': result.reused_chunks,
+            'page_stats': {name: stats.model_dump() for name, stats in result.page_stats.items()},
+            'heading_stats': result.heading_stats.model_dump() if result.heading_stats else None,
         }
 
     except Exception as e:
@@ -146,6 +185,26 @@ async def upload_single_document(
         )
 
 
+@router.get('/ocr_cache/stats')
+def get_ocr_cache_stats(request: Request):
+    """Node-wide OCR cache counters.
+
+    Returns:
+        dict: Hits, misses, evictions, number of entries and their total size in bytes
+    """
+    return request.app.state.parser.extractor.ocr.cache_stats()
+
+
+@router.get('/heading_cache/stats')
+def get_heading_cache_stats(request: Request):
+    """Node-wide heading structure cache counters.
+
+    Returns:
+        dict: Hits, misses, evictions, number of entries and their total size in bytes
+    """
+    return request.app.state.parser.parser.cache_stats()
+
+
 @router.get('/get_all')
 async def get_documents():
     """Retrieve all documents.
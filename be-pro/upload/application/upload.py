@@ -6,29 +6,46 @@ import logging
 import time
 from concurrent.futures import as_completed
 from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Tuple
 
+from domain.chunker import Chunk
 from domain.chunker import ChunkerInput
 from domain.chunker import ChunkerService
+from domain.chunker import TableInput
 from domain.embedder import ChunkData
 from domain.embedder import EmbedderInput
 from domain.embedder import EmbedderOutput
 from domain.embedder import EmbedderService
+from domain.parser import ExtractionStats
+from domain.parser import HeadingStats
+from domain.parser import PageClassStats
 from domain.parser import ParserInput
 from domain.parser import ParserService
 from fastapi import UploadFile
 from pydantic import BaseModel
 from shared.multiworker_config import get_optimal_worker_count
 from shared.multiworker_config import MultiWorkerConfig
+from shared.utils import file_sha256
 
 logger = logging.getLogger(__name__)
 
 
+class IndexedCopy(BaseModel):
+    """A completed upload of the same bytes: the conversation it was indexed for and its chunk count."""
+    conversation_id: int
+    chunk_count: int
+
+
 class UploadDocumentInput(BaseModel):
     """Input data for the upload document process."""
     file: UploadFile
     conversation_id: Optional[int] = None
+    content_hash: Optional[str] = None
+    # Chunks of this copy are attached instead of processing the file again
+    indexed_copy: Optional[IndexedCopy] = None
 
 
 class UploadDocumentOutput(BaseModel):
@@ -40,6 +57,14 @@ class UploadDocumentOutput(BaseModel):
     processing_time: float
     filename: str
     error: Optional[str] = None
+    # SHA-256 of the file; set on success, when the upload can be recorded as an indexed copy
+    content_hash: Optional[str] = None
+    # Chunks reused from an identical, already indexed upload
+    reused_chunks: int = 0
+    # PDF pages per triage class ('text', 'tables', 'scanned') with extraction time
+    page_stats: Dict[str, PageClassStats] = {}
+    # LLM heading detection calls, time, and heading cache use
+    heading_stats: Optional[HeadingStats] = None
 
 
 class UploadMultipleDocumentsInput(BaseModel):
@@ -48,6 +73,10 @@ class UploadMultipleDocumentsInput(BaseModel):
     max_workers: Optional[int] = None
     session_id: Optional[str] = None
     conversation_id: Optional[int] = None
+    # SHA-256 of each file, in the same order as files (computed when missing)
+    content_hashes: Optional[List[str]] = None
+    # Completed upload of each file to reuse, if any, in the same order as files
+    indexed_copies: Optional[List[Optional[IndexedCopy]]] = None
 
 
 class UploadMultipleDocumentsOutput(BaseModel):
@@ -82,74 +111,104 @@ class UploadDocumentApplication:
         embeddings_created = 0
         processed_chunks = 0
         status = 'success'
+        pending_embedding: Optional[asyncio.Task] = None
 
         try:
             logger.info(f'Starting document upload process for file: {input_data.file.filename}')
 
-            logger.info('Step 1: Parsing document...')
+            # Reading the whole upload blocks, so it is hashed on the default executor
+            content_hash = input_data.content_hash or await asyncio.get_running_loop().run_in_executor(
+                None, file_sha256, input_data.file.file,
+            )
+            reused_chunks = await self._reuse_indexed_chunks(
+                content_hash, input_data.indexed_copy, input_data.conversation_id,
+            )
+            if reused_chunks:
+                processing_time = time.time() - start_time
+                return UploadDocumentOutput(
+                    status='success',
+                    message=f'Identical file already indexed, reused {reused_chunks} chunks',
+                    processed_chunks=0,
+                    embeddings_created=0,
+                    processing_time=processing_time,
+                    filename=input_data.file.filename,
+                    content_hash=content_hash,
+                    reused_chunks=reused_chunks,
+                )
+
+            # Sections are parsed while later pages are still being extracted;
+            # each section is chunked, then indexed while the next one is parsed.
+            logger.info('Parsing, chunking and embedding document section by section...')
             parser_input = ParserInput(file=input_data.file)
-            parser_output = await self.parser.process(parser_input)
+            upload_timestamp = time.time()
+            raw_texts = []
+            chunks_json = []
+
+            extraction_stats = ExtractionStats()
+            # Spreadsheet tables come in row batches: the position of each
+            # table's next chunk, and the rows carried to its next batch
+            table_positions: Dict[str, int] = {}
+            table_open_rows: Dict[str, List[List[str]]] = {}
+
+            async for parser_output in self.parser.stream(parser_input, extraction_stats):
+                raw_texts.append(str(parser_output.raw_text))
+
+                file_metadata = {
+                    'filename': parser_output.filename,
+                    'file_extension': parser_output.file_extension,
+                    'upload_timestamp': upload_timestamp,
+                    'content_hash': content_hash,
+                }
 
-            with open(f'text_{input_data.file.filename}.md', 'w', encoding='utf-8') as f:
-                f.write(parser_output.raw_text)
-
-            file_metadata = {
-                'filename': parser_output.filename,
-                'file_extension': parser_output.file_extension,
-                'upload_timestamp': time.time(),
-            }
-
-            logger.info('Step 2: Chunking document...')
-            chunker_input = ChunkerInput(
-                text=str(parser_output.raw_text),
-                metadata=file_metadata,
-            )
-            chunker_output = self.chunker.process(chunker_input)
-            chunks_json = [
-                chunk.model_dump(mode='json') for chunk in chunker_output.chunks
-            ]
-            with open(f'chunks_{input_data.file.filename}.json', 'w', encoding='utf-8') as f:
-                f.write(json.dumps(chunks_json, indent=2, ensure_ascii=False))
-            processed_chunks = len(chunker_output.chunks)
-
-            logger.info(f'Created {processed_chunks} chunks')
-
-            logger.info('Step 3: Generating embeddings...')
-            try:
-                # Convert Chunk objects to ChunkData objects for the embedder
-                chunk_data_list = []
-                for chunk in chunker_output.chunks:
-                    chunk_data = ChunkData(
-                        id=str(chunk.id),
-                        content=chunk.content,
-                        section_title=chunk.section_title,
-                        filename=chunk.filename,
-                        conversation_id=input_data.conversation_id,
-                        position=chunk.position,
-                        tokens=chunk.tokens,
-                        type=chunk.type,
-                        content_json=chunk.content_json,
-                        heading_level=chunk.heading_level,
+                table = parser_output.table
+                table_input = None
+                if table is not None:
+                    table_input = TableInput(
+                        title=table.title,
+                        header=table.header,
+                        rows=table_open_rows.pop(table.title, []) + table.rows,
+                        start_position=table_positions.get(table.title, 0),
+                        last=table.last,
                     )
-                    chunk_data_list.append(chunk_data)
-
-                embedder_input = EmbedderInput(
-                    chunks=chunk_data_list,
+                chunker_input = ChunkerInput(
+                    text=str(parser_output.raw_text),
                     metadata=file_metadata,
+                    # Spreadsheet rows go straight to table chunks
+                    table=table_input,
+                )
+                chunker_output = self.chunker.process(chunker_input)
+                if table is not None:
+                    table_positions[table.title] = table_input.start_position + len(chunker_output.chunks)
+                    if chunker_output.open_rows:
+                        table_open_rows[table.title] = chunker_output.open_rows
+                chunks_json.extend(
+                    chunk.model_dump(mode='json') for chunk in chunker_output.chunks
                 )
-                embedder_output = await self.embedder.process(embedder_input)
+                processed_chunks += len(chunker_output.chunks)
+                logger.info(f'Section {parser_output.section_index}: created {len(chunker_output.chunks)} chunks')
+
+                # Chunk ids are allocated from the index's current max id, so
+                # sections are indexed one at a time, in order
+                if pending_embedding is not None:
+                    created, ok = await self._collect_embedding(pending_embedding)
+                    embeddings_created += created
+                    status = status if ok else 'failed'
+                pending_embedding = asyncio.create_task(
+                    self._embed_chunks(chunker_output.chunks, input_data.conversation_id, file_metadata),
+                )
+
+            if pending_embedding is not None:
+                created, ok = await self._collect_embedding(pending_embedding)
+                embeddings_created += created
+                status = status if ok else 'failed'
+                pending_embedding = None
 
-                if embedder_output.index_name:
-                    embeddings_created = len(chunk_data_list)
-                    logger.info(f'Created {embeddings_created} embeddings and indexed to {embedder_output.index_name}')
-                else:
-                    embeddings_created = 0
-                    logger.warning('Failed to create embeddings or index')
+            with open(f'text_{input_data.file.filename}.md', 'w', encoding='utf-8') as f:
+                f.write('\n\n'.join(raw_texts))
+            with open(f'chunks_{input_data.file.filename}.json', 'w', encoding='utf-8') as f:
+                f.write(json.dumps(chunks_json, indent=2, ensure_ascii=False))
 
-            except Exception as e:
-                logger.error(f'Error creating embeddings: {e}')
-                embeddings_created = 0
-                status = 'failed'
+            logger.info(f'Created {processed_chunks} chunks and {embeddings_created} embeddings')
 
             processing_time = time.time() - start_time
             logger.info(f'Document upload completed successfully in {processing_time:.2f}s')
@@ -161,9 +220,15 @@ class UploadDocumentApplication:
                 embeddings_created=embeddings_created,
                 processing_time=processing_time,
                 filename=input_data.file.filename,
+                # Only a copy with every chunk indexed can be reused
+                content_hash=content_hash if status == 'success' and embeddings_created == processed_chunks else None,
+                page_stats=extraction_stats.page_classes,
+                heading_stats=extraction_stats.headings,
             )
 
         except Exception as e:
+            if pending_embedding is not None:
+                pending_embedding.cancel()
             processing_time = time.time() - start_time
             error_msg = f'Failed to process document: {str(e)}'
             logger.error(error_msg, exc_info=True)
@@ -178,6 +243,71 @@ class UploadDocumentApplication:
                 filename=input_data.file.filename,
             )
 
+    async def _embed_chunks(self, chunks: List[Chunk], conversation_id: Optional[int], file_metadata: dict) -> int:
+        """Embed and index one section's chunks, returning the number of embeddings created."""
+        # Convert Chunk objects to ChunkData objects for the embedder
+        chunk_data_list = []
+        for chunk in chunks:
+            chunk_data = ChunkData(
+                id=str(chunk.id),
+                content=chunk.content,
+                section_title=chunk.section_title,
+                filename=chunk.filename,
+                conversation_id=conversation_id,
+                position=chunk.position,
+                tokens=chunk.tokens,
+                type=chunk.type,
+                content_json=chunk.content_json,
+                heading_level=chunk.heading_level,
+                content_hash=file_metadata.get('content_hash'),
+            )
+            chunk_data_list.append(chunk_data)
+
+        if not chunk_data_list:
+            return 0
+
+        embedder_input = EmbedderInput(
+            chunks=chunk_data_list,
+            metadata=file_metadata,
+        )
+        embedder_output = await self.embedder.process(embedder_input)
+
+        if embedder_output.index_name:
+            logger.info(f'Created {len(chunk_data_list)} embeddings and indexed to {embedder_output.index_name}')
+            return len(chunk_data_list)
+
+        logger.warning('Failed to create embeddings or index')
+        return 0
+
+    async def _reuse_indexed_chunks(
+        self, content_hash: str, indexed_copy: Optional[IndexedCopy], conversation_id: Optional[int],
+    ) -> int:
+        """Attach the chunks of a completed upload of the same file; 0 if the file must be processed.
+
+        Only copies recorded as complete are reused, never the partial chunks
+        a failed upload left behind. Without a conversation there is nothing
+        to attach them to. The OpenSearch calls block, so they run on the
+        default executor.
+        """
+        if indexed_copy is None or conversation_id is None:
+            return 0
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self.embedder.attach_existing_chunks,
+                content_hash, indexed_copy.conversation_id, indexed_copy.chunk_count, conversation_id,
+            )
+        except Exception as e:
+            logger.warning(f'Could not reuse indexed chunks, processing file again: {e}')
+            return 0
+
+    async def _collect_embedding(self, task: asyncio.Task) -> Tuple[int, bool]:
+        """Wait for an embedding task; returns (embeddings created, succeeded)."""
+        try:
+            return await task, True
+        except Exception as e:
+            logger.error(f'Error creating embeddings: {e}')
+            return 0, False
+
     def upload_multiple_documents(self, input_data: UploadMultipleDocumentsInput) -> UploadMultipleDocumentsOutput:
         """Upload and process multiple documents using multi-worker processing."""
         start_time = time.time()
@@ -189,7 +319,9 @@ class UploadDocumentApplication:
                 result = asyncio.run(self.upload_document(
                     UploadDocumentInput(
                         file=input_data.files[0],
-                        conversation_id=input_data.conversation_id
+                        conversation_id=input_data.conversation_id,
+                        content_hash=input_data.content_hashes[0] if input_data.content_hashes else None,
+                        indexed_copy=input_data.indexed_copies[0] if input_data.indexed_copies else None,
                     )
                 ))
                 return UploadMultipleDocumentsOutput(
@@ -229,9 +361,13 @@ class UploadDocumentApplication:
             # Use ThreadPoolExecutor for I/O bound operations like file processing
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
                 # Submit all files for processing
+                content_hashes = input_data.content_hashes or [None] * total_files
+                indexed_copies = input_data.indexed_copies or [None] * total_files
                 future_to_file = {
-                    executor.submit(self._process_single_file, file, input_data.conversation_id): file
-                    for file in input_data.files
+                    executor.submit(
+                        self._process_single_file, file, input_data.conversation_id, content_hash, indexed_copy,
+                    ): file
+                    for file, content_hash, indexed_copy in zip(input_data.files, content_hashes, indexed_copies)
                 }
 
                 # Collect results as they complete
@@ -289,8 +425,13 @@ class UploadDocumentApplication:
             errors=errors,
         )
 
-    def _process_single_file(self, file: UploadFile, conversation_id: Optional[int] = None) -> UploadDocumentOutput:
+    def _process_single_file(
+        self, file: UploadFile, conversation_id: Optional[int] = None, content_hash: Optional[str] = None,
+        indexed_copy: Optional[IndexedCopy] = None,
+    ) -> UploadDocumentOutput:
         """Process a single file - used by multi-worker processing."""
         return asyncio.run(self.upload_document(
-            UploadDocumentInput(file=file, conversation_id=conversation_id)
+            UploadDocumentInput(
+                file=file, conversation_id=conversation_id, content_hash=content_hash, indexed_copy=indexed_copy,
+            )
         ))
@@ -0,0 +1,69 @@
+"""
+OCR throughput (pages per second) of each OCR backend.
+
+Renders synthetic text pages with OpenCV and runs every backend over the
+same pages. The first call of each backend is a warm-up and is excluded,
+so the numbers reflect steady state (models already loaded for tesserocr,
+a fresh tesseract process per call for pytesseract). Scanned pages also
+pay for OcrService.detect_language before their OCR run; its time per
+page is reported, and included in the last column.
+
+Usage (from be-pro/upload):
+    python -m benchmarks.bench_ocr_backend --pages 20 --lang vie
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+from domain.parser.ocr import OcrService
+from domain.parser.ocr_backend import get_ocr_backend
+from domain.parser.ocr_backend import OCR_BACKENDS
+
+
+def make_page_image(page_number: int, lines: int = 30, width: int = 2480, height: int = 3508) -> np.ndarray:
+    """A grayscale A4 page at 300 DPI with `lines` lines of text."""
+    image = np.full((height, width), 255, dtype=np.uint8)
+    for line in range(lines):
+        cv2.putText(
+            image, f'Page {page_number} line {line}: the quick brown fox jumps over the lazy dog',
+            (150, 200 + line * 100), cv2.FONT_HERSHEY_SIMPLEX, 1.6, 0, 3,
+        )
+    return image
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--pages', type=int, default=20)
+    arg_parser.add_argument('--lang', default='vie')
+    args = arg_parser.parse_args()
+
+    pages = [make_page_image(i) for i in range(args.pages)]
+
+    ocr = OcrService()
+    start = time.perf_counter()
+    for page in pages:
+        ocr.detect_language(page)
+    detect_seconds = time.perf_counter() - start
+    print(f'language detection: {1000 * detect_seconds / len(pages):.1f} ms/page\n')
+
+    print(f"{'backend':<12} {'resolved':<12} {'pages':>6} {'seconds':>9} {'pages/s':>8} {'with detection':>15}")
+    for name in OCR_BACKENDS:
+        backend = get_ocr_backend(name)
+        backend.image_to_string(pages[0], args.lang)  # warm-up
+
+        start = time.perf_counter()
+        for page in pages:
+            backend.image_to_string(page, args.lang)
+        elapsed = time.perf_counter() - start
+
+        print(
+            f'{name:<12} {backend.name:<12} {len(pages):>6} {elapsed:>9.2f} {len(pages) / elapsed:>8.2f} '
+            f'{len(pages) / (elapsed + detect_seconds):>15.2f}',
+        )
+
+
+if __name__ == '__main__':
+    main()
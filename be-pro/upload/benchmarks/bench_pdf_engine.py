@@ -0,0 +1,122 @@
+"""
+Wall time and peak RSS of PDF extraction against page count.
+
+Compares the previous approach (re-open the PDF for every page) with
+PdfExtractionEngine (open once per page range) on a thread and a process
+pool using the pdfplumber text backend, and on a process pool using
+pdfium. Each measurement runs in a fresh process so peak RSS is not
+polluted by earlier runs.
+
+For the process pools the parent's peak RSS leaves out the workers, so
+the peak of the largest worker is reported too, and total_rss_mb is
+parent + workers x largest worker: an upper bound, as not every worker
+peaks as high or at the same time. Thread pools run in the parent and
+have no worker column.
+
+Usage (from be-pro/upload):
+    python -m benchmarks.bench_pdf_engine --pages 10 50 100 300
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import resource
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import pdfplumber
+from benchmarks.fixtures import make_text_pdf
+from domain.parser.ocr import OcrService
+from domain.parser.pdf_engine import PdfExtractionEngine
+from domain.parser.pdf_text_backend import extract_page_text
+from domain.parser.worker_pool import PageWorkerPool
+from shared.multiworker_config import MultiWorkerConfig
+
+
+def per_page_open(file_byte: bytes, max_workers: int) -> list:
+    """Previous behaviour: every page task re-parses the whole document."""
+    def process(page_index: int) -> str:
+        with pdfplumber.open(BytesIO(file_byte)) as pdf:
+            return extract_page_text(pdf.pages[page_index])
+
+    with pdfplumber.open(BytesIO(file_byte)) as pdf:
+        total_pages = len(pdf.pages)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(process, range(total_pages)))
+
+
+def page_range_engine(file_byte: bytes, max_workers: int, page_pool_mode: str, text_backend: str = 'pdfplumber') -> list:
+    pool = PageWorkerPool(MultiWorkerConfig(page_workers=max_workers, page_pool_mode=page_pool_mode))
+    try:
+        # The engine reads spooled files, as uploads are spooled before extraction
+        with tempfile.NamedTemporaryFile(suffix='.pdf') as spooled:
+            spooled.write(file_byte)
+            spooled.flush()
+            return PdfExtractionEngine(ocr=OcrService(), pool=pool, text_backend=text_backend).extract(spooled.name)
+    finally:
+        pool.shutdown()
+
+
+# Approaches whose pages are extracted in worker processes
+PROCESS_APPROACHES = {'ranges_processes', 'ranges_processes_pdfium'}
+
+APPROACHES = {
+    'per_page_open': per_page_open,
+    'ranges_threads': lambda file_byte, max_workers: page_range_engine(file_byte, max_workers, 'thread'),
+    'ranges_processes': lambda file_byte, max_workers: page_range_engine(file_byte, max_workers, 'process'),
+    'ranges_processes_pdfium': lambda file_byte, max_workers: page_range_engine(file_byte, max_workers, 'process', 'pdfium'),
+}
+
+
+def _measure(approach: str, page_count: int, max_workers: int, queue) -> None:
+    file_byte = make_text_pdf(page_count)
+    start = time.perf_counter()
+    APPROACHES[approach](file_byte, max_workers)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is reported in KiB on Linux; for children it is the largest
+    # reaped child, and the pool's workers have exited by now
+    parent_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    worker_rss_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    queue.put((elapsed, parent_rss_mb, worker_rss_mb))
+
+
+def measure(approach: str, page_count: int, max_workers: int) -> tuple:
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_measure, args=(approach, page_count, max_workers, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--pages', type=int, nargs='+', default=[10, 50, 100, 300])
+    arg_parser.add_argument('--workers', type=int, default=4)
+    args = arg_parser.parse_args()
+
+    print(
+        f"{'approach':<24} {'pages':>6} {'wall_s':>10} {'parent_rss_mb':>14} "
+        f"{'worker_rss_mb':>14} {'total_rss_mb':>13}",
+    )
+    for page_count in args.pages:
+        for approach in APPROACHES:
+            elapsed, parent_rss_mb, worker_rss_mb = measure(approach, page_count, args.workers)
+            if approach in PROCESS_APPROACHES:
+                worker_column = f'{worker_rss_mb:>14.1f}'
+                total_rss_mb = parent_rss_mb + args.workers * worker_rss_mb
+            else:
+                worker_column = f"{'-':>14}"
+                total_rss_mb = parent_rss_mb
+            print(
+                f'{approach:<24} {page_count:>6} {elapsed:>10.2f} {parent_rss_mb:>14.1f} '
+                f'{worker_column} {total_rss_mb:>13.1f}',
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Microbenchmark: separating table chars from body chars on table-heavy pages.
+
+Compares the previous per-table approach (crop the table, then re-filter
+every char on the page against its bbox) with TableCharIndex, which
+assigns every char in a single pass.
+
+Usage (from be-pro/upload):
+    python -m benchmarks.bench_table_index --tables 20 40 80
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import List
+from typing import Tuple
+
+from domain.parser.table_index import TableCharIndex
+from pdfplumber.utils import get_bbox_overlap
+from pdfplumber.utils import obj_to_bbox
+
+PAGE_WIDTH = 595.0
+PAGE_HEIGHT = 842.0
+CHAR_WIDTH = 5.0
+LINE_HEIGHT = 10.0
+
+
+def make_page(table_count: int, seed: int = 0) -> Tuple[List[dict], List[tuple]]:
+    """A page fully covered in chars with `table_count` tables stacked top to bottom."""
+    rng = random.Random(seed)
+    chars = [
+        {'x0': x, 'x1': x + CHAR_WIDTH, 'top': top, 'bottom': top + LINE_HEIGHT, 'text': 'x'}
+        for top in range(0, int(PAGE_HEIGHT), int(LINE_HEIGHT))
+        for x in range(0, int(PAGE_WIDTH), int(CHAR_WIDTH))
+    ]
+    band = PAGE_HEIGHT / table_count
+    bboxes = []
+    for i in range(table_count):
+        x0 = rng.uniform(0, PAGE_WIDTH / 2)
+        top = i * band + 2
+        bboxes.append((x0, top, x0 + rng.uniform(100, PAGE_WIDTH / 2), top + band - 4))
+    return chars, bboxes
+
+
+def per_table_filter(chars: List[dict], bboxes: List[tuple]) -> List[dict]:
+    """Previous behaviour: O(tables x chars)."""
+    remaining = chars
+    for bbox in bboxes:
+        table_chars = [char for char in chars if get_bbox_overlap(obj_to_bbox(char), bbox) is not None]
+        if not table_chars:
+            continue
+        remaining = [char for char in remaining if get_bbox_overlap(obj_to_bbox(char), bbox) is None]
+        remaining.append(table_chars[0] | {'text': '<table>'})
+    return remaining
+
+
+def single_pass_index(chars: List[dict], bboxes: List[tuple]) -> List[dict]:
+    remaining, chars_per_table = TableCharIndex(bboxes).assign_chars(chars)
+    for table_chars in chars_per_table:
+        if table_chars:
+            remaining.append(table_chars[0] | {'text': '<table>'})
+    return remaining
+
+
+def timed(fn, chars, bboxes, repeat: int) -> Tuple[float, int]:
+    best = float('inf')
+    result: List[dict] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(chars, bboxes)
+        best = min(best, time.perf_counter() - start)
+    return best, len(result)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--tables', type=int, nargs='+', default=[20, 40, 80])
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    print(f"{'tables':>6} {'chars':>7} {'per_table_ms':>13} {'index_ms':>9} {'speedup':>8}")
+    for table_count in args.tables:
+        chars, bboxes = make_page(table_count)
+        naive_s, naive_len = timed(per_table_filter, chars, bboxes, args.repeat)
+        index_s, index_len = timed(single_pass_index, chars, bboxes, args.repeat)
+        assert naive_len == index_len, 'approaches disagree on the number of output chars'
+        print(
+            f'{table_count:>6} {len(chars):>7} {naive_s * 1000:>13.1f} '
+            f'{index_s * 1000:>9.1f} {naive_s / index_s:>7.1f}x',
+        )
+
+
+if __name__ == '__main__':
+    main()
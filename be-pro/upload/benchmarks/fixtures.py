@@ -0,0 +1,49 @@
+"""
+Synthetic documents for the extraction benchmarks.
+"""
+from __future__ import annotations
+
+from typing import List
+
+
+def make_text_pdf(page_count: int, lines_per_page: int = 40) -> bytes:
+    """Build a born-digital PDF with `page_count` pages of Helvetica text."""
+    objects: List[bytes] = []
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    catalog_id = add(b'')  # filled once the page tree id is known
+    pages_id = add(b'')
+    font_id = add(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+
+    page_ids = []
+    for page_number in range(1, page_count + 1):
+        lines = [
+            f'({page_number}.{line} Lorem ipsum dolor sit amet, consectetur adipiscing elit.) Tj'
+            for line in range(1, lines_per_page + 1)
+        ]
+        stream = ('BT /F1 10 Tf 14 TL 50 800 Td ' + ' T* '.join(lines) + ' ET').encode('latin-1')
+        content_id = add(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        page_ids.append(add(
+            b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] '
+            b'/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>' % (pages_id, font_id, content_id),
+        ))
+
+    kids = b' '.join(b'%d 0 R' % page_id for page_id in page_ids)
+    objects[catalog_id - 1] = b'<< /Type /Catalog /Pages %d 0 R >>' % pages_id
+    objects[pages_id - 1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(page_ids))
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (number, obj)
+
+    xref_offset = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, catalog_id, xref_offset)
+    return bytes(out)
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 from .base import BaseChunkerService
+from .base import Chunk
 from .base import ChunkerInput
 from .base import ChunkerOutput
+from .base import TableInput
 from .service import ChunkerService
 
 __all__ = [
     'BaseChunkerService',
+    'Chunk',
     'ChunkerInput',
     'ChunkerOutput',
     'ChunkerService',
+    'TableInput',
 ]
@@ -22,15 +22,29 @@ class Chunk(BaseModel):
     heading_level: Optional[int] = None
 
 
+class TableInput(BaseModel):
+    """Structured table rows, chunked without going through markdown."""
+    title: str
+    header: List[str]
+    rows: List[List[str]]
+    # Position of the first chunk, after the chunks of the table's earlier batches
+    start_position: int = 0
+    # False while more rows follow: the rows of an unfinished last chunk are then returned, not chunked
+    last: bool = True
+
+
 class ChunkerInput(BaseModel):
     """Input data for the chunking process."""
     text: str
     metadata: dict
+    table: Optional[TableInput] = None
 
 
 class ChunkerOutput(BaseModel):
     """Output data from the chunking process."""
     chunks: List[Chunk]
+    # Table rows to put in front of the table's next batch (see TableInput.last)
+    open_rows: List[List[str]] = []
 
 
 class BaseChunkerService(ABC):
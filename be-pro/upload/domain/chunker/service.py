@@ -5,6 +5,7 @@ import math
 import re
 from typing import Dict
 from typing import List
+from typing import Tuple
 
 import nltk
 
@@ -12,15 +13,27 @@ from .base import BaseChunkerService
 from .base import Chunk
 from .base import ChunkerInput
 from .base import ChunkerOutput
-nltk.download('punkt')
-nltk.download('punkt_tab')
 
 
 class ChunkerService(BaseChunkerService):
     def __init__(self):
+        # Downloaded here rather than at import, which page worker processes also do
+        nltk.download('punkt')
+        nltk.download('punkt_tab')
         self.chunker = Chunker()
 
     def process(self, input_data: ChunkerInput) -> ChunkerOutput:
+        if input_data.table is not None:
+            chunks, open_rows = self.chunker.split_table_rows(
+                header=input_data.table.header,
+                rows=input_data.table.rows,
+                filename=input_data.metadata.get('filename', 'unknown'),
+                section_title=input_data.table.title,
+                start_position=input_data.table.start_position,
+                last=input_data.table.last,
+            )
+            return ChunkerOutput(chunks=chunks, open_rows=open_rows)
+
         chunks = self.chunker.chunk_markdown_by_title_and_tokens(
             text=input_data.text,
             filename=input_data.metadata.get('filename', 'unknown'),
@@ -189,6 +202,95 @@ class Chunker:
 
         return chunks
 
+    def chunk_table_rows(
+        self, header: List[str], rows: List[List[str]], filename: str, section_title: str,
+        max_tokens: int = 2048, heading_level: int = 2,
+    ) -> List[Chunk]:
+        """Chunk structured table rows, repeating the header in every chunk.
+
+        Like handle_table_chunking on the equivalent markdown table, but
+        content_json is built from the rows directly instead of re-parsing
+        the markdown, so rows with blank cells are kept too.
+        """
+        chunks, _ = self.split_table_rows(header, rows, filename, section_title, max_tokens, heading_level)
+        return chunks
+
+    def split_table_rows(
+        self, header: List[str], rows: List[List[str]], filename: str, section_title: str,
+        max_tokens: int = 2048, heading_level: int = 2, start_position: int = 0, last: bool = True,
+    ) -> Tuple[List[Chunk], List[List[str]]]:
+        """chunk_table_rows for one batch of a table streamed in several.
+
+        Positions continue from start_position. Unless the batch is the
+        table's last, the rows of its unfinished last chunk are returned
+        instead of chunked, to be put in front of the next batch; the chunks
+        are then the same as for the whole table in one call.
+        """
+        header = [self._clean_table_cell(cell) for cell in header]
+        keys = self._unique_table_keys(header)
+        header_lines = [self._markdown_table_row(header), self._markdown_table_row(['---'] * len(header))]
+        header_tokens = self.count_tokens('\n'.join(header_lines))
+
+        chunks = []
+        current_lines = list(header_lines)
+        current_json: List[Dict[str, str]] = []
+        current_rows: List[List[str]] = []
+        token_count = header_tokens
+
+        def flush() -> None:
+            content = '\n'.join(current_lines)
+            chunks.append(Chunk(
+                id=self.chunk_id,
+                content=content,
+                filename=filename,
+                section_title=section_title,
+                position=start_position + len(chunks),
+                tokens=token_count,
+                type='table',
+                content_json=current_json,
+                heading_level=heading_level,
+            ))
+            self.chunk_id += 1
+
+        for row in rows:
+            cells = [self._clean_table_cell(cell) for cell in row]
+            line = self._markdown_table_row(cells)
+            row_tokens = self.count_tokens(line)
+            if token_count + row_tokens > max_tokens and current_json:
+                flush()
+                current_lines = list(header_lines)
+                current_json = []
+                current_rows = []
+                token_count = header_tokens
+            current_lines.append(line)
+            current_json.append(dict(zip(keys, cells)))
+            current_rows.append(row)
+            token_count += row_tokens
+
+        if not last:
+            return chunks, current_rows
+        # A table without rows is one header chunk
+        if current_json or (not chunks and not start_position):
+            flush()
+
+        return chunks, []
+
+    def _clean_table_cell(self, cell: str) -> str:
+        return (cell or '').strip().replace('\n', ' ')
+
+    def _markdown_table_row(self, cells: List[str]) -> str:
+        return '| ' + ' | '.join(cells) + ' |'
+
+    def _unique_table_keys(self, header: List[str]) -> List[str]:
+        """content_json keys: blank headers get a column name, duplicates a suffix."""
+        keys = []
+        seen: Dict[str, int] = {}
+        for i, name in enumerate(header):
+            key = name or f'Column {i + 1}'
+            seen[key] = seen.get(key, 0) + 1
+            keys.append(key if seen[key] == 1 else f'{key} ({seen[key]})')
+        return keys
+
     def enhance_content_formatting(self, content: str) -> str:
         lines = content.strip().split('\n')
         bullet_count = sum(1 for line in lines if line.strip().startswith('- ') or line.strip().startswith('• '))
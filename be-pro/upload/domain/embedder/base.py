@@ -33,6 +33,8 @@ class ChunkData(BaseModel):
     type: Optional[str] = None
     content_json: Optional[List[Dict[str, str]]] = None
     heading_level: Optional[int] = None
+    # SHA-256 of the source file, used to reuse chunks of identical uploads
+    content_hash: Optional[str] = None
 
 
 class BaseEmbedderService(ABC):
@@ -70,3 +72,13 @@ class BaseStorage(ABC):
     def bulk_index_chunks(self, chunks: List[ChunkData], embeddings: Dict[int, List[float]]) -> None:
         """Bulk index chunks with embeddings."""
         raise NotImplementedError()
+
+    @abstractmethod
+    def count_chunks_by_content_hash(self, content_hash: str, conversation_id: int) -> int:
+        """Count the chunks of a conversation that came from a file with this content hash."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def attach_conversation(self, content_hash: str, source_conversation_id: int, conversation_id: int) -> int:
+        """Add a conversation to the chunks a file has in another, returning the number of chunks updated."""
+        raise NotImplementedError()
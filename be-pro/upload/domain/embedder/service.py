@@ -189,6 +189,7 @@ class OpenSearchStorage(BaseStorage):
                     'type': {'type': 'keyword'},
                     'content_json': {'type': 'object', 'enabled': False},
                     'heading_level': {'type': 'integer'},
+                    'content_hash': {'type': 'keyword'},
                 },
             },
         }
@@ -244,6 +245,7 @@ class OpenSearchStorage(BaseStorage):
                     'type': chunk.type,
                     'content_json': chunk.content_json,
                     'heading_level': chunk.heading_level,
+                    'content_hash': chunk.content_hash,
                 },
             }
             actions.append(action)
@@ -265,6 +267,52 @@ class OpenSearchStorage(BaseStorage):
             logger.error(f'Lỗi bulk index: {e}')
             raise
 
+    def _file_chunks_query(self, content_hash: str, conversation_id: int) -> dict:
+        # conversation_id may be an array (see attach_conversation); term matches any element
+        return {
+            'bool': {
+                'filter': [
+                    {'term': {'content_hash': content_hash}},
+                    {'term': {'conversation_id': conversation_id}},
+                ],
+            },
+        }
+
+    def count_chunks_by_content_hash(self, content_hash: str, conversation_id: int) -> int:
+        try:
+            res = self.client.count(
+                index=self.index_name,
+                body={'query': self._file_chunks_query(content_hash, conversation_id)},
+            )
+            return int(res['count'])
+        except Exception as e:
+            logger.error(f'Lỗi đếm chunks theo content_hash: {e}')
+            return 0
+
+    def attach_conversation(self, content_hash: str, source_conversation_id: int, conversation_id: int) -> int:
+        # conversation_id becomes an array; term filters on it match any element
+        script = {
+            'lang': 'painless',
+            'source': (
+                'def ids = ctx._source.conversation_id;'
+                'if (ids == null) { ctx._source.conversation_id = [params.conversation_id]; }'
+                'else if (ids instanceof List) {'
+                '  if (ids.contains(params.conversation_id)) { ctx.op = "noop"; }'
+                '  else { ids.add(params.conversation_id); }'
+                '}'
+                'else if (ids == params.conversation_id) { ctx.op = "noop"; }'
+                'else { ctx._source.conversation_id = [ids, params.conversation_id]; }'
+            ),
+            'params': {'conversation_id': conversation_id},
+        }
+        res = self.client.update_by_query(
+            index=self.index_name,
+            body={'query': self._file_chunks_query(content_hash, source_conversation_id), 'script': script},
+            conflicts='proceed',
+            refresh=True,
+        )
+        return int(res.get('updated', 0))
+
 
 class EmbedderService(BaseEmbedderService):
     """Main embedder service that orchestrates the embedding process."""
@@ -277,6 +325,24 @@ class EmbedderService(BaseEmbedderService):
         self.embedding_generator = embedding_generator or BedrockEmbeddingGenerator()
         self.storage = storage or OpenSearchStorage()
 
+    def attach_existing_chunks(
+        self, content_hash: str, source_conversation_id: int, expected_chunks: int, conversation_id: int,
+    ) -> int:
+        """Reuse the chunks a completed upload of an identical file indexed for another conversation.
+
+        Returns the number of chunks attached, or 0 if the file has to be
+        processed: the source conversation no longer has all expected_chunks.
+        """
+        existing = self.storage.count_chunks_by_content_hash(content_hash, source_conversation_id)
+        if existing != expected_chunks:
+            logger.warning(
+                f'Conversation {source_conversation_id} có {existing}/{expected_chunks} chunks của file, xử lý lại file',
+            )
+            return 0
+        updated = self.storage.attach_conversation(content_hash, source_conversation_id, conversation_id)
+        logger.info(f'Gắn {updated}/{existing} chunks có sẵn vào conversation {conversation_id}')
+        return existing
+
     async def process(self, input_data: EmbedderInput) -> EmbedderOutput:
         """Process multiple chunks with embeddings and storage."""
         try:
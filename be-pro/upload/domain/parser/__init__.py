@@ -1,13 +1,21 @@
 from __future__ import annotations
 
 from .base import BaseParserService
+from .base import ExtractionStats
+from .base import HeadingStats
+from .base import PageClassStats
 from .base import ParserInput
 from .base import ParserOutput
+from .base import TableBatch
 from .service import ParserService
 
 __all__ = [
     'ParserInput',
     'ParserOutput',
     'BaseParserService',
+    'ExtractionStats',
+    'HeadingStats',
+    'PageClassStats',
     'ParserService',
+    'TableBatch',
 ]
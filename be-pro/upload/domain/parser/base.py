@@ -3,11 +3,16 @@ from __future__ import annotations
 from abc import ABC
 from abc import abstractmethod
 from enum import Enum
+from typing import AsyncIterator
+from typing import Dict
+from typing import List
 from typing import Optional
 from typing import Union
 
 from fastapi import UploadFile
 from pydantic import BaseModel
+from pydantic import computed_field
+from pydantic import Field
 
 
 class FileType(Enum):
@@ -15,6 +20,7 @@ class FileType(Enum):
     PDF = 'pdf'
     DOCX = 'docx'
     XLSX = 'xlsx'
+    XLS = 'xls'
     IMAGE = 'image'
     UNKNOWN = 'unknown'
 
@@ -24,11 +30,76 @@ class ParserInput(BaseModel):
     file: UploadFile
 
 
+class TableBatch(BaseModel):
+    """Consecutive rows of a spreadsheet table, with the table's header row."""
+    title: str
+    header: List[str]
+    rows: List[List[str]]
+    # False while more rows of the table follow in later batches
+    last: bool = True
+
+
 class ParserOutput(BaseModel):
     """Output data from the parsing process."""
     raw_text: Union[str, dict]
     filename: str
     file_extension: Optional[str] = None
+    section_index: int = 0
+    # Set for spreadsheet sections, which skip markdown generation
+    table: Optional[TableBatch] = None
+
+
+class ExtractedSection(BaseModel):
+    """A piece of extracted text (a page, or a whole document), in document order."""
+    index: int
+    text: str
+    table: Optional[TableBatch] = None
+    # PDF pages: triage class ('text', 'tables' or 'scanned') and extraction time
+    page_class: Optional[str] = None
+    elapsed_seconds: float = 0.0
+    # DOCX: text of each paragraph with a heading style -> its level
+    heading_hints: Dict[str, int] = Field(default_factory=dict)
+
+
+class PageClassStats(BaseModel):
+    """Number of pages of one class and the time spent extracting them."""
+    pages: int = 0
+    seconds: float = 0.0
+
+
+class HeadingStats(BaseModel):
+    """Heading detection of one document: path taken per section, model calls, and cache hits that avoided them."""
+    # Sections per path: 'rules', 'cache', 'llm', or 'none' for sections without heading candidates
+    paths: Dict[str, int] = Field(default_factory=dict)
+    # Rule-based detector confidence of each section, to tune UPLOAD_HEADING_RULES_MIN_CONFIDENCE
+    rule_confidences: List[float] = Field(default_factory=list)
+    llm_calls: int = 0
+    llm_seconds: float = 0.0
+    # Model answers cut off before the end of their JSON (partly used, not cached)
+    truncated_answers: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    # Model time the cached results originally took
+    llm_seconds_saved: float = 0.0
+
+    @computed_field  # type: ignore
+    @property
+    def cache_hit_rate(self) -> float:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+
+class ExtractionStats(BaseModel):
+    """Per page class counts and timings of one document's extraction, and its heading detection."""
+    page_classes: Dict[str, PageClassStats] = Field(default_factory=dict)
+    headings: HeadingStats = Field(default_factory=HeadingStats)
+
+    def add(self, section: ExtractedSection) -> None:
+        if section.page_class is None:
+            return
+        stats = self.page_classes.setdefault(section.page_class, PageClassStats())
+        stats.pages += 1
+        stats.seconds += section.elapsed_seconds
 
 
 class BaseParserService(ABC):
@@ -38,3 +109,11 @@ class BaseParserService(ABC):
     async def process(self, input_data: ParserInput) -> ParserOutput:
         """Parse the input file and extract text content."""
         raise NotImplementedError()
+
+    @abstractmethod
+    def stream(self, input_data: ParserInput, stats: Optional[ExtractionStats] = None) -> AsyncIterator[ParserOutput]:
+        """Parse the input file section by section while it is still being extracted.
+
+        If given, stats is filled in as sections are extracted.
+        """
+        raise NotImplementedError()
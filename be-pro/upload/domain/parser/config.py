@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Rasterization of scanned PDF pages; table grids are located on a copy downsampled to LAYOUT_DPI
+OCR_DPI = int(os.getenv('UPLOAD_OCR_DPI', '300'))
+LAYOUT_DPI = int(os.getenv('UPLOAD_LAYOUT_DPI', '100'))
+# Scanned pages rendered per pdftoppm call; each page is then loaded and OCR'd one at a time
+OCR_RASTER_BATCH_PAGES = int(os.getenv('UPLOAD_OCR_RASTER_BATCH_PAGES', '4'))
+
+# OCR engine: 'tesserocr' (in-process, models stay loaded) or 'pytesseract' (one process per call).
+# Falls back to pytesseract when tesserocr is not installed.
+OCR_BACKEND = os.getenv('UPLOAD_OCR_BACKEND', 'tesserocr').lower()
+
+# OCR of detected tables: 'table' (one tesseract run per table) or 'cell' (one per cell)
+OCR_TABLE_MODE = os.getenv('UPLOAD_OCR_TABLE_MODE', 'table').lower()
+
+# Streaming parse: extracted pages are parsed in batches of roughly this many characters
+STREAM_SECTION_CHARS = int(os.getenv('UPLOAD_STREAM_SECTION_CHARS', '20000'))
+
+# Content-addressed OCR result cache, shared by all workers on the node (0 disables it)
+OCR_CACHE_DIR = os.getenv('UPLOAD_OCR_CACHE_DIR', '/tmp/upload-cache')
+OCR_CACHE_MAX_MB = int(os.getenv('UPLOAD_OCR_CACHE_MAX_MB', '512'))
+
+# Embedded DOCX images smaller than this many pixels (icons, bullets, rules) are not OCR'd
+DOCX_IMAGE_MIN_PIXELS = int(os.getenv('UPLOAD_DOCX_IMAGE_MIN_PIXELS', '10000'))
+
+# Spreadsheet reader: 'calamine' (python-calamine, also reads .xls) or 'openpyxl' (read-only mode, .xlsx only).
+# Falls back to openpyxl when python-calamine is not installed.
+SPREADSHEET_READER = os.getenv('UPLOAD_SPREADSHEET_READER', 'calamine').lower()
+
+# PDF text layer: 'pdfium' (pypdfium2; pdfplumber only for pages with table rulings) or 'pdfplumber' (every page).
+# Falls back to pdfplumber when pypdfium2 is not installed.
+PDF_TEXT_BACKEND = os.getenv('UPLOAD_PDF_TEXT_BACKEND', 'pdfium').lower()
+
+# Uploads are copied here before extraction; workers open (and memory-map) the file by path.
+# Empty uses the system temp directory.
+SPOOL_DIR = os.getenv('UPLOAD_SPOOL_DIR', '')
+
+# LLM heading extraction: text longer than HEADING_WINDOW_CHARS is split into windows of about that size,
+# each overlapping its neighbours by HEADING_WINDOW_OVERLAP_CHARS. At most HEADING_MAX_CONCURRENCY
+# Bedrock calls run at once per process; it also sizes the generator's thread and connection pools.
+HEADING_WINDOW_CHARS = int(os.getenv('UPLOAD_HEADING_WINDOW_CHARS', '12000'))
+HEADING_WINDOW_OVERLAP_CHARS = int(os.getenv('UPLOAD_HEADING_WINDOW_OVERLAP_CHARS', '1000'))
+HEADING_MAX_CONCURRENCY = int(os.getenv('UPLOAD_HEADING_MAX_CONCURRENCY', '4'))
+
+# Heading structure cache, keyed by the extracted text, model and prompt version (0 disables it).
+# Node-wide like the OCR cache; entries expire after UPLOAD_HEADING_CACHE_TTL_HOURS.
+HEADING_CACHE_DIR = os.getenv('UPLOAD_HEADING_CACHE_DIR', '/tmp/upload-cache')
+HEADING_CACHE_MAX_MB = int(os.getenv('UPLOAD_HEADING_CACHE_MAX_MB', '64'))
+HEADING_CACHE_TTL_HOURS = float(os.getenv('UPLOAD_HEADING_CACHE_TTL_HOURS', '720'))
+
+# Sections whose numbering/heading styles the rule-based detector places with at least this confidence (0-1)
+# skip the LLM. 1.0 only trusts flawless numbering; above 1 always calls the LLM.
+HEADING_RULES_MIN_CONFIDENCE = float(os.getenv('UPLOAD_HEADING_RULES_MIN_CONFIDENCE', '0.9'))
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import posixpath
+import re
+import zipfile
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from xml.etree.ElementTree import iterparse
+
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+R_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+A_NS = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+V_NS = '{urn:schemas-microsoft-com:vml}'
+
+W_BODY = f'{W_NS}body'
+W_P = f'{W_NS}p'
+W_R = f'{W_NS}r'
+W_T = f'{W_NS}t'
+W_TAB = f'{W_NS}tab'
+W_BR = f'{W_NS}br'
+W_CR = f'{W_NS}cr'
+W_TBL = f'{W_NS}tbl'
+W_TR = f'{W_NS}tr'
+W_TC = f'{W_NS}tc'
+W_P_STYLE = f'{W_NS}pStyle'
+W_GRID_SPAN = f'{W_NS}gridSpan'
+W_V_MERGE = f'{W_NS}vMerge'
+W_VAL = f'{W_NS}val'
+# Text boxes hold their own paragraphs, which python-docx never reported either
+W_TXBX_CONTENT = f'{W_NS}txbxContent'
+# Picture references: DrawingML (current Word) and VML (legacy documents)
+A_BLIP = f'{A_NS}blip'
+V_IMAGEDATA = f'{V_NS}imagedata'
+R_EMBED = f'{R_NS}embed'
+R_ID = f'{R_NS}id'
+
+DOCUMENT_PART = 'word/document.xml'
+DOCUMENT_RELS_PART = 'word/_rels/document.xml.rels'
+IMAGE_REL_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/image'
+
+# Built-in heading paragraph styles, by style id: 'Title', 'Heading1' ... 'Heading9'
+_HEADING_STYLE = re.compile(r'^heading\s*(\d)$', re.IGNORECASE)
+
+
+@dataclass
+class DocxBlock:
+    """A body-level paragraph or table, in document order."""
+    kind: str  # 'paragraph' or 'table'
+    text: str = ''
+    style: Optional[str] = None
+    rows: List[List[str]] = field(default_factory=list)
+    # Relationship ids of the pictures inside the block, in order
+    image_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class _Cell:
+    paragraphs: List[str] = field(default_factory=list)
+    span: int = 1
+    v_merge: Optional[str] = None
+
+
+@dataclass
+class _Table:
+    rows: List[List[str]] = field(default_factory=list)
+    row: List[_Cell] = field(default_factory=list)
+    cell: Optional[_Cell] = None
+
+    def end_row(self) -> None:
+        """Lay the row's cells out on the grid, like python-docx's row.cells."""
+        previous = self.rows[-1] if self.rows else []
+        texts: List[str] = []
+        for cell in self.row:
+            text = '\n'.join(cell.paragraphs)
+            for _ in range(cell.span):
+                # A vertically merged continuation shows the text of the cell above
+                if cell.v_merge == 'continue' and len(texts) < len(previous):
+                    texts.append(previous[len(texts)])
+                else:
+                    texts.append(text)
+        self.rows.append(texts)
+        self.row = []
+
+
+def heading_level(style: Optional[str]) -> Optional[int]:
+    """Heading level of a paragraph style id, or None for body styles."""
+    if not style:
+        return None
+    if style.lower() == 'title':
+        return 1
+    match = _HEADING_STYLE.match(style)
+    return int(match.group(1)) if match else None
+
+
+def iter_docx_blocks(archive: zipfile.ZipFile) -> Iterator[DocxBlock]:
+    """Stream paragraphs and tables out of word/document.xml in one linear pass.
+
+    Each body-level element is dropped as soon as it has been emitted, so
+    memory stays bounded by the largest single paragraph or table.
+    """
+    body = None
+    parents: List[str] = []
+    tables: List[_Table] = []
+    text_box_depth = 0
+    paragraph: List[str] = []
+    style: Optional[str] = None
+    image_ids: List[str] = []
+
+    with archive.open(DOCUMENT_PART) as stream:
+        for event, elem in iterparse(stream, events=('start', 'end')):
+            tag = elem.tag
+            if event == 'start':
+                if tag == W_BODY:
+                    body = elem
+                elif tag == W_TXBX_CONTENT:
+                    text_box_depth += 1
+                elif text_box_depth:
+                    pass
+                elif tag == W_P:
+                    paragraph = []
+                    style = None
+                elif tag == W_TBL:
+                    tables.append(_Table())
+                elif tag == W_TC and tables:
+                    tables[-1].cell = _Cell()
+                parents.append(tag)
+                continue
+
+            parents.pop()
+            parent = parents[-1] if parents else None
+
+            if tag == W_TXBX_CONTENT:
+                text_box_depth -= 1
+            elif text_box_depth:
+                pass
+            elif tag == W_T and parent == W_R:
+                paragraph.append(elem.text or '')
+            elif tag == W_TAB and parent == W_R:
+                paragraph.append('\t')
+            elif tag in (W_BR, W_CR) and parent == W_R:
+                paragraph.append('\n')
+            elif tag == A_BLIP or tag == V_IMAGEDATA:
+                rel_id = elem.get(R_EMBED) or elem.get(R_ID)
+                # mc:Fallback repeats the picture of mc:Choice
+                if rel_id and rel_id not in image_ids:
+                    image_ids.append(rel_id)
+            elif tag == W_P_STYLE:
+                style = elem.get(W_VAL)
+            elif tag == W_GRID_SPAN and tables and tables[-1].cell is not None:
+                tables[-1].cell.span = max(1, int(elem.get(W_VAL, '1')))
+            elif tag == W_V_MERGE and tables and tables[-1].cell is not None:
+                tables[-1].cell.v_merge = elem.get(W_VAL, 'continue')
+            elif tag == W_P:
+                text = ''.join(paragraph)
+                if not tables:
+                    yield DocxBlock(kind='paragraph', text=text, style=style, image_ids=image_ids)
+                    image_ids = []
+                elif tables[-1].cell is not None:
+                    tables[-1].cell.paragraphs.append(text)
+            elif tag == W_TC and tables and tables[-1].cell is not None:
+                tables[-1].row.append(tables[-1].cell)
+                tables[-1].cell = None
+            elif tag == W_TR and tables:
+                tables[-1].end_row()
+            elif tag == W_TBL:
+                table = tables.pop()
+                # Nested tables are not part of their cell's text (as in python-docx)
+                if not tables:
+                    yield DocxBlock(kind='table', rows=table.rows, image_ids=image_ids)
+                    image_ids = []
+
+            if parent == W_BODY and body is not None:
+                body.remove(elem)
+
+
+def read_image_rels(archive: zipfile.ZipFile) -> Dict[str, str]:
+    """Map relationship id -> zip path of each embedded (not linked) image."""
+    try:
+        rels_xml = archive.open(DOCUMENT_RELS_PART)
+    except KeyError:
+        return {}
+
+    images = {}
+    with rels_xml:
+        for _, elem in iterparse(rels_xml):
+            if elem.tag != f'{REL_NS}Relationship' or elem.get('Type') != IMAGE_REL_TYPE:
+                continue
+            if elem.get('TargetMode') == 'External':
+                continue
+            target = elem.get('Target', '')
+            if target.startswith('/'):
+                path = target.lstrip('/')
+            else:
+                path = posixpath.normpath(posixpath.join('word', target))
+            images[elem.get('Id')] = path
+    return images
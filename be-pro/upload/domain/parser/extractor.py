@@ -1,32 +1,68 @@
 from __future__ import annotations
 
+import hashlib
 import os
-import threading
-from concurrent.futures import as_completed
-from concurrent.futures import ThreadPoolExecutor
+import zipfile
+from collections import Counter
+from concurrent.futures import Future
 from io import BytesIO
+from typing import Dict
+from typing import Iterator
 from typing import List
+from typing import Optional
 from typing import Tuple
+from typing import Union
 
-import cv2
-import docx
 import numpy as np
-import openpyxl
-import pdfplumber
-import pytesseract
 from fastapi import UploadFile
-from pdf2image import convert_from_bytes
-from pdfplumber.utils import extract_text
-from pdfplumber.utils import get_bbox_overlap
-from pdfplumber.utils import obj_to_bbox
 from PIL import Image
+from shared.disk_cache import DiskCache
+from shared.logging.logger import get_logger
+from shared.multiworker_config import MultiWorkerConfig
 
+from .base import ExtractedSection
 from .base import FileType
+from .base import TableBatch
+from .config import DOCX_IMAGE_MIN_PIXELS
+from .config import OCR_CACHE_DIR
+from .config import OCR_CACHE_MAX_MB
+from .config import PDF_TEXT_BACKEND
+from .config import STREAM_SECTION_CHARS
+from .docx_reader import heading_level
+from .docx_reader import iter_docx_blocks
+from .docx_reader import read_image_rels
+from .markdown_table import table_to_markdown
+from .ocr import ocr_image_bytes
+from .ocr import OcrService
+from .pdf_engine import PageResult
+from .pdf_engine import PdfExtractionEngine
+from .spool import spool_upload
+from .spreadsheet import batch_rows
+from .spreadsheet import SpreadsheetEngine
+from .spreadsheet import take_header
+from .worker_pool import PageWorkerPool
+
+logger = get_logger(__name__)
 
 
 class ExtractorService:
     """Service for extracting raw text from various file formats."""
 
+    def __init__(self, config: Optional[MultiWorkerConfig] = None):
+        self.config = config or MultiWorkerConfig.from_environment()
+        self.config.validate()
+        ocr_cache = None
+        if OCR_CACHE_MAX_MB > 0:
+            ocr_cache = DiskCache(os.path.join(OCR_CACHE_DIR, 'ocr.sqlite3'), max_bytes=OCR_CACHE_MAX_MB * 1024 * 1024)
+        self.ocr = OcrService(cache=ocr_cache)
+        self.page_pool = PageWorkerPool(self.config)
+        self.pdf_engine = PdfExtractionEngine(ocr=self.ocr, pool=self.page_pool, text_backend=PDF_TEXT_BACKEND)
+        self.spreadsheet_engine = SpreadsheetEngine(pool=self.page_pool)
+
+    def close(self) -> None:
+        """Stop the shared page worker pool."""
+        self.page_pool.shutdown()
+
     def extract(self, file: UploadFile) -> str:
         """Extract raw text from the given file based on its format."""
         file_type = self.get_file_type(file)
@@ -35,6 +71,7 @@ class ExtractorService:
             FileType.PDF: self.extract_pdf,
             FileType.DOCX: self.extract_docx,
             FileType.XLSX: self.extract_xlsx,
+            FileType.XLS: self.extract_xlsx,
             FileType.IMAGE: self.extract_image,
         }
 
@@ -43,6 +80,24 @@ class ExtractorService:
         else:
             raise ValueError(f'Unsupported file type: {file_type}')
 
+    def iter_extract(self, file: UploadFile) -> Iterator[ExtractedSection]:
+        """Extract raw text section by section, in document order.
+
+        PDFs are yielded page by page while later pages are still being
+        extracted, spreadsheets as structured row batches; other formats are
+        yielded as a single section (DOCX with its heading style hints).
+        """
+        file_type = self.get_file_type(file)
+        if file_type == FileType.PDF:
+            yield from self.iter_extract_pdf(file)
+        elif file_type in (FileType.XLSX, FileType.XLS):
+            yield from self.iter_extract_xlsx(file)
+        elif file_type == FileType.DOCX:
+            text, heading_hints = self.read_docx(file)
+            yield ExtractedSection(index=0, text=text, heading_hints=heading_hints)
+        else:
+            yield ExtractedSection(index=0, text=self.extract(file))
+
     def get_file_type(self, file: UploadFile) -> FileType:
         """Determine file type based on filename and content type."""
         if not file.filename:
@@ -54,7 +109,7 @@ class ExtractorService:
             '.pdf': FileType.PDF,
             '.docx': FileType.DOCX,
             '.xlsx': FileType.XLSX,
-            '.xls': FileType.XLSX,
+            '.xls': FileType.XLS,
             '.jpg': FileType.IMAGE,
             '.jpeg': FileType.IMAGE,
             '.png': FileType.IMAGE,
@@ -67,57 +122,91 @@ class ExtractorService:
 
     def extract_docx(self, file: UploadFile) -> str:
         """Extract from a DOCX file."""
+        text, _ = self.read_docx(file)
+        return text
+
+    def read_docx(self, file: UploadFile) -> Tuple[str, Dict[str, int]]:
+        """Extract the text of a DOCX file, and the level of each paragraph with a heading style.
+
+        Embedded images are OCR'd on the page worker pool while the body is
+        still being read. Each distinct image (by content hash) is OCR'd once
+        and its text is placed after the paragraph or table holding its first
+        occurrence, so repeated logos and signatures appear only once.
+        """
+        # Extracted text, or the pending OCR of an image, in document order
+        content: List[Union[str, Future]] = []
+        heading_hints: Dict[str, int] = {}
+        image_futures: Dict[str, Optional[Future]] = {}
         try:
             file.file.seek(0)
-            document = docx.Document(file.file)
-            content = []
-
-            # Extract paragraphs and tables in document order
-            for element in document.element.body:
-                if element.tag.endswith('p'):  # Paragraph
-                    # Find corresponding paragraph object
-                    for para in document.paragraphs:
-                        if para._element == element:
-                            text = para.text.strip()
-                            if text:
-                                content.append(text)
-                            break
-                elif element.tag.endswith('tbl'):  # Table
-                    # Find corresponding table object
-                    for table in document.tables:
-                        if table._element == element:
-                            md_table = self.__docx_table_to_markdown(table)
-                            if md_table:
-                                content.append(md_table)
-                            break
-
-            # Handle images (stub)
-            for rel in document.part.rels.values():
-                if 'image' in rel.target_ref:
-                    image_content = self.__ocr_image(np.array(Image.open(BytesIO(rel.target_part.blob))))
-                    content.append(image_content)
 
-            return '\n\n'.join(content)
+            with zipfile.ZipFile(file.file) as archive:
+                image_rels = read_image_rels(archive)
+                # Extract paragraphs and tables in document order
+                for block in iter_docx_blocks(archive):
+                    if block.kind == 'table':
+                        text = self.__docx_table_to_markdown(block.rows)
+                    else:
+                        text = block.text.strip()
+                        level = heading_level(block.style)
+                        if text and level is not None:
+                            heading_hints.setdefault(text, level)
+                    if text:
+                        content.append(text)
+
+                    for rel_id in block.image_ids:
+                        future = self._submit_docx_image(archive, image_rels.get(rel_id), image_futures)
+                        if future is not None:
+                            content.append(future)
+
+            texts = [part if isinstance(part, str) else part.result().strip() for part in content]
+            return '\n\n'.join(text for text in texts if text), heading_hints
         except Exception as e:
+            for future in image_futures.values():
+                if future is not None:
+                    future.cancel()
             raise ValueError(f'Failed to extract text from DOCX file: {str(e)}')
 
-    def __docx_table_to_markdown(self, table) -> str:
-        """Convert DOCX table to Markdown format."""
-        if not table.rows:
-            return ''
+    def _submit_docx_image(
+        self,
+        archive: zipfile.ZipFile,
+        path: Optional[str],
+        image_futures: Dict[str, Optional[Future]],
+    ) -> Optional[Future]:
+        """Start OCR of an embedded image, unless it was seen before or is too small."""
+        if path is None:
+            return None
+        try:
+            blob = archive.read(path)
+        except KeyError:
+            return None
 
-        rows_data = []
-        for row in table.rows:
-            row_data = []
-            for cell in row.cells:
-                # Clean cell text and handle None values
-                cell_text = (cell.text or '').strip().replace('\n', ' ')
-                row_data.append(cell_text)
-            rows_data.append(row_data)
+        digest = hashlib.sha256(blob).hexdigest()
+        if digest in image_futures:
+            return None
+        image_futures[digest] = None
 
-        if not rows_data:
+        try:
+            # Only the header is read here; decoding happens in the worker
+            width, height = Image.open(BytesIO(blob)).size
+        except OSError as e:
+            # e.g. EMF/WMF vector images, which PIL cannot open
+            logger.warning('Skipping unreadable DOCX image', path=path, error=str(e))
+            return None
+        if width * height < DOCX_IMAGE_MIN_PIXELS:
+            return None
+
+        image_futures[digest] = self.page_pool.submit(ocr_image_bytes, self.ocr, blob)
+        return image_futures[digest]
+
+    def __docx_table_to_markdown(self, rows: List[List[str]]) -> str:
+        """Convert DOCX table rows to Markdown format."""
+        if not rows:
             return ''
 
+        # Clean cell text
+        rows_data = [[(cell or '').strip().replace('\n', ' ') for cell in row] for row in rows]
+
         # Create markdown table
         header = '| ' + ' | '.join(rows_data[0]) + ' |'
         separator = '| ' + ' | '.join(['---'] * len(rows_data[0])) + ' |'
@@ -125,327 +214,98 @@ class ExtractorService:
 
         return '\n'.join([header, separator] + body_rows)
 
-    def __convert_pdf_page_to_image(self, file_byte: bytes, page_number: int) -> np.ndarray:
-        """Convert PDF file bytes to a single PIL Image object."""
-        try:
-            image = convert_from_bytes(pdf_file=file_byte, first_page=page_number, last_page=page_number, dpi=300, fmt='jpg')[0]
-            return np.array(image)
-        except Exception as e:
-            raise ValueError(f'Failed to convert PDF to images: {str(e)}')
-
-    def __process_single_page(self, page_data: Tuple[int, bytes, UploadFile]) -> Tuple[int, str]:
-        page_index, file_byte, file = page_data
-        try:
-            with pdfplumber.open(BytesIO(file_byte)) as pdf:
-                if page_index >= len(pdf.pages):
-                    raise IndexError('Page index out of range')
-
-                page = pdf.pages[page_index]
-                filtered_page = page
-                chars = filtered_page.chars
-
-                for table in page.find_tables():
-                    table_chars = page.crop(table.bbox).chars
-                    if not table_chars:
-                        continue
-                    first_table_char = table_chars[0]
-                    filtered_page = filtered_page.filter(
-                        lambda obj: get_bbox_overlap(obj_to_bbox(obj), table.bbox) is None,
-                    )
-                    chars = filtered_page.chars
-                    markdown = self.__table_to_markdown(table.extract())
-                    chars.append(first_table_char | {'text': markdown})
-
-                page_text = extract_text(chars, layout=True)
-
-                if not page_text:
-                    page_text = ''
-                    image = self.__convert_pdf_page_to_image(file_byte, page_index + 1)
-                    ocr_text = self.__ocr_image(image)
-                    if ocr_text:
-                        page_text += ocr_text + '\n'
-
-            return (page_index, page_text)
-
-        except Exception as e:
-            print(f'Lỗi xử lý trang {page_index + 1}: {str(e)}')
-            return (page_index, '')
-
     def extract_pdf(self, file: UploadFile) -> str:
         """Extract from a PDF file."""
         try:
-            file.file.seek(0)
-            file_byte = file.file.read()
+            with spool_upload(file) as path:
+                page_results = self.pdf_engine.extract(path)
+            self._log_page_results(file, page_results)
 
-            with pdfplumber.open(BytesIO(file_byte)) as pdf:
-                total_pages = len(pdf.pages)
-
-            page_data_list = [(i, file_byte, file) for i in range(total_pages)]
-
-            results = {}
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                future_to_index = {
-                    executor.submit(self.__process_single_page, page_data): page_data[0]
-                    for page_data in page_data_list
-                }
-
-                for future in as_completed(future_to_index):
-                    try:
-                        page_index, page_text = future.result()
-                        results[page_index] = page_text.strip()
-                    except Exception as e:
-                        page_index = future_to_index[future]
-                        print(f'Lỗi xử lý trang {page_index + 1}: {str(e)}')
-                        results[page_index] = ''
-
-            content = []
-            for i in sorted(results.keys()):
-                content.append(results[i])
-
-            return '\n'.join(content)
+            return '\n'.join(result.text.strip() for result in page_results)
 
         except Exception as e:
             raise ValueError(f'Failed to extract text from PDF file: {str(e)}')
 
-    def __table_to_markdown(self, table: List[List[str]]) -> str:
-        """Convert table to Markdown format."""
-        if not table or not table[0]:
-            return ''
-
-        # Clean table data
-        cleaned_table = []
-        for row in table:
-            cleaned_row = []
-            for cell in row:
-                if cell is None:
-                    cleaned_row.append('')
-                else:
-                    # Clean cell content
-                    cleaned_cell = str(cell).strip().replace('\n', ' ')
-                    cleaned_row.append(cleaned_cell)
-            cleaned_table.append(cleaned_row)
-
-        # Ensure all rows have the same number of columns
-        max_cols = max(len(row) for row in cleaned_table)
-        for row in cleaned_table:
-            while len(row) < max_cols:
-                row.append('')
-
-        # Create markdown table
-        header = '| ' + ' | '.join(cleaned_table[0]) + ' |'
-        separator = '| ' + ' | '.join(['---'] * max_cols) + ' |'
-        body_rows = ['| ' + ' | '.join(row) + ' |' for row in cleaned_table[1:]]
-
-        return '\n'.join([header, separator] + body_rows)
-
-    def __ocr_image(self, image: np.ndarray) -> str:
-        try:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-            # Làm mờ để giảm nhiễu
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-            # Áp dụng adaptive threshold để tạo ảnh nhị phân
-            thresh = cv2.adaptiveThreshold(
-                blurred, 255,
-                cv2.ADAPTIVE_THRESH_MEAN_C,
-                cv2.THRESH_BINARY_INV,
-                15, 4,
-            )
-
-            # Tìm các đường thẳng dọc và ngang
-            kernel_h = cv2.getStructuringElement(cv2.MORPH_RECT, (30, 1))
-            kernel_v = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 30))
-
-            detect_h = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel_h, iterations=2)
-            detect_v = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel_v, iterations=2)
-
-            # Kết hợp cả hai để tạo mask bảng
-            table_mask = cv2.add(detect_h, detect_v)
-
-            # Tìm contours từ mask bảng
-            contours, _ = cv2.findContours(table_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-            # Cắt bảng và phủ trắng + placeholder
-            table_images: list[np.ndarray] = []
-            for i, cnt in enumerate(contours):
-                x, y, w, h = cv2.boundingRect(cnt)
-                if w > 100 and h > 100:
-                    table = image[y:y + h, x:x + w].copy()
-                    table_images.insert(0, table)
-
-                    # Tạo placeholder
-                    cv2.rectangle(image, (x, y), (x + w, y + h), (255, 255, 255), thickness=-1)
-
-                    text = 'table here'
-                    font = cv2.FONT_HERSHEY_SIMPLEX
-                    font_scale = 1
-                    thickness = 2
-                    text_size = cv2.getTextSize(text, font, font_scale, thickness)[0]
-                    text_x = x + (w - text_size[0]) // 2
-                    text_y = y + (h + text_size[1]) // 2
-                    cv2.putText(image, text, (text_x, text_y), font, font_scale, (0, 0, 0), thickness)
-
-            custom_config = r'--oem 3 --psm 6 -l vie'
-            page_content = pytesseract.image_to_string(image, config=custom_config)
-
-            # If Vietnamese fails, try English only
-            if not page_content:
-                custom_config = r'--oem 3 --psm 6 -l eng'
-                page_content = pytesseract.image_to_string(image, config=custom_config)
-
-            table_contents = []
-            for table_image in table_images:
-                cells = self.__extract_cells_from_table(table_image)
-                table_data = []
-                for row in cells:
-                    row_data = []
-                    for cell in row:
-                        cell_content = pytesseract.image_to_string(cell, config=custom_config)
-                        # Cho phép xuống dòng trong ô:
-                        cell_content = cell_content.replace('\n', '<br>')
-                        row_data.append(cell_content)
-                    table_data.append(row_data)
-
-                markdown = self.__table_to_markdown(table_data)
-                table_contents.append(markdown)
-
-            for content in table_contents:
-                page_content = page_content.replace('table here', content, 1)
-
-            return page_content
-
-        except Exception as e:
-            raise ValueError(f'Failed to extract text from image: {str(e)}')
-
-    def __extract_cells_from_table(self, table_image: np.ndarray):
-        gray = cv2.cvtColor(table_image, cv2.COLOR_BGR2GRAY)
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        contrast = clahe.apply(gray)
-        blur = cv2.GaussianBlur(contrast, (3, 3), 0)
-
-        # Phát hiện đường kẻ bằng adaptive threshold
-        thresh = cv2.adaptiveThreshold(
-            blur, 255, cv2.ADAPTIVE_THRESH_MEAN_C,
-            cv2.THRESH_BINARY_INV, 15, 4,
+    def iter_extract_pdf(self, file: UploadFile) -> Iterator[ExtractedSection]:
+        """Extract from a PDF file, one section per page (empty pages included, for stats)."""
+        page_results = []
+        with spool_upload(file) as path:
+            for result in self.pdf_engine.iter_extract(path):
+                page_results.append(result)
+                yield ExtractedSection(
+                    index=result.page_index,
+                    text=result.text.strip(),
+                    page_class=result.page_class,
+                    elapsed_seconds=result.elapsed_seconds,
+                )
+
+        self._log_page_results(file, page_results)
+
+    def _log_page_results(self, file: UploadFile, page_results: List[PageResult]) -> None:
+        logger.info(
+            'Extracted PDF pages',
+            filename=file.filename,
+            pages=len(page_results),
+            page_seconds=[round(result.elapsed_seconds, 3) for result in page_results],
+            ocr_langs={result.page_index + 1: result.ocr_lang for result in page_results if result.ocr_lang},
+            page_classes=dict(Counter(result.page_class for result in page_results)),
         )
 
-        # Dilation để nối border kép thành một khối
-        dilated = cv2.dilate(thresh, np.ones((3, 3), np.uint8), iterations=1)
-
-        # Phát hiện các đường kẻ dọc và ngang
-        scale = 20
-        h_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (table_image.shape[1] // scale, 1))
-        v_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, table_image.shape[0] // scale))
-
-        detect_h = cv2.morphologyEx(dilated, cv2.MORPH_OPEN, h_kernel, iterations=2)
-        detect_v = cv2.morphologyEx(dilated, cv2.MORPH_OPEN, v_kernel, iterations=2)
-
-        # Kết hợp để tạo mặt nạ bảng
-        grid_mask = cv2.add(detect_h, detect_v)
-        merged_mask = cv2.dilate(grid_mask, np.ones((3, 3), np.uint8), iterations=1)
-
-        # Tìm contour của ô
-        contours, _ = cv2.findContours(merged_mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-
-        cell_coords = []
-        for cnt in contours:
-            x, y, w, h = cv2.boundingRect(cnt)
-            if w > 20 and h > 20:  # lọc nhiễu nhỏ
-                cell_coords.append((x, y, w, h))
-
-        img_h, img_w = table_image.shape[:2]
-
-        for cnt in contours:
-            x, y, w, h = cv2.boundingRect(cnt)
-            area = w * h
-            if area > 0.9 * img_h * img_w:
-                cell_coords.remove((x, y, w, h))
-
-        # Sắp xếp theo y trước, x sau
-        cell_coords = sorted(cell_coords, key=lambda b: (b[1], b[0]))
-
-        # Gom các ô thành từng hàng
-        rows = []
-        current_row: list[tuple[int, int, int, int]] = []
-        last_y = -100
-        tolerance_y = 20
-
-        for bbox in cell_coords:
-            x, y, w, h = bbox
-            if abs(y - last_y) > tolerance_y:
-                if current_row:
-                    rows.append(current_row)
-                current_row = [bbox]
-                last_y = y
-            else:
-                current_row.append(bbox)
-        if current_row:
-            rows.append(current_row)
-
-        # Sắp xếp các ô trong từng hàng theo x
-        cells = []
-        for row in rows:
-            row_sorted = sorted(row, key=lambda b: b[0])
-            row_imgs = [table_image[y:y + h, x:x + w] for (x, y, w, h) in row_sorted]
-            cells.append(row_imgs)
-
-        return cells
-
     def extract_image(self, file: UploadFile) -> str:
         """Extract from an image file using OCR."""
         try:
             file.file.seek(0)
             image = np.array(Image.open(file.file))
 
-            content = self.__ocr_image(image)
+            content = self.ocr.ocr_image(image)
             return content
 
         except Exception as e:
             raise ValueError(f'Failed to extract text from image file: {str(e)}')
 
     def extract_xlsx(self, file: UploadFile) -> str:
-        """Extract raw text from an XLSX file and convert tables to Markdown."""
+        """Extract raw text from an XLSX or XLS file and convert sheets to Markdown."""
         try:
-            file.file.seek(0)
-            workbook = openpyxl.load_workbook(BytesIO(file.file.read()))
+            legacy_xls = self.get_file_type(file) == FileType.XLS
             content = []
 
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
-
-                # Add sheet name as header
-                content.append(f'## Sheet: {sheet_name}')
-
-                # Find the actual data range
-                max_row = 0
-                max_col = 0
-                for row in sheet.iter_rows():
-                    for cell in row:
-                        if cell.value is not None:
-                            max_row = max(max_row, cell.row)
-                            max_col = max(max_col, cell.column)
-
-                if max_row > 0 and max_col > 0:
-                    # Extract data as table
-                    table_data = []
-                    for row in sheet.iter_rows(min_row=1, max_row=max_row, min_col=1, max_col=max_col):
-                        row_data = []
-                        for cell in row:
-                            value = cell.value
-                            if value is None:
-                                row_data.append('')
-                            else:
-                                row_data.append(str(value).strip())
-                        table_data.append(row_data)
-
-                    # Convert to markdown table
-                    if table_data:
-                        md_table = self.__table_to_markdown(table_data)
-                        if md_table:
-                            content.append(md_table)
-                else:
-                    content.append('(Empty sheet)')
+            with spool_upload(file) as path:
+                for sheet in self.spreadsheet_engine.iter_sheets(path, legacy_xls=legacy_xls):
+                    # Add sheet name as header
+                    content.append(f'## Sheet: {sheet.name}')
+
+                    md_table = table_to_markdown(list(sheet.iter_rows()))
+                    if md_table:
+                        content.append(md_table)
+                    else:
+                        content.append('(Empty sheet)')
 
             return '\n\n'.join(content)
         except Exception as e:
             raise ValueError(f'Failed to extract text from XLSX file: {str(e)}')
+
+    def iter_extract_xlsx(self, file: UploadFile) -> Iterator[ExtractedSection]:
+        """Extract from an XLSX or XLS file as structured row batches.
+
+        The first non-empty row of each sheet is taken as its header and
+        carried by every batch of that sheet; its last batch is marked so the
+        chunker can carry rows across batches. Empty sheets are skipped.
+        """
+        legacy_xls = self.get_file_type(file) == FileType.XLS
+        index = 0
+        with spool_upload(file) as path:
+            for sheet in self.spreadsheet_engine.iter_sheets(path, legacy_xls=legacy_xls):
+                rows = sheet.iter_rows()
+                header = take_header(rows)
+                if header is None:
+                    continue
+                # Each batch is held until the next one is read, to know which is last
+                pending: Optional[TableBatch] = None
+                for batch in batch_rows(rows, STREAM_SECTION_CHARS):
+                    if pending is not None:
+                        pending.last = False
+                        yield ExtractedSection(index=index, text='', table=pending)
+                        index += 1
+                    pending = TableBatch(title=f'Sheet: {sheet.name}', header=header, rows=batch)
+                yield ExtractedSection(index=index, text='', table=pending)
+                index += 1
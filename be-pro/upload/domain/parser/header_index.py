@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import re
+from collections import Counter
+from collections import defaultdict
+from collections import deque
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+
+# Numbering prefix ignored by the fuzzy match: 'A. ', 'A1 ', 'A.1. ', 'B.'
+# (a whole token, so a capitalized first word keeps its first letter)
+_NUMBER_PREFIX = re.compile(r'^[A-Z](?:\.?\d+)*\.?(?:\s+|$)')
+# Share of the header's words a line must contain to match it fuzzily
+FUZZY_MIN_WORD_SHARE = 0.7
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.split())
+
+
+def _words(text: str) -> List[str]:
+    return _NUMBER_PREFIX.sub('', text.strip()).strip().lower().split()
+
+
+class HeaderLineIndex:
+    """Maps header texts to the lines they came from, each line at most once.
+
+    Built once over the lines: an exact index on whitespace-normalized
+    text, and an inverted word index for the fuzzy match (the header's
+    words, without its numbering prefix, mostly present in the line). A
+    lookup costs the postings of the header's words instead of a scan and
+    a regex per line. Matched lines are consumed, so a header repeated in
+    the document resolves to its successive occurrences in order.
+
+    Lines are identified by their position in lines, or by the matching
+    entry of keys (e.g. their line numbers in the document); keys must
+    increase with position.
+    """
+
+    def __init__(self, lines: List[str], keys: Optional[List[int]] = None):
+        keys = keys if keys is not None else list(range(len(lines)))
+        self._exact: Dict[str, Deque[int]] = defaultdict(deque)
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._consumed: Set[int] = set()
+        for i, line in zip(keys, lines):
+            self._exact[_normalize(line)].append(i)
+            for word in set(_words(line)):
+                self._postings[word].append(i)
+
+    def consume(self, key: int) -> None:
+        """Mark a line as taken, e.g. by a header given by line number."""
+        self._consumed.add(key)
+
+    def find(self, header_text: str) -> int:
+        """Key of the first unconsumed line matching header_text (and consume it), or -1."""
+        # First try exact match
+        occurrences = self._exact.get(_normalize(header_text))
+        while occurrences:
+            i = occurrences.popleft()
+            if i not in self._consumed:
+                self._consumed.add(i)
+                return i
+
+        # Then try partial match: count, per line, the header's words it contains
+        header_words = _words(header_text)
+        if not header_words:
+            return -1
+        common_words: Counter = Counter()
+        for word in set(header_words):
+            common_words.update(self._postings.get(word, ()))
+        threshold = len(header_words) * FUZZY_MIN_WORD_SHARE
+        matches = [i for i, count in common_words.items() if count >= threshold and i not in self._consumed]
+        if not matches:
+            return -1
+        i = min(matches)
+        self._consumed.add(i)
+        return i
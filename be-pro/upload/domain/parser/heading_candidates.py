@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from .heading_windows import parse_numbering
+
+# Lines longer than this are body text, whatever they look like
+CANDIDATE_MAX_CHARS = 150
+# Unnumbered, mixed-case lines must be at most this long
+SHORT_LINE_MAX_CHARS = 60
+# Length of the neighbouring text shown with each candidate
+CONTEXT_CHARS = 60
+
+# 'Họ tên: Nguyễn Văn A' is a form field, not a heading
+_KEY_VALUE = re.compile(r'^[^:]{1,40}:\s*\S')
+_SENTENCE_END = ('.', ',', ';')
+
+
+@dataclass
+class HeadingCandidate:
+    """A line that may be a heading, with the neighbouring text shown to the model."""
+    line_index: int
+    text: str
+    style_level: Optional[int] = None  # from a DOCX heading style
+    before: str = ''
+    after: str = ''
+
+    def to_prompt_line(self) -> str:
+        entry = f'[{self.line_index}] {self.text}'
+        if self.style_level is not None:
+            entry += f' (style: heading {self.style_level})'
+        if self.before:
+            entry += f'\n    before: {self.before}'
+        if self.after:
+            entry += f'\n    after: {self.after}'
+        return entry
+
+
+def is_heading_candidate(text: str) -> bool:
+    """Plausible heading: numbered, all caps, or a short line that is not a sentence or form field."""
+    if not text or len(text) > CANDIDATE_MAX_CHARS:
+        return False
+    # Markdown table rows (from PDF and DOCX tables)
+    if text.startswith('|'):
+        return False
+    # Section numbers as parse_numbering reads them; a single 'I.' passes as a letter
+    if parse_numbering(text, roman=False) is not None:
+        return True
+    letters = [char for char in text if char.isalpha()]
+    if len(letters) >= 3 and text.upper() == text:
+        return True
+    return (
+        len(text) <= SHORT_LINE_MAX_CHARS
+        and (text[0].isupper() or text[0].isdigit())
+        and not text.endswith(_SENTENCE_END)
+        and not _KEY_VALUE.match(text)
+    )
+
+
+def _context(text: str) -> str:
+    if len(text) <= CONTEXT_CHARS:
+        return text
+    return text[:CONTEXT_CHARS].rstrip() + '...'
+
+
+def find_heading_candidates(
+    lines: List[str], heading_hints: Optional[Dict[str, int]] = None,
+) -> List[HeadingCandidate]:
+    """Candidate heading lines, in document order.
+
+    Lines with a DOCX heading style (heading_hints, keyed by text) are always
+    candidates. Each candidate gets the nearest non-empty line before and
+    after it as context, unless that line is a candidate itself and is
+    therefore shown anyway.
+    """
+    heading_hints = heading_hints or {}
+    candidates: List[HeadingCandidate] = []
+    last_text = ''
+    last_is_candidate = False
+    for line_index, line in enumerate(lines):
+        text = line.strip()
+        if not text:
+            continue
+        style_level = heading_hints.get(text)
+        is_candidate = style_level is not None or is_heading_candidate(text)
+
+        if last_is_candidate and not is_candidate:
+            candidates[-1].after = _context(text)
+        if is_candidate:
+            candidates.append(HeadingCandidate(
+                line_index,
+                text,
+                style_level=style_level,
+                before=_context(last_text) if last_text and not last_is_candidate else '',
+            ))
+        last_text = text
+        last_is_candidate = is_candidate
+    return candidates
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from .heading_candidates import HeadingCandidate
+from .heading_windows import has_long_roman
+from .heading_windows import HeadingContext
+from .heading_windows import HeadingLine
+from .heading_windows import parse_numbering
+
+# Fewer placed headings than this is too little structure to trust
+MIN_RULE_HEADINGS = 3
+# The outermost numbering is h2, under the document title (h1)
+TOP_NUMBERING_LEVEL = 2
+MAX_LEVEL = 4
+
+_SENTENCE_END = ('.', ',', ';')
+
+
+@dataclass
+class RuleDetection:
+    """Headings placed by numbering and styles, and how far they can be trusted (0 to 1)."""
+    headings: List[HeadingLine] = field(default_factory=list)
+    confidence: float = 0.0
+
+
+def _find_list_items(
+    candidates: List[HeadingCandidate], numberings: List[Optional[Tuple[str, Tuple[int, ...]]]],
+) -> Set[int]:
+    """Positions of numbered candidates that are list items rather than headings.
+
+    Two consecutive numbered siblings ('1.' then '2.', same kind and parent)
+    with no body line between them are items of a list: a candidate gets no
+    after context when the next non-empty line is itself a candidate.
+    """
+    items: Set[int] = set()
+    for i in range(len(candidates) - 1):
+        current, following = numberings[i], numberings[i + 1]
+        if current is None or following is None or candidates[i].after:
+            continue
+        (kind, ordinals), (next_kind, next_ordinals) = current, following
+        if kind == next_kind and ordinals[:-1] == next_ordinals[:-1]:
+            items.update((i, i + 1))
+    return items
+
+
+def detect_rule_headings(
+    candidates: List[HeadingCandidate], context: Optional[HeadingContext] = None,
+) -> RuleDetection:
+    """Place headings from section numbers and DOCX heading styles alone.
+
+    Numbering kinds nest in order of first appearance ('I.' > 'A.' > '1.'),
+    the outermost at h2, each '.N' one level deeper ('A.1.' under 'A.').
+    An all-caps line before the first numbered heading is the h1 title.
+    Runs of numbered siblings without body text between them are lists and
+    stay body text. With the context of the document's earlier batches,
+    kinds keep the levels they had there and no second title is placed.
+
+    The confidence is the product of:
+    - the share of numbered headings that continue their sequence (A, B,
+      C; restarting at 1 under a new parent); a later batch may open in
+      the middle of a sequence, so its headings before any enclosing one
+      are taken as continuing the previous batch,
+    - the share of likely headings the rules could place: all-caps lines
+      and numbered sentences are left out, and are probably headings or
+      list items only the model can sort out,
+    - the share of numbered headings whose level no other numbering kind
+      uses ('1.' placed at the level of 'A.1.' may be either),
+    - a penalty for documents with fewer than MIN_RULE_HEADINGS headings.
+    """
+    roman = (context is not None and 'roman' in context.levels) or any(
+        has_long_roman(candidate.text) for candidate in candidates
+    )
+    numberings = [
+        parse_numbering(candidate.text, roman) if candidate.style_level is None else None
+        for candidate in candidates
+    ]
+    list_items = _find_list_items(candidates, numberings)
+
+    kind_levels: Dict[str, int] = {}
+    if context is not None:
+        kind_levels = {signature: level for signature, level in context.levels.items() if '.' not in signature}
+    # Last ordinal seen per (kind, parent ordinals), with its level
+    last_ordinals: Dict[Tuple[str, Tuple[int, ...]], Tuple[int, int]] = {}
+    # Numbering kinds placed at each level, and the level of each numbered heading
+    level_kinds: Dict[int, Set[str]] = {}
+    numbered_levels: List[int] = []
+    headings: List[HeadingLine] = []
+    numbered = in_sequence = unplaced = 0
+    title_done = context.title_seen if context is not None else False
+    continued = context is not None and context.batches > 0
+    # Outermost level numbered so far in this batch
+    outermost = MAX_LEVEL + 1
+
+    for position, candidate in enumerate(candidates):
+        text = candidate.text
+        if candidate.style_level is not None:
+            level = min(candidate.style_level, MAX_LEVEL)
+            headings.append(HeadingLine(candidate.line_index, level, text))
+            last_ordinals = {key: value for key, value in last_ordinals.items() if value[1] <= level}
+            continue
+
+        numbering = numberings[position]
+        if numbering is None:
+            is_caps = text.upper() == text and sum(char.isalpha() for char in text) >= 3
+            if is_caps and not title_done and not headings:
+                headings.append(HeadingLine(candidate.line_index, 1, text))
+                title_done = True
+            elif is_caps:
+                unplaced += 1
+            continue
+        title_done = True
+        if position in list_items:
+            continue
+        if text.endswith(_SENTENCE_END):
+            unplaced += 1
+            continue
+
+        kind, ordinals = numbering
+        if kind not in kind_levels:
+            kind_levels[kind] = max(kind_levels.values(), default=TOP_NUMBERING_LEVEL - 1) + 1
+        level = kind_levels[kind] + len(ordinals) - 1
+        numbered += 1
+        if level > MAX_LEVEL:
+            continue
+
+        key = (kind, ordinals[:-1])
+        expected = last_ordinals[key][0] + 1 if key in last_ordinals else 1
+        if ordinals[-1] == expected or (continued and key not in last_ordinals and level <= outermost):
+            in_sequence += 1
+        outermost = min(outermost, level)
+        # A new section restarts the numbering of everything below it
+        last_ordinals = {other: value for other, value in last_ordinals.items() if value[1] <= level}
+        last_ordinals[key] = (ordinals[-1], level)
+        level_kinds.setdefault(level, set()).add(kind)
+        numbered_levels.append(level)
+        headings.append(HeadingLine(candidate.line_index, level, text))
+
+    styled = sum(1 for candidate in candidates if candidate.style_level is not None)
+    placed = numbered + styled
+    if not placed:
+        return RuleDetection(headings=headings, confidence=0.0)
+
+    sequence = (in_sequence + styled) / placed
+    coverage = placed / (placed + unplaced)
+    colliding = sum(1 for level in numbered_levels if len(level_kinds[level]) > 1)
+    distinct = 1 - colliding / placed
+    confidence = sequence * coverage * distinct * min(1.0, placed / MIN_RULE_HEADINGS)
+    return RuleDetection(headings=headings, confidence=confidence)
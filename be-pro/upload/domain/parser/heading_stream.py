@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+from typing import List
+from typing import Tuple
+from typing import Union
+
+from .heading_windows import HEADING_LEVELS
+
+HeadingItem = Union[int, str]
+
+_NUMBER_CHARS = frozenset('0123456789+-.eE')
+
+
+class HeadingJsonScanner:
+    """Incremental parser of the model's {"h1": [...], "h2": [...], ...} answer.
+
+    Text is fed as the model streams it; every array element of an h1-h4
+    key is returned as soon as it is complete, so headings can be applied
+    while the rest is still being generated. Text before the opening brace
+    (prose, a ```json fence) and after the closing one is ignored. If the
+    stream is cut off, everything completed so far has been returned, and
+    complete is False.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.complete = False
+        # Open containers, '{' or '['
+        self._stack: List[str] = []
+        self._key = ''
+        self._expect_key = False
+        self._string: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._number: List[str] = []
+
+    def feed(self, text: str) -> List[Tuple[str, HeadingItem]]:
+        """Consume text; return the (level, item) pairs it completed, in order."""
+        found: List[Tuple[str, HeadingItem]] = []
+        for char in text:
+            if self.complete:
+                break
+            if self._in_string:
+                self._string.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._end_value(''.join(self._string), found)
+                    self._string = []
+                continue
+            if self._number:
+                if char in _NUMBER_CHARS:
+                    self._number.append(char)
+                    continue
+                self._end_value(''.join(self._number), found)
+                self._number = []
+
+            if not self._stack and char != '{':
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string = [char]
+            elif char == '-' or char.isdigit():
+                self._number = [char]
+            elif char in '{[':
+                self._stack.append(char)
+                self.started = True
+                self._expect_key = self._stack == ['{']
+            elif char in '}]':
+                if self._stack:
+                    self._stack.pop()
+                self.complete = not self._stack
+            elif char == ':' and self._stack == ['{']:
+                self._expect_key = False
+            elif char == ',' and self._stack == ['{']:
+                self._expect_key = True
+        return found
+
+    def _end_value(self, token: str, found: List[Tuple[str, HeadingItem]]) -> None:
+        try:
+            value = json.loads(token)
+        except ValueError:
+            return
+        if self._stack == ['{'] and self._expect_key:
+            self._key = value if isinstance(value, str) else ''
+        elif self._stack == ['{', '['] and self._key in HEADING_LEVELS:
+            if isinstance(value, str) or (isinstance(value, int) and not isinstance(value, bool)):
+                found.append((self._key, value))
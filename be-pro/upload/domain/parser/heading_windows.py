@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+HEADING_LEVELS = ('h1', 'h2', 'h3', 'h4')
+
+# Leading section number: 'A.', 'A.1.', 'II.', '3.2', ...
+_NUMBERING = re.compile(r'^([A-Z]|[IVXLC]{2,}|\d+)((?:\.\d+)*)(\.?)(?=\s)')
+_ROMAN_VALUES = {'I': 1, 'V': 5, 'X': 10, 'L': 50, 'C': 100}
+
+
+@dataclass
+class TextWindow:
+    """Items (lines, or heading candidates) [start, stop) sent to the model in one prompt.
+
+    Windows overlap so that every heading is seen with some context on both
+    sides, but only headings found in [core_start, core_stop) are kept; the
+    cores partition the document, so each item is decided by one window.
+    """
+    start: int
+    stop: int
+    core_start: int
+    core_stop: int
+
+
+@dataclass
+class HeadingLine:
+    """A heading the model found, mapped back to its line in the document."""
+    line_index: int
+    level: int
+    text: str
+
+
+def split_windows(lines: List[str], max_chars: int, overlap_chars: int) -> List[TextWindow]:
+    """Split lines (or prompt entries) into overlapping windows of about max_chars characters.
+
+    Text that fits in max_chars is a single window. Otherwise cores of
+    max_chars - 2 * overlap_chars characters are each extended by
+    overlap_chars worth of lines on both sides. A line longer than a core is
+    never split.
+    """
+    sizes = [len(line) + 1 for line in lines]
+    if sum(sizes) <= max_chars:
+        return [TextWindow(0, len(lines), 0, len(lines))]
+
+    core_chars = max(1, max_chars - 2 * overlap_chars)
+    windows = []
+    core_start = 0
+    while core_start < len(lines):
+        core_stop = core_start
+        chars = 0
+        while core_stop < len(lines) and (core_stop == core_start or chars + sizes[core_stop] <= core_chars):
+            chars += sizes[core_stop]
+            core_stop += 1
+
+        start = core_start
+        chars = 0
+        while start > 0 and chars + sizes[start - 1] <= overlap_chars:
+            start -= 1
+            chars += sizes[start]
+        stop = core_stop
+        chars = 0
+        while stop < len(lines) and chars + sizes[stop] <= overlap_chars:
+            chars += sizes[stop]
+            stop += 1
+
+        windows.append(TextWindow(start, stop, core_start, core_stop))
+        core_start = core_stop
+    return windows
+
+
+def _roman_value(numeral: str) -> int:
+    total = 0
+    for char, next_char in zip(numeral, numeral[1:] + ' '):
+        value = _ROMAN_VALUES[char]
+        total += -value if _ROMAN_VALUES.get(next_char, 0) > value else value
+    return total
+
+
+def has_long_roman(text: str) -> bool:
+    """Whether a line is numbered with a roman numeral of two or more letters ('II.', 'IV.')."""
+    numbering = parse_numbering(text)
+    return numbering is not None and numbering[0] == 'roman'
+
+
+def parse_numbering(text: str, roman: Optional[bool] = None) -> Optional[Tuple[str, Tuple[int, ...]]]:
+    """Section number of a line as (kind, ordinals): 'A.2.' -> ('letter', (1, 2)), 'II.' -> ('roman', (2,)).
+
+    A single I, V or X is read as a roman numeral when roman is True (the
+    document has longer numerals such as 'II.'), as a letter when it is
+    False, and is left unparsed when roman is None, as it may be either.
+    """
+    match = _NUMBERING.match(text.strip())
+    # 'A Report' or '2024 plan' are words, not section numbers
+    if not match or not (match.group(2) or match.group(3)):
+        return None
+    head, tail = match.group(1), match.group(2)
+    if head.isdigit():
+        kind, first = 'number', int(head)
+    elif len(head) > 1 or (roman and head in 'IVX'):
+        kind, first = 'roman', _roman_value(head)
+    elif head in 'IVX' and roman is None:
+        return None
+    else:
+        kind, first = 'letter', ord(head) - ord('A') + 1
+    return kind, (first,) + tuple(int(part) for part in tail.split('.')[1:])
+
+
+def numbering_signature(text: str, roman: Optional[bool] = None) -> Optional[str]:
+    """Shape of a heading's section number: 'A.1.' -> 'letter.1', 'II.' -> 'roman', none -> None.
+
+    A single I, V or X is read as in parse_numbering.
+    """
+    numbering = parse_numbering(text, roman)
+    if numbering is None:
+        return None
+    kind, ordinals = numbering
+    depth = len(ordinals) - 1
+    return f'{kind}.{depth}' if depth else kind
+
+
+def harmonize_levels(headings: List[HeadingLine], levels: Optional[Dict[str, int]] = None) -> List[HeadingLine]:
+    """Give every heading with the same numbering shape the same level.
+
+    Windows are classified independently, and one without the document
+    title in view tends to promote its sections by one level. Each
+    numbering shape takes the level from the first window that used it,
+    which has seen the most of the document's top; nested numbers ('A.1.')
+    are then kept at least one level below their parent shape ('A.').
+    Unnumbered headings keep the level they were given. A single 'I.',
+    'V.' or 'X.' is a roman numeral once the document has longer ones.
+
+    levels holds shapes settled earlier (by previous batches of the
+    document); they are kept, and the new shapes are added to it.
+    """
+    levels = levels if levels is not None else {}
+    headings = sorted(headings, key=lambda heading: heading.line_index)
+    roman = 'roman' in levels or any(has_long_roman(heading.text) for heading in headings)
+    new_signatures = []
+    for heading in headings:
+        signature = numbering_signature(heading.text, roman)
+        if signature and signature not in levels:
+            levels[signature] = heading.level
+            new_signatures.append(signature)
+
+    for signature in sorted(new_signatures, key=lambda signature: signature.count('.')):
+        kind, _, depth = signature.partition('.')
+        if not depth:
+            continue
+        parent = kind if depth == '1' else f'{kind}.{int(depth) - 1}'
+        if parent in levels and levels[signature] <= levels[parent]:
+            levels[signature] = min(len(HEADING_LEVELS), levels[parent] + 1)
+
+    for heading in headings:
+        signature = numbering_signature(heading.text, roman)
+        if signature:
+            heading.level = levels[signature]
+    return headings
+
+
+@dataclass
+class HeadingContext:
+    """Heading levels settled by the earlier batches of a streamed document.
+
+    Each batch is parsed on its own, and would otherwise pick its own title
+    and numbering levels; the context keeps them consistent across batches.
+    """
+    # Level per numbering shape (see numbering_signature)
+    levels: Dict[str, int] = field(default_factory=dict)
+    title_seen: bool = False
+    batches: int = 0
+
+    def apply(self, headings: List[HeadingLine]) -> List[HeadingLine]:
+        """Align a batch's headings with the earlier batches, and remember its levels.
+
+        Once the document has a title, a batch that still has an h1 was
+        classified as a document of its own, so all its headings move one
+        level down. Numbered headings then take their shape's level from the
+        earlier batches.
+        """
+        if self.title_seen and any(heading.level == 1 for heading in headings):
+            for heading in headings:
+                heading.level = min(len(HEADING_LEVELS), heading.level + 1)
+        headings = harmonize_levels(headings, self.levels)
+        self.title_seen = self.title_seen or any(heading.level == 1 for heading in headings)
+        self.batches += 1
+        return headings
@@ -1,28 +1,53 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator
+from typing import Iterator
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 from shared.logging.logger import get_logger
 
-from .prompt_builder import build_markdown_prompt
+from .config import HEADING_MAX_CONCURRENCY
 
 # Initialize logger
 logger = get_logger(__name__)
 load_dotenv()
 
+_END_OF_STREAM = object()
+
 
 class NovaMarkdownGenerator:
-    def __init__(self, region_name=None, model_id=None):
+    """Bedrock Nova client whose calls never block the event loop.
+
+    boto3 is synchronous, so each call runs on a thread pool owned by the
+    generator, sized like its HTTP connection pool, and responses are
+    streamed back as they are generated. Callers beyond
+    max_concurrency queue on that pool, without holding a thread or a
+    connection, and the default executor used by the rest of the service
+    is left alone. The pool is thread-safe, so one generator can serve
+    several event loops (uploads run on their own loops in worker threads).
+    """
+
+    def __init__(self, region_name=None, model_id=None, max_concurrency: int = HEADING_MAX_CONCURRENCY):
         # Use region_name parameter or fall back to environment variable
         if region_name:
             self.region_name = region_name
         else:
             self.region_name = os.getenv('AWS_BEDROCK_REGION', 'ap-southeast-2')  # Default to ap-southeast-2 if not set
-        self.client = boto3.client('bedrock-runtime', region_name=self.region_name)
+        self.max_concurrency = max(1, max_concurrency)
+        self.client = boto3.client(
+            'bedrock-runtime',
+            region_name=self.region_name,
+            config=Config(max_pool_connections=self.max_concurrency),
+        )
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='bedrock')
 
         # Allow model override via parameter or environment variable
         if model_id:
@@ -36,11 +61,20 @@ class NovaMarkdownGenerator:
             'Initialized NovaMarkdownGenerator',
             region=self.region_name,
             model_id=self.model_id,
+            max_concurrency=self.max_concurrency,
         )
 
-    async def generate(self, raw_text: str) -> str:
-        prompt = build_markdown_prompt(raw_text)
-        logger.info('Generating markdown', model_id=self.model_id, input_length=len(raw_text))
+    def close(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    async def stream_from_prompt(self, prompt: str) -> AsyncIterator[str]:
+        """Yield the model's output text as it is generated.
+
+        The Bedrock response stream is read on the generator's thread pool
+        and handed over through a queue; closing the iterator early stops
+        the reader at the next event.
+        """
+        logger.info('Generating markdown', model_id=self.model_id, input_length=len(prompt))
 
         body = {
             'messages': [
@@ -59,29 +93,45 @@ class NovaMarkdownGenerator:
             },
         }
 
-        try:
-            response = self.client.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps(body),
-                contentType='application/json',
-                accept='application/json',
-            )
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stopped = threading.Event()
+
+        def produce() -> None:
+            # Closed while still queued for a thread: skip the call
+            if stopped.is_set():
+                return
+            try:
+                for text in self._invoke_stream(body, stopped):
+                    loop.call_soon_threadsafe(queue.put_nowait, text)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, _END_OF_STREAM)
 
-            # Read response according to Bedrock API format
-            response_body = response['body'].read()
-            response_data = json.loads(response_body)
+        output_length = 0
+        try:
+            producer = loop.run_in_executor(self.executor, produce)
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is _END_OF_STREAM:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    output_length += len(item)
+                    yield item
+            finally:
+                stopped.set()
+                await producer
 
-            # Nova models return output in a different format
-            result = response_data['output']['message']['content'][0]['text']
             logger.info(
                 'Markdown generation completed',
                 model_id=self.model_id,
-                output_length=len(result),
+                output_length=output_length,
                 status='success',
             )
 
-            return result
-
         except ClientError as e:
             if 'AccessDeniedException' in str(e):
                 logger.error(
@@ -99,3 +149,30 @@ class NovaMarkdownGenerator:
                     status='failed',
                 )
                 raise
+
+    def _invoke_stream(self, body: dict, stopped: threading.Event) -> Iterator[str]:
+        """Blocking Bedrock streaming call, run on the generator's thread pool; yields text deltas."""
+        response = self.client.invoke_model_with_response_stream(
+            modelId=self.model_id,
+            body=json.dumps(body),
+            contentType='application/json',
+            accept='application/json',
+        )
+        stream = response['body']
+        try:
+            for event in stream:
+                if stopped.is_set():
+                    break
+                chunk = event.get('chunk')
+                if not chunk:
+                    continue
+                # Nova models stream contentBlockDelta events, then messageStop
+                data = json.loads(chunk['bytes'])
+                text = data.get('contentBlockDelta', {}).get('delta', {}).get('text')
+                if text:
+                    yield text
+                stop_reason = data.get('messageStop', {}).get('stopReason')
+                if stop_reason == 'max_tokens':
+                    logger.warning('Generation stopped at the token limit', model_id=self.model_id)
+        finally:
+            stream.close()
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from typing import List
+
+
+def table_to_markdown(table: List[List[str]]) -> str:
+    """Convert table to Markdown format."""
+    if not table or not table[0]:
+        return ''
+
+    # Clean table data
+    cleaned_table = []
+    for row in table:
+        cleaned_row = []
+        for cell in row:
+            if cell is None:
+                cleaned_row.append('')
+            else:
+                # Clean cell content
+                cleaned_cell = str(cell).strip().replace('\n', ' ')
+                cleaned_row.append(cleaned_cell)
+        cleaned_table.append(cleaned_row)
+
+    # Ensure all rows have the same number of columns
+    max_cols = max(len(row) for row in cleaned_table)
+    for row in cleaned_table:
+        while len(row) < max_cols:
+            row.append('')
+
+    # Create markdown table
+    header = '| ' + ' | '.join(cleaned_table[0]) + ' |'
+    separator = '| ' + ' | '.join(['---'] * max_cols) + ' |'
+    body_rows = ['| ' + ' | '.join(row) + ' |' for row in cleaned_table[1:]]
+
+    return '\n'.join([header, separator] + body_rows)
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import OrderedDict
+from io import BytesIO
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+from shared.disk_cache import DiskCache
+from shared.logging.logger import get_logger
+
+from .config import OCR_BACKEND
+from .config import OCR_TABLE_MODE
+from .markdown_table import table_to_markdown
+from .ocr_backend import BaseOcrBackend
+from .ocr_backend import get_ocr_backend
+from .preprocessing import CellBox
+from .preprocessing import OcrPreprocessor
+
+logger = get_logger(__name__)
+
+# Bump when OCR output for the same image and settings changes
+OCR_CACHE_VERSION = '1'
+
+# Language detection runs on the central part of the page, downscaled
+LANG_DETECT_SCALE = 0.5
+LANG_DETECT_MIN_LETTERS = 20
+# Diacritic marks per letter above which the page is treated as Vietnamese;
+# English has only the dots of i and j, a few per hundred letters
+VIETNAMESE_MARK_RATIO = 0.12
+# Marks are shorter than this share of the median glyph height, and at most
+# this share of it away from the letter they sit on or under
+MARK_MAX_HEIGHT = 0.5
+MARK_MAX_GAP = 0.6
+COMBINED_LANG = 'vie+eng'
+
+
+class OcrService:
+    """OCR for page and document images, including bordered tables."""
+
+    def __init__(
+        self,
+        backend_name: str = OCR_BACKEND,
+        table_mode: str = OCR_TABLE_MODE,
+        cache: Optional[DiskCache] = None,
+    ):
+        # Only the name is stored: the service is pickled into page workers,
+        # each of which resolves (and keeps) its own engine instance
+        self.backend_name = backend_name
+        # 'table': one tesseract run per table, words placed into cells by position
+        # 'cell': one tesseract run per cell
+        self.table_mode = table_mode
+        self.preprocessor = OcrPreprocessor()
+        self.cache = cache
+
+    @property
+    def backend(self) -> BaseOcrBackend:
+        return get_ocr_backend(self.backend_name)
+
+    def ocr_image(self, image: np.ndarray) -> str:
+        return self.ocr_image_with_language(image)[0]
+
+    def detect_language(self, gray: np.ndarray) -> str:
+        """Pick the tesseract language for a page by counting diacritic marks on a downscaled crop.
+
+        No OCR is run. Vietnamese and English share the Latin script, so
+        tesseract's script detection (psm 0) cannot tell them apart, but
+        Vietnamese puts a separate accent or dot on most syllables. Marks
+        are small connected components just above or below a letter; in
+        English only the dots of i and j are.
+        """
+        height, width = gray.shape[:2]
+        crop = gray[height // 4:3 * height // 4, width // 8:7 * width // 8]
+        if crop.size == 0:
+            return COMBINED_LANG
+        small = cv2.resize(crop, None, fx=LANG_DETECT_SCALE, fy=LANG_DETECT_SCALE, interpolation=cv2.INTER_AREA)
+        _, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        # Row 0 is the background; single pixels are noise
+        stats = stats[1:][stats[1:, cv2.CC_STAT_AREA] >= 2]
+        if len(stats) < LANG_DETECT_MIN_LETTERS:
+            # Too little text to decide, let tesseract use both models
+            return COMBINED_LANG
+
+        lefts, tops = stats[:, cv2.CC_STAT_LEFT], stats[:, cv2.CC_STAT_TOP]
+        widths, heights = stats[:, cv2.CC_STAT_WIDTH], stats[:, cv2.CC_STAT_HEIGHT]
+        glyph_height = float(np.median(heights))
+        # Table rules and pictures are far taller than any glyph
+        is_letter = (heights > MARK_MAX_HEIGHT * glyph_height) & (heights <= 3 * glyph_height)
+        is_mark = (heights <= MARK_MAX_HEIGHT * glyph_height) & (widths <= glyph_height)
+        letter_count = int(is_letter.sum())
+        if letter_count < LANG_DETECT_MIN_LETTERS:
+            return COMBINED_LANG
+
+        # Marks x letters: the mark's center lies over the letter, just above its top or below its bottom
+        centers = (lefts[is_mark] + widths[is_mark] / 2)[:, None]
+        mark_tops = tops[is_mark][:, None]
+        mark_bottoms = mark_tops + heights[is_mark][:, None]
+        letter_tops, letter_bottoms = tops[is_letter], tops[is_letter] + heights[is_letter]
+        over = (lefts[is_letter] <= centers) & (centers < lefts[is_letter] + widths[is_letter])
+        max_gap = MARK_MAX_GAP * glyph_height
+        above = (mark_bottoms <= letter_tops) & (letter_tops - mark_bottoms <= max_gap)
+        below = (mark_tops >= letter_bottoms) & (mark_tops - letter_bottoms <= max_gap)
+        marks = int((over & (above | below)).any(axis=1).sum())
+        return 'vie' if marks / letter_count >= VIETNAMESE_MARK_RATIO else 'eng'
+
+    def cache_stats(self) -> Dict[str, float]:
+        return self.cache.stats() if self.cache else {}
+
+    def _cache_key(self, image: np.ndarray) -> str:
+        """Hash of the pixels plus every setting that changes the OCR output."""
+        digest = hashlib.sha256()
+        settings = (
+            OCR_CACHE_VERSION, self.backend.name, self.table_mode,
+            self.preprocessor.layout_scale, image.shape, str(image.dtype),
+        )
+        digest.update(repr(settings).encode('utf-8'))
+        digest.update(np.ascontiguousarray(image).data)
+        return digest.hexdigest()
+
+    def ocr_image_with_language(self, image: np.ndarray) -> Tuple[str, str]:
+        """OCR an image in a single full pass; returns (text, tesseract language used).
+
+        Results are looked up in and stored to the OCR cache when one is configured.
+        """
+        if self.cache is None:
+            return self._ocr_image_with_language(image)
+
+        cache_key = self._cache_key(image)
+        try:
+            cached = self.cache.get(cache_key)
+        except Exception as e:
+            logger.warning('OCR cache lookup failed', error=str(e))
+            cached = None
+        if cached is not None:
+            entry = json.loads(cached)
+            return entry['text'], entry['lang']
+
+        text, lang = self._ocr_image_with_language(image)
+        try:
+            self.cache.set(cache_key, json.dumps({'text': text, 'lang': lang}, ensure_ascii=False))
+        except Exception as e:
+            logger.warning('OCR cache write failed', error=str(e))
+        return text, lang
+
+    def _ocr_image_with_language(self, image: np.ndarray) -> Tuple[str, str]:
+        try:
+            # Scanned PDF pages are already rasterized to grayscale
+            gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            lang = self.detect_language(gray)
+
+            # Binarize once; tables are located on a downscaled copy and
+            # their cells are read from the same binary image
+            preprocessed = self.preprocessor.process(gray)
+
+            # Cắt bảng và phủ trắng + placeholder
+            tables: List[Tuple[np.ndarray, np.ndarray]] = []
+            for x, y, w, h in preprocessed.tables:
+                table = image[y:y + h, x:x + w].copy()
+                tables.insert(0, (table, preprocessed.binary[y:y + h, x:x + w]))
+
+                # Tạo placeholder
+                cv2.rectangle(image, (x, y), (x + w, y + h), (255, 255, 255), thickness=-1)
+
+                text = 'table here'
+                font = cv2.FONT_HERSHEY_SIMPLEX
+                font_scale = 1
+                thickness = 2
+                text_size = cv2.getTextSize(text, font, font_scale, thickness)[0]
+                text_x = x + (w - text_size[0]) // 2
+                text_y = y + (h + text_size[1]) // 2
+                cv2.putText(image, text, (text_x, text_y), font, font_scale, (0, 0, 0), thickness)
+
+            page_content = self.backend.image_to_string(image, lang, psm=6)
+
+            table_contents = []
+            for table_image, table_binary in tables:
+                rows = self.preprocessor.detect_cell_boxes(table_binary)
+                if self.table_mode == 'cell':
+                    table_data = self._ocr_table_per_cell(table_image, rows, lang)
+                else:
+                    table_data = self._ocr_table_words(table_image, rows, lang)
+
+                markdown = table_to_markdown(table_data)
+                table_contents.append(markdown)
+
+            for content in table_contents:
+                page_content = page_content.replace('table here', content, 1)
+
+            return page_content, lang
+
+        except Exception as e:
+            raise ValueError(f'Failed to extract text from image: {str(e)}')
+
+    def _ocr_table_per_cell(self, table_image: np.ndarray, rows: List[List[CellBox]], lang: str) -> List[List[str]]:
+        """OCR every cell with its own tesseract run."""
+        table_data = []
+        for row in rows:
+            row_data = []
+            for (x, y, w, h) in row:
+                cell_content = self.backend.image_to_string(table_image[y:y + h, x:x + w], lang, psm=6)
+                # Cho phép xuống dòng trong ô:
+                cell_content = cell_content.replace('\n', '<br>')
+                row_data.append(cell_content)
+            table_data.append(row_data)
+        return table_data
+
+    def _ocr_table_words(self, table_image: np.ndarray, rows: List[List[CellBox]], lang: str) -> List[List[str]]:
+        """OCR the whole table once and place each word in the cell containing its center."""
+        # psm 11: sparse text, finds words anywhere between the grid lines
+        data = self.backend.image_to_data(table_image, lang, psm=11)
+
+        # Words per cell, grouped by tesseract line so line breaks survive as <br>
+        cell_lines: Dict[Tuple[int, int], Dict[Tuple[int, int, int], List[str]]] = {
+            (r, c): OrderedDict() for r, row in enumerate(rows) for c in range(len(row))
+        }
+        for i, word in enumerate(data['text']):
+            word = word.strip()
+            if not word or float(data['conf'][i]) < 0:
+                continue
+            center_x = data['left'][i] + data['width'][i] / 2
+            center_y = data['top'][i] + data['height'][i] / 2
+            cell = self._find_cell(rows, center_x, center_y)
+            if cell is None:
+                continue
+            line_key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            cell_lines[cell].setdefault(line_key, []).append(word)
+
+        return [
+            ['<br>'.join(' '.join(words) for words in cell_lines[(r, c)].values()) for c in range(len(row))]
+            for r, row in enumerate(rows)
+        ]
+
+    def _find_cell(self, rows: List[List[CellBox]], px: float, py: float) -> Optional[Tuple[int, int]]:
+        """(row, column) of the cell containing point (px, py), or None."""
+        for r, row in enumerate(rows):
+            for c, (x, y, w, h) in enumerate(row):
+                if x <= px < x + w and y <= py < y + h:
+                    return r, c
+        return None
+
+
+def ocr_image_bytes(ocr: OcrService, blob: bytes) -> str:
+    """OCR an encoded image (PNG, JPEG, ...); a module-level task for the page worker pool."""
+    # Decode to grayscale here so palette and RGBA images need no conversion later
+    image = np.array(Image.open(BytesIO(blob)).convert('L'))
+    return ocr.ocr_image(image)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import csv
+import threading
+from abc import ABC
+from abc import abstractmethod
+from typing import Dict
+from typing import List
+
+import numpy as np
+import pytesseract
+from PIL import Image
+from shared.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Column order of tesseract's TSV output (and keys of pytesseract's Output.DICT)
+TSV_COLUMNS = (
+    'level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+    'left', 'top', 'width', 'height', 'conf', 'text',
+)
+
+
+class BaseOcrBackend(ABC):
+    """Abstract base class for OCR engines."""
+
+    name: str = ''
+
+    @abstractmethod
+    def image_to_string(self, image: np.ndarray, lang: str, psm: int = 6) -> str:
+        """Recognize the text of an image."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def image_to_data(self, image: np.ndarray, lang: str, psm: int = 6) -> Dict[str, list]:
+        """Recognize words with their boxes, in pytesseract's Output.DICT layout."""
+        raise NotImplementedError()
+
+
+class PytesseractBackend(BaseOcrBackend):
+    """Runs the tesseract binary once per call; models are reloaded every time."""
+
+    name = 'pytesseract'
+
+    def image_to_string(self, image: np.ndarray, lang: str, psm: int = 6) -> str:
+        return pytesseract.image_to_string(image, config=f'--oem 3 --psm {psm} -l {lang}')
+
+    def image_to_data(self, image: np.ndarray, lang: str, psm: int = 6) -> Dict[str, list]:
+        return pytesseract.image_to_data(
+            image, config=f'--oem 3 --psm {psm} -l {lang}', output_type=pytesseract.Output.DICT,
+        )
+
+
+class TesserocrBackend(BaseOcrBackend):
+    """In-process libtesseract handles, one per (thread, lang, psm), kept loaded between calls."""
+
+    name = 'tesserocr'
+
+    def __init__(self):
+        import tesserocr
+
+        self._tesserocr = tesserocr
+        self._local = threading.local()
+        self._fallback = PytesseractBackend()
+        self._unavailable: set = set()
+
+    def _get_api(self, lang: str, psm: int):
+        key = (lang, psm)
+        if key in self._unavailable:
+            raise RuntimeError(f'tesserocr could not load {lang}')
+        apis = getattr(self._local, 'apis', None)
+        if apis is None:
+            apis = self._local.apis = {}
+        if key not in apis:
+            try:
+                apis[key] = self._tesserocr.PyTessBaseAPI(lang=lang, psm=psm, oem=self._tesserocr.OEM.DEFAULT)
+            except RuntimeError:
+                self._unavailable.add(key)
+                raise
+        return apis[key]
+
+    def image_to_string(self, image: np.ndarray, lang: str, psm: int = 6) -> str:
+        try:
+            api = self._get_api(lang, psm)
+        except RuntimeError as e:
+            # e.g. traineddata missing for lang
+            logger.warning('tesserocr unavailable, using pytesseract', lang=lang, error=str(e))
+            return self._fallback.image_to_string(image, lang, psm)
+        api.SetImage(Image.fromarray(image))
+        return api.GetUTF8Text()
+
+    def image_to_data(self, image: np.ndarray, lang: str, psm: int = 6) -> Dict[str, list]:
+        try:
+            api = self._get_api(lang, psm)
+        except RuntimeError as e:
+            logger.warning('tesserocr unavailable, using pytesseract', lang=lang, error=str(e))
+            return self._fallback.image_to_data(image, lang, psm)
+        api.SetImage(Image.fromarray(image))
+        return parse_tsv(api.GetTSVText(0))
+
+
+def parse_tsv(tsv: str) -> Dict[str, list]:
+    """Convert tesseract TSV rows (without header) into the Output.DICT layout."""
+    data: Dict[str, List] = {column: [] for column in TSV_COLUMNS}
+    for row in csv.reader(tsv.splitlines(), delimiter='\t', quoting=csv.QUOTE_NONE):
+        if len(row) < len(TSV_COLUMNS) - 1:
+            continue
+        # Non-word rows have no text column
+        row = row + [''] * (len(TSV_COLUMNS) - len(row))
+        for column, value in zip(TSV_COLUMNS, row):
+            if column == 'text':
+                data[column].append(value)
+            elif column == 'conf':
+                data[column].append(float(value))
+            else:
+                data[column].append(int(value))
+    return data
+
+
+OCR_BACKENDS = {
+    PytesseractBackend.name: PytesseractBackend,
+    TesserocrBackend.name: TesserocrBackend,
+}
+
+_backends: Dict[str, BaseOcrBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_ocr_backend(name: str) -> BaseOcrBackend:
+    """Process-wide backend instance for name, falling back to pytesseract.
+
+    Backends are cached per process so each page worker keeps its engine
+    (and loaded language models) for its whole lifetime.
+    """
+    with _backends_lock:
+        if name not in _backends:
+            try:
+                _backends[name] = OCR_BACKENDS[name]()
+            except (KeyError, ImportError) as e:
+                logger.warning('OCR backend unavailable, using pytesseract', backend=name, error=str(e))
+                _backends[name] = PytesseractBackend()
+        return _backends[name]
@@ -1,151 +1,309 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import re
+import time
+from contextlib import aclosing
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
 
 from dotenv import load_dotenv
+from shared.disk_cache import DiskCache
 from shared.logging.logger import get_logger
 
+from .base import HeadingStats
+from .config import HEADING_RULES_MIN_CONFIDENCE
+from .config import HEADING_WINDOW_CHARS
+from .config import HEADING_WINDOW_OVERLAP_CHARS
+from .header_index import HeaderLineIndex
+from .heading_candidates import find_heading_candidates
+from .heading_candidates import HeadingCandidate
+from .heading_rules import detect_rule_headings
+from .heading_stream import HeadingJsonScanner
+from .heading_windows import harmonize_levels
+from .heading_windows import HeadingContext
+from .heading_windows import HeadingLine
+from .heading_windows import split_windows
+from .heading_windows import TextWindow
 from .markdown_generator import NovaMarkdownGenerator
+from .prompt_builder import build_heading_candidates_prompt
+from .prompt_builder import HEADING_PROMPT_VERSION
 
 logger = get_logger(__name__)
 load_dotenv()
 
+# How a section's headings were found, as counted in HeadingStats.paths
+PATH_RULES = 'rules'
+PATH_CACHE = 'cache'
+PATH_LLM = 'llm'
+PATH_NONE = 'none'
+
 
 class Parser:
-    def __init__(self, region_name=None, model_id=None):
+    def __init__(self, region_name=None, model_id=None, cache: Optional[DiskCache] = None):
+        # The generator bounds how many windows are sent to the model at once
         self.generator = NovaMarkdownGenerator(
             region_name=region_name, model_id=model_id,
         )
+        self.cache = cache
 
-    async def parse(self, raw_text: str) -> str:
-        logger.info('Starting document parsing', input_length=len(raw_text))
+    def close(self) -> None:
+        self.generator.close()
 
-        # Get JSON structure from NovaMarkdownGenerator
-        json_output = await self.generator.generate(raw_text)
+    def cache_stats(self) -> Dict[str, float]:
+        return self.cache.stats() if self.cache else {}
 
-        logger.info(
-            'Received JSON output from generator', output_length=len(json_output),
-        )
+    async def parse(
+        self,
+        raw_text: str,
+        heading_hints: Optional[Dict[str, int]] = None,
+        stats: Optional[HeadingStats] = None,
+        context: Optional[HeadingContext] = None,
+    ) -> str:
+        """Mark up the headings of raw_text as Markdown.
 
-        # Parse the JSON output and merge with raw text
-        markdown_content = self._merge_json_with_raw_text(json_output, raw_text)
+        Candidate heading lines (see find_heading_candidates) first go to
+        the rule-based detector; only when its confidence is below
+        HEADING_RULES_MIN_CONFIDENCE are they sent to the model, which
+        answers with their line numbers; text without candidates skips
+        both. heading_hints maps the text of DOCX heading-style paragraphs
+        to their level. The path taken, model calls and cache use are added
+        to stats. When raw_text is one batch of a
+        longer document, context carries the title and numbering levels of
+        the previous batches, and is updated with this one's.
+        """
+        text_lines = raw_text.split('\n')
+        stats = stats if stats is not None else HeadingStats()
+        candidates = find_heading_candidates(text_lines, heading_hints)
+
+        rule_confidence = None
+        if not candidates:
+            # No line can be a heading: nothing for the rules or the model to place, nothing to cache
+            path, headings, failed_lines = PATH_NONE, [], []
+        else:
+            detection = detect_rule_headings(candidates, context)
+            rule_confidence = round(detection.confidence, 3)
+            stats.rule_confidences.append(rule_confidence)
+            if detection.confidence >= HEADING_RULES_MIN_CONFIDENCE:
+                path, headings, failed_lines = PATH_RULES, detection.headings, []
+            else:
+                path, headings, failed_lines = await self._model_headings(
+                    raw_text, heading_hints, text_lines, candidates, stats,
+                )
+        stats.paths[path] = stats.paths.get(path, 0) + 1
+        if context is not None:
+            headings = context.apply(headings)
+
+        markdown_content = self._render_markdown(text_lines, headings, failed_lines)
 
         logger.info(
-            'Completed document parsing', output_length=len(markdown_content),
+            'Completed document parsing',
+            output_length=len(markdown_content),
+            path=path,
+            rule_confidence=rule_confidence,
+            headings=len(headings),
+            failed_lines=len(failed_lines),
         )
         return markdown_content
 
-    def _merge_json_with_raw_text(self, json_output: str, raw_text: str) -> str:
-        """
-        Merge the JSON header structure with raw text to create structured markdown.
+    async def _model_headings(
+        self,
+        raw_text: str,
+        heading_hints: Optional[Dict[str, int]],
+        text_lines: List[str],
+        candidates: List[HeadingCandidate],
+        stats: HeadingStats,
+    ) -> Tuple[str, List[HeadingLine], List[int]]:
+        """Headings from the heading cache or else the model: (path, headings, candidate lines of failed windows).
+
+        The heading structure is looked up in and stored to the heading
+        cache when one is configured.
         """
+        cache_key = self._cache_key(raw_text, heading_hints)
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            entry = json.loads(cached)
+            stats.cache_hits += 1
+            stats.llm_seconds_saved += entry['llm_seconds']
+            headings = [
+                HeadingLine(line_index, level, text_lines[line_index].strip())
+                for line_index, level in entry['headings']
+            ]
+            return PATH_CACHE, headings, []
+
+        if self.cache is not None:
+            stats.cache_misses += 1
+        llm_start = time.perf_counter()
+        headings, failed_lines, llm_calls, truncated = await self._detect_headings(text_lines, candidates)
+        llm_seconds = time.perf_counter() - llm_start
+        stats.llm_calls += llm_calls
+        stats.llm_seconds += llm_seconds
+        stats.truncated_answers += truncated
+        # A window the model failed on, or whose answer was cut off, may succeed on the next upload
+        if not failed_lines and not truncated:
+            await self._cache_set(cache_key, json.dumps({
+                'headings': [[heading.line_index, heading.level] for heading in headings],
+                'llm_seconds': llm_seconds,
+            }))
+        return PATH_LLM, headings, failed_lines
+
+    async def _detect_headings(
+        self, text_lines: List[str], candidates: List[HeadingCandidate],
+    ) -> Tuple[List[HeadingLine], List[int], int, int]:
+        """Headings found by the model, candidate lines of windows it failed on, and the number of calls and of cut-off answers."""
+        entries = [candidate.to_prompt_line() for candidate in candidates]
+        windows = split_windows(entries, HEADING_WINDOW_CHARS, HEADING_WINDOW_OVERLAP_CHARS) if candidates else []
+        logger.info(
+            'Detecting headings',
+            lines=len(text_lines),
+            candidates=len(candidates),
+            prompt_length=sum(len(entry) + 1 for entry in entries),
+            windows=len(windows),
+        )
+
+        # Windows are classified concurrently; results come back in document order
+        window_headings = await asyncio.gather(
+            *(self._extract_window_headings(text_lines, candidates, entries, window) for window in windows),
+        )
+
+        headings: List[HeadingLine] = []
+        failed_lines: List[int] = []
+        truncated = 0
+        for window, result in zip(windows, window_headings):
+            if result is None:
+                failed_lines.extend(candidate.line_index for candidate in candidates[window.core_start:window.core_stop])
+                continue
+            found, complete = result
+            headings.extend(found)
+            if not complete:
+                truncated += 1
+        if len(windows) > 1:
+            headings = harmonize_levels(headings)
+        return headings, failed_lines, len(windows), truncated
+
+    def _cache_key(self, raw_text: str, heading_hints: Optional[Dict[str, int]]) -> str:
+        """Key of the heading structure: the text, its hints, and everything that shapes the model's answer."""
+        digest = hashlib.sha256()
+        settings = (HEADING_PROMPT_VERSION, self.generator.model_id, HEADING_WINDOW_CHARS, HEADING_WINDOW_OVERLAP_CHARS)
+        digest.update(repr(settings).encode('utf-8'))
+        digest.update(json.dumps(heading_hints or {}, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        digest.update(raw_text.encode('utf-8'))
+        return digest.hexdigest()
+
+    async def _cache_get(self, key: str) -> Optional[str]:
+        if self.cache is None:
+            return None
         try:
-            # Extract JSON from the output (in case there's additional text)
-            json_match = re.search(r'\{.*\}', json_output, re.DOTALL)
-            if not json_match:
-                logger.warning(
-                    'No JSON found in generator output, returning formatted raw text',
-                )
-                return self._format_as_basic_markdown(raw_text)
-
-            # Parse the JSON
-            headers_json = json.loads(json_match.group())
-            logger.info(
-                'Successfully parsed JSON headers',
-                headers=list(headers_json.keys()),
-            )
-
-            # Create a copy of text lines to modify
-            text_lines = raw_text.split('\n')
-
-            # Replace original header lines with formatted markdown headers
-            for level in ['h1', 'h2', 'h3', 'h4']:
-                if level in headers_json:
-                    markdown_prefix = '#' * int(level[1])  # h1 -> #, h2 -> ##, etc.
-
-                    for header_text in headers_json[level]:
-                        # Find and replace the matching text line
-                        header_found_idx = self._find_header_line_index(
-                            header_text, text_lines,
-                        )
-
-                        if header_found_idx >= 0:
-                            # Replace the original line with formatted markdown header
-                            text_lines[header_found_idx] = f'{markdown_prefix} {header_text}'
-
-            # Format content lines (key-value pairs, etc.)
-            formatted_lines = []
-            for line in text_lines:
-                line_stripped = line.strip()
-                if line_stripped:
-                    # Check if it's already a header (starts with #)
-                    if line_stripped.startswith('#'):
-                        formatted_lines.append(line_stripped)
-                    # Keep table formatting and other content as is
-                    else:
-                        formatted_lines.append(line_stripped)
-                else:
-                    # Preserve empty lines
-                    formatted_lines.append('')
-
-            return '\n'.join(formatted_lines).strip()
-
-        except json.JSONDecodeError as e:
-            logger.error('Failed to parse JSON output', error=str(e))
-            return self._format_as_basic_markdown(raw_text)
+            # SQLite may wait on another worker's write lock; keep it off the event loop
+            return await asyncio.get_running_loop().run_in_executor(None, self.cache.get, key)
         except Exception as e:
-            logger.error('Error merging JSON with raw text', error=str(e))
-            return self._format_as_basic_markdown(raw_text)
+            logger.warning('Heading cache lookup failed', error=str(e))
+            return None
 
-    def _find_header_line_index(self, header_text: str, text_lines: list) -> int:
-        """
-        Find the index of the header line in the text that matches the header_text.
-        """
-        # First try exact match
-        for i, line in enumerate(text_lines):
-            if line.strip() == header_text.strip():
-                return i
-
-        # Then try partial match by removing numbering prefixes
-        header_clean = re.sub(r'^[A-Z]\d*\.?\s*', '', header_text).strip().lower()
-
-        for i, line in enumerate(text_lines):
-            line_clean = re.sub(
-                r'^[A-Z]\d*\.?\s*', '', line.strip(),
-            ).strip().lower()
-            # Check if the core text matches (at least 70% of words)
-            header_words = header_clean.split()
-            line_words = line_clean.split()
-
-            if header_words and line_words:
-                common_words = set(header_words) & set(line_words)
-                if len(common_words) >= len(header_words) * 0.7:
-                    return i
-
-        return -1
-
-    def _format_as_basic_markdown(self, raw_text: str) -> str:
-        """
-        Basic markdown formatting when JSON parsing fails.
+    async def _cache_set(self, key: str, value: str) -> None:
+        if self.cache is None:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.cache.set, key, value)
+        except Exception as e:
+            logger.warning('Heading cache write failed', error=str(e))
+
+    async def _extract_window_headings(
+        self,
+        text_lines: List[str],
+        candidates: List[HeadingCandidate],
+        entries: List[str],
+        window: TextWindow,
+    ) -> Optional[Tuple[List[HeadingLine], bool]]:
+        """Headings among the window's core candidates, and whether the model's answer was complete.
+
+        Headings are resolved as the model streams them; an answer cut off
+        (e.g. at the token limit) keeps the headings received so far. None
+        when the output holds no JSON at all.
         """
-        lines = raw_text.split('\n')
-        markdown_lines = []
+        window_candidates = candidates[window.start:window.stop]
+        header_index = HeaderLineIndex(
+            [candidate.text for candidate in window_candidates],
+            keys=[candidate.line_index for candidate in window_candidates],
+        )
+        # Candidates in the overlap belong to the neighbouring window
+        core_lines = {candidate.line_index for candidate in candidates[window.core_start:window.core_stop]}
+        found: Dict[int, HeadingLine] = {}
 
-        for line in lines:
-            line = line.strip()
-            if not line:
-                markdown_lines.append('')
-                continue
+        prompt = build_heading_candidates_prompt('\n'.join(entries[window.start:window.stop]))
+        scanner = HeadingJsonScanner()
+        output_length = 0
+        async with aclosing(self.generator.stream_from_prompt(prompt)) as stream:
+            async for text in stream:
+                output_length += len(text)
+                for level, item in scanner.feed(text):
+                    line_index = self._resolve_header_line(item, header_index)
+                    if line_index in core_lines:
+                        found[line_index] = HeadingLine(line_index, int(level[1]), text_lines[line_index].strip())
+                if scanner.complete:
+                    break
 
-            # Basic header detection
-            if re.match(r'^[A-Z]\.\s', line):  # A. Header pattern
-                markdown_lines.append(f'## {line}')
-            elif re.match(r'^[A-Z]\.\d+\.', line):  # A.1. Header pattern
-                markdown_lines.append(f'### {line}')
-            elif line.isupper() and len(line) > 10:  # All caps likely header
-                markdown_lines.append(f'# {line}')
-            else:
-                markdown_lines.append(line)
+        logger.info(
+            'Received JSON output from generator',
+            output_length=output_length,
+            window_start=window.start,
+            window_stop=window.stop,
+            headings=len(found),
+            complete=scanner.complete,
+        )
+        if not scanner.started:
+            logger.warning('No JSON found in generator output, using basic formatting')
+            return None
+        if not scanner.complete:
+            logger.warning('Generator output cut off, keeping the headings received', headings=len(found))
+        return list(found.values()), scanner.complete
+
+    def _resolve_header_line(self, item, header_index: HeaderLineIndex) -> Optional[int]:
+        """Line index of a header given by line number, or by its text if the model echoed that instead."""
+        if isinstance(item, str) and item.strip().isdigit():
+            item = int(item.strip())
+        if isinstance(item, int) and not isinstance(item, bool):
+            # Keep text matches off lines already given by number
+            header_index.consume(item)
+            return item
+        if not isinstance(item, str):
+            return None
+
+        line_index = header_index.find(item)
+        return line_index if line_index >= 0 else None
+
+    def _render_markdown(self, text_lines: List[str], headings: List[HeadingLine], failed_lines: List[int]) -> str:
+        """Apply headings to their lines; candidates of failed windows get basic formatting."""
+        text_lines = list(text_lines)
+        for i in failed_lines:
+            text_lines[i] = self._format_basic_markdown_line(text_lines[i])
+
+        # Replace original header lines with formatted markdown headers
+        for heading in headings:
+            markdown_prefix = '#' * heading.level  # h1 -> #, h2 -> ##, etc.
+            text_lines[heading.line_index] = f'{markdown_prefix} {heading.text}'
+
+        # Keep table formatting and other content as is; empty lines are preserved
+        formatted_lines = [line.strip() for line in text_lines]
+        return '\n'.join(formatted_lines).strip()
+
+    def _format_basic_markdown_line(self, line: str) -> str:
+        """
+        Basic markdown formatting of one line, used where JSON parsing fails.
+        """
+        line = line.strip()
+        if not line:
+            return ''
 
-        return '\n'.join(markdown_lines)
+        # Basic header detection
+        if re.match(r'^[A-Z]\.\s', line):  # A. Header pattern
+            return f'## {line}'
+        if re.match(r'^[A-Z]\.\d+\.', line):  # A.1. Header pattern
+            return f'### {line}'
+        if line.isupper() and len(line) > 10:  # All caps likely header
+            return f'# {line}'
+        return line
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import math
+import time
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from shared.logging.logger import get_logger
+
+from .config import PDF_TEXT_BACKEND
+from .ocr import OcrService
+from .pdf_text_backend import get_pdf_text_backend
+from .pdf_text_backend import PAGE_SCANNED
+from .pdf_text_backend import PageResult
+from .rasterizer import PdfRasterizer
+from .worker_pool import PageWorkerPool
+
+logger = get_logger(__name__)
+
+# Upper bound on pages handed to one worker task. Smaller ranges balance
+# scanned (slow) and born-digital (fast) pages better across workers.
+DEFAULT_PAGES_PER_RANGE = 25
+
+
+def split_page_ranges(total_pages: int, max_workers: int, pages_per_range: int = DEFAULT_PAGES_PER_RANGE) -> List[Tuple[int, int]]:
+    """Split [0, total_pages) into contiguous (start, stop) ranges, one task each."""
+    if total_pages <= 0:
+        return []
+
+    range_size = max(1, min(math.ceil(total_pages / max(1, max_workers)), pages_per_range))
+    return [
+        (start, min(start + range_size, total_pages))
+        for start in range(0, total_pages, range_size)
+    ]
+
+
+def ocr_scanned_pages(
+    path: str, results: List[PageResult], ocr: OcrService, rasterizer: PdfRasterizer,
+) -> None:
+    """OCR every page without a text layer, rasterizing a few pages per poppler call.
+
+    Pages are decoded and OCR'd one at a time. A batch that fails to render
+    (e.g. MemoryError under the worker's memory limit) leaves only its own
+    pages without text.
+    """
+    scanned = {result.page_index + 1: result for result in results if not result.text}
+    if not scanned:
+        return
+    # Text or table pages that turned out empty are counted as scans too
+    for result in scanned.values():
+        result.page_class = PAGE_SCANNED
+
+    for first_page, last_page in rasterizer.page_batches(scanned.keys()):
+        # Rendering time is counted against the first page of its batch
+        page_start = time.perf_counter()
+        try:
+            for page_number, image in rasterizer.iter_pages(path, first_page, last_page):
+                result = scanned[page_number]
+                try:
+                    ocr_text, result.ocr_lang = ocr.ocr_image_with_language(image)
+                    logger.info('OCR page', page=page_number, lang=result.ocr_lang)
+                    if ocr_text:
+                        result.text = ocr_text + '\n'
+                except Exception as e:
+                    logger.error('Failed to OCR page', page=page_number, error=str(e))
+                # Release the page before the next one is decoded
+                del image
+                now = time.perf_counter()
+                result.elapsed_seconds += now - page_start
+                page_start = now
+        except Exception as e:
+            logger.error(
+                'Failed to rasterize scanned pages', pages=list(range(first_page, last_page + 1)), error=str(e),
+            )
+
+
+def extract_page_range(
+    path: str, start: int, stop: int, ocr: OcrService, rasterizer: PdfRasterizer,
+    text_backend: str = PDF_TEXT_BACKEND,
+) -> List[PageResult]:
+    """Extract the text layer of pages [start, stop), then OCR the pages that have none."""
+    results = get_pdf_text_backend(text_backend).extract_range(path, start, stop)
+    ocr_scanned_pages(path, results, ocr, rasterizer)
+    return results
+
+
+class PdfExtractionEngine:
+    """Extracts PDF pages in contiguous ranges, parsing the document once per task."""
+
+    def __init__(
+        self,
+        ocr: OcrService,
+        pool: PageWorkerPool,
+        rasterizer: Optional[PdfRasterizer] = None,
+        pages_per_range: int = DEFAULT_PAGES_PER_RANGE,
+        text_backend: str = PDF_TEXT_BACKEND,
+    ):
+        self.ocr = ocr
+        self.rasterizer = rasterizer or PdfRasterizer()
+        self.pool = pool
+        self.pages_per_range = pages_per_range
+        # Only the name is passed to workers, which resolve their own backend
+        self.text_backend = text_backend
+
+    def count_pages(self, path: str) -> int:
+        return get_pdf_text_backend(self.text_backend).count_pages(path)
+
+    def iter_extract(self, path: str) -> Iterator[PageResult]:
+        """Yield one result per page of the PDF at path, in page order, as soon as its range is done.
+
+        All ranges are submitted up front, so later pages keep extracting
+        while the caller processes earlier ones.
+        """
+        total_pages = self.count_pages(path)
+        page_ranges = split_page_ranges(total_pages, self.pool.max_workers, self.pages_per_range)
+
+        futures = [
+            self.pool.submit(extract_page_range, path, start, stop, self.ocr, self.rasterizer, self.text_backend)
+            for start, stop in page_ranges
+        ]
+        try:
+            for (start, stop), future in zip(page_ranges, futures):
+                try:
+                    results = {result.page_index: result for result in future.result()}
+                except Exception as e:
+                    logger.error('Failed to extract page range', start=start + 1, stop=stop, error=str(e))
+                    results = {}
+                for page_index in range(start, stop):
+                    yield results.get(page_index) or PageResult(page_index, '', 0.0)
+        finally:
+            # Consumer stopped early: drop ranges that have not started yet
+            for future in futures:
+                future.cancel()
+
+    def extract(self, path: str) -> List[PageResult]:
+        """Return one result per page, in page order."""
+        return list(self.iter_extract(path))
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import ctypes
+import threading
+import time
+from abc import ABC
+from abc import abstractmethod
+from dataclasses import dataclass
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import pdfplumber
+from pdfplumber.utils import extract_text
+from shared.logging.logger import get_logger
+
+from .markdown_table import table_to_markdown
+from .spool import open_mapped
+from .table_index import TableCharIndex
+
+logger = get_logger(__name__)
+
+# A path thinner than this (in points) is a ruling line
+RULE_THICKNESS = 2.0
+RULE_MIN_LENGTH = 10.0
+# pdfplumber's default table strategy needs at least two edges each way
+TABLE_MIN_RULES = 2
+# A page with fewer chars than this, mostly covered by images, is a scan
+SCANNED_MAX_CHARS = 20
+SCANNED_MIN_IMAGE_COVERAGE = 0.5
+
+# Page classes, each handled by the cheapest extractor that can
+PAGE_TEXT = 'text'
+PAGE_TABLES = 'tables'
+PAGE_SCANNED = 'scanned'
+
+
+@dataclass
+class PageResult:
+    """Extracted text of one page and the time spent on it."""
+    page_index: int
+    text: str
+    elapsed_seconds: float
+    ocr_lang: Optional[str] = None  # tesseract language, for OCR'd pages
+    page_class: str = PAGE_TEXT
+
+
+def classify_page(char_count: int, horizontal_rules: int, vertical_rules: int, image_coverage: float) -> str:
+    """Triage a page from counts of its objects, before extracting anything."""
+    if char_count == 0 or (char_count < SCANNED_MAX_CHARS and image_coverage >= SCANNED_MIN_IMAGE_COVERAGE):
+        return PAGE_SCANNED
+    if horizontal_rules >= TABLE_MIN_RULES and vertical_rules >= TABLE_MIN_RULES:
+        return PAGE_TABLES
+    return PAGE_TEXT
+
+
+def triage_pdfplumber_page(page) -> str:
+    horizontal = vertical = 0
+    for edge in page.edges:
+        if edge['orientation'] == 'h' and edge['width'] >= RULE_MIN_LENGTH:
+            horizontal += 1
+        elif edge['orientation'] == 'v' and edge['height'] >= RULE_MIN_LENGTH:
+            vertical += 1
+    page_area = float(page.width * page.height) or 1.0
+    image_area = sum(image['width'] * image['height'] for image in page.images)
+    return classify_page(len(page.chars), horizontal, vertical, min(1.0, image_area / page_area))
+
+
+def extract_page_text(page) -> str:
+    """Extract layout text from an already opened page, tables rendered as Markdown."""
+    tables = page.find_tables()
+    if not tables:
+        return extract_text(page.chars, layout=True) or ''
+
+    # One pass over the chars instead of a crop + full-page filter per table
+    index = TableCharIndex([table.bbox for table in tables])
+    chars, chars_per_table = index.assign_chars(page.chars)
+
+    for table, table_chars in zip(tables, chars_per_table):
+        if not table_chars:
+            continue
+        markdown = table_to_markdown(table.extract())
+        chars.append(table_chars[0] | {'text': markdown})
+
+    return extract_text(chars, layout=True) or ''
+
+
+def extract_pdfplumber_pages(path: str, page_classes: Dict[int, Optional[str]]) -> List[PageResult]:
+    """Open the document once and extract the given pages with pdfplumber.
+
+    page_classes maps page index to its class; pages given None are
+    triaged here first.
+    """
+    results = []
+    with open_mapped(path) as mapping, pdfplumber.open(mapping) as pdf:
+        for page_index, page_class in page_classes.items():
+            if page_index >= len(pdf.pages):
+                break
+            page_start = time.perf_counter()
+            page = pdf.pages[page_index]
+            page_text = ''
+            try:
+                page_class = page_class or triage_pdfplumber_page(page)
+                if page_class == PAGE_TABLES:
+                    page_text = extract_page_text(page)
+                elif page_class == PAGE_TEXT:
+                    page_text = extract_text(page.chars, layout=True) or ''
+            except Exception as e:
+                logger.error('Failed to extract page', page=page_index + 1, error=str(e))
+            finally:
+                # Release parsed layout objects once the page is done
+                page.flush_cache()
+            results.append(PageResult(
+                page_index, page_text, time.perf_counter() - page_start, page_class=page_class or PAGE_TEXT,
+            ))
+    return results
+
+
+class BasePdfTextBackend(ABC):
+    """Abstract base class for PDF text layer extraction (OCR of scanned pages excluded)."""
+
+    name: str = ''
+
+    @abstractmethod
+    def count_pages(self, path: str) -> int:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def extract_range(self, path: str, start: int, stop: int) -> List[PageResult]:
+        """Triage and extract pages [start, stop); scanned pages get empty text, for OCR."""
+        raise NotImplementedError()
+
+
+class PdfplumberTextBackend(BasePdfTextBackend):
+    """pdfplumber on every page: layout text, plus table detection where rulings suggest a table."""
+
+    name = 'pdfplumber'
+
+    def count_pages(self, path: str) -> int:
+        with open_mapped(path) as mapping, pdfplumber.open(mapping) as pdf:
+            return len(pdf.pages)
+
+    def extract_range(self, path: str, start: int, stop: int) -> List[PageResult]:
+        return extract_pdfplumber_pages(path, {page_index: None for page_index in range(start, stop)})
+
+
+# PDFium is not thread-safe, even across documents; serializes it in thread pool mode
+_pdfium_lock = threading.Lock()
+
+
+class PdfiumTextBackend(BasePdfTextBackend):
+    """Triage and plain text with PDFium; only pages whose rulings suggest a table go to pdfplumber."""
+
+    name = 'pdfium'
+
+    def __init__(self):
+        import pypdfium2
+        import pypdfium2.raw
+
+        self._pdfium = pypdfium2
+        self._pdfium_c = pypdfium2.raw
+
+    def count_pages(self, path: str) -> int:
+        with _pdfium_lock:
+            pdf = self._pdfium.PdfDocument(path)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+
+    def object_bounds(self, obj) -> Tuple[float, float, float, float]:
+        """(left, bottom, right, top) of a page object, through the C API (get_pos is get_bounds in pypdfium2 5)."""
+        left, bottom, right, top = ctypes.c_float(), ctypes.c_float(), ctypes.c_float(), ctypes.c_float()
+        if not self._pdfium_c.FPDFPageObj_GetBounds(
+            obj.raw, ctypes.byref(left), ctypes.byref(bottom), ctypes.byref(right), ctypes.byref(top),
+        ):
+            return 0.0, 0.0, 0.0, 0.0
+        return left.value, bottom.value, right.value, top.value
+
+    def count_path_rules(self, obj) -> Tuple[int, int]:
+        """Horizontal and vertical ruling segments of a path object.
+
+        Counted per straight segment in page space, like pdfplumber's edges:
+        a rectangle gives two each way, and a grid drawn as one path with
+        many subpaths gives every one of its lines.
+        """
+        pdfium_c = self._pdfium_c
+        matrix = pdfium_c.FS_MATRIX()
+        if not pdfium_c.FPDFPageObj_GetMatrix(obj.raw, ctypes.byref(matrix)):
+            return 0, 0
+        x, y = ctypes.c_float(), ctypes.c_float()
+        horizontal = vertical = 0
+        subpath_start = previous = None
+        for index in range(pdfium_c.FPDFPath_CountSegments(obj.raw)):
+            segment = pdfium_c.FPDFPath_GetPathSegment(obj.raw, index)
+            if not segment or not pdfium_c.FPDFPathSegment_GetPoint(segment, ctypes.byref(x), ctypes.byref(y)):
+                continue
+            point = (
+                matrix.a * x.value + matrix.c * y.value + matrix.e,
+                matrix.b * x.value + matrix.d * y.value + matrix.f,
+            )
+            segment_type = pdfium_c.FPDFPathSegment_GetType(segment)
+            lines = []
+            if segment_type == pdfium_c.FPDF_SEGMENT_MOVETO:
+                subpath_start = point
+            elif segment_type == pdfium_c.FPDF_SEGMENT_LINETO and previous is not None:
+                lines.append((previous, point))
+            if pdfium_c.FPDFPathSegment_GetClose(segment) and subpath_start is not None:
+                lines.append((point, subpath_start))
+            for (x0, y0), (x1, y1) in lines:
+                width, height = abs(x1 - x0), abs(y1 - y0)
+                if height <= RULE_THICKNESS and width >= RULE_MIN_LENGTH:
+                    horizontal += 1
+                elif width <= RULE_THICKNESS and height >= RULE_MIN_LENGTH:
+                    vertical += 1
+            previous = point
+        return horizontal, vertical
+
+    def triage_page(self, page, textpage) -> str:
+        """Classify a page from its char count, ruling segments and image coverage."""
+        horizontal = vertical = 0
+        image_area = 0.0
+        for obj in page.get_objects(filter=(self._pdfium_c.FPDF_PAGEOBJ_PATH, self._pdfium_c.FPDF_PAGEOBJ_IMAGE)):
+            left, bottom, right, top = self.object_bounds(obj)
+            width, height = right - left, top - bottom
+            if obj.type == self._pdfium_c.FPDF_PAGEOBJ_IMAGE:
+                image_area += width * height
+            elif horizontal >= TABLE_MIN_RULES and vertical >= TABLE_MIN_RULES:
+                # Enough rulings for a table already; only images still matter
+                continue
+            elif max(width, height) >= RULE_MIN_LENGTH:
+                path_horizontal, path_vertical = self.count_path_rules(obj)
+                horizontal += path_horizontal
+                vertical += path_vertical
+        page_area = (page.get_width() * page.get_height()) or 1.0
+        return classify_page(textpage.count_chars(), horizontal, vertical, min(1.0, image_area / page_area))
+
+    def extract_range(self, path: str, start: int, stop: int) -> List[PageResult]:
+        results: Dict[int, PageResult] = {}
+        # Pages with tables go to pdfplumber, with the time already spent on them
+        table_pages: Dict[int, float] = {}
+        with _pdfium_lock:
+            # PDFium reads the file itself, loading only the objects it needs
+            pdf = self._pdfium.PdfDocument(path)
+            try:
+                for page_index in range(start, min(stop, len(pdf))):
+                    page_start = time.perf_counter()
+                    page = pdf[page_index]
+                    textpage = None
+                    page_text = ''
+                    page_class = PAGE_TEXT
+                    try:
+                        textpage = page.get_textpage()
+                        page_class = self.triage_page(page, textpage)
+                        if page_class == PAGE_TEXT:
+                            page_text = textpage.get_text_range().replace('\r\n', '\n')
+                    except Exception as e:
+                        logger.error('Failed to extract page', page=page_index + 1, error=str(e))
+                    finally:
+                        if textpage is not None:
+                            textpage.close()
+                        page.close()
+
+                    elapsed = time.perf_counter() - page_start
+                    if page_class == PAGE_TABLES:
+                        table_pages[page_index] = elapsed
+                    else:
+                        results[page_index] = PageResult(page_index, page_text, elapsed, page_class=page_class)
+            finally:
+                pdf.close()
+
+        if table_pages:
+            for result in extract_pdfplumber_pages(path, dict.fromkeys(table_pages, PAGE_TABLES)):
+                result.elapsed_seconds += table_pages[result.page_index]
+                results[result.page_index] = result
+        return [results[page_index] for page_index in sorted(results)]
+
+
+PDF_TEXT_BACKENDS = {
+    PdfplumberTextBackend.name: PdfplumberTextBackend,
+    PdfiumTextBackend.name: PdfiumTextBackend,
+}
+
+_backends: Dict[str, BasePdfTextBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_pdf_text_backend(name: str) -> BasePdfTextBackend:
+    """Process-wide backend instance for name, falling back to pdfplumber."""
+    with _backends_lock:
+        if name not in _backends:
+            try:
+                _backends[name] = PDF_TEXT_BACKENDS[name]()
+            except (KeyError, ImportError) as e:
+                logger.warning('PDF text backend unavailable, using pdfplumber', backend=name, error=str(e))
+                _backends[name] = PdfplumberTextBackend()
+        return _backends[name]
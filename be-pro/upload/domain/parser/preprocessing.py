@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import List
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+from .config import LAYOUT_DPI
+from .config import OCR_DPI
+
+CellBox = Tuple[int, int, int, int]
+
+# Below this many pixels on the short side the image is analysed at full size
+MIN_LAYOUT_SIDE = 600
+# Table detection thresholds, in full-resolution (300 DPI) pixels
+TABLE_LINE_LENGTH = 30
+TABLE_MIN_SIDE = 100
+
+
+@dataclass
+class PreprocessedImage:
+    """Binarized page and the table rectangles found on it, at full resolution."""
+    binary: np.ndarray
+    tables: List[CellBox]
+
+
+class OcrPreprocessor:
+    """Binarizes an image once and finds table grids on a downscaled copy.
+
+    The full-resolution binary image is shared by table detection (after
+    downscaling) and by cell detection inside each table, so the blur and
+    threshold are computed only once per image.
+    """
+
+    def __init__(self, layout_scale: float = LAYOUT_DPI / OCR_DPI):
+        self.layout_scale = min(1.0, layout_scale)
+
+    def process(self, gray: np.ndarray) -> PreprocessedImage:
+        binary = self.binarize(gray)
+        return PreprocessedImage(binary=binary, tables=self.detect_tables(binary))
+
+    def binarize(self, gray: np.ndarray) -> np.ndarray:
+        # Làm mờ để giảm nhiễu
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        # Áp dụng adaptive threshold để tạo ảnh nhị phân
+        return cv2.adaptiveThreshold(
+            blurred, 255,
+            cv2.ADAPTIVE_THRESH_MEAN_C,
+            cv2.THRESH_BINARY_INV,
+            15, 4,
+        )
+
+    def _scale_for(self, binary: np.ndarray) -> float:
+        if min(binary.shape[:2]) * self.layout_scale < MIN_LAYOUT_SIDE:
+            return 1.0
+        return self.layout_scale
+
+    def detect_tables(self, binary: np.ndarray) -> List[CellBox]:
+        """Bounding rectangles of bordered tables, in full-resolution coordinates."""
+        scale = self._scale_for(binary)
+        if scale < 1.0:
+            small = cv2.resize(binary, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            # Thin lines turn grey when averaged down; keep anything partly inked
+            _, small = cv2.threshold(small, 64, 255, cv2.THRESH_BINARY)
+        else:
+            small = binary
+
+        # Tìm các đường thẳng dọc và ngang
+        line_length = max(3, round(TABLE_LINE_LENGTH * scale))
+        kernel_h = cv2.getStructuringElement(cv2.MORPH_RECT, (line_length, 1))
+        kernel_v = cv2.getStructuringElement(cv2.MORPH_RECT, (1, line_length))
+
+        detect_h = cv2.morphologyEx(small, cv2.MORPH_OPEN, kernel_h, iterations=2)
+        detect_v = cv2.morphologyEx(small, cv2.MORPH_OPEN, kernel_v, iterations=2)
+
+        # Kết hợp cả hai để tạo mask bảng
+        table_mask = cv2.add(detect_h, detect_v)
+
+        # Tìm contours từ mask bảng
+        contours, _ = cv2.findContours(table_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        img_h, img_w = binary.shape[:2]
+        tables = []
+        for cnt in contours:
+            x, y, w, h = cv2.boundingRect(cnt)
+            # Map back to full resolution, rounding outwards so borders stay inside
+            x0, y0 = max(0, math.floor(x / scale)), max(0, math.floor(y / scale))
+            x1, y1 = min(img_w, math.ceil((x + w) / scale)), min(img_h, math.ceil((y + h) / scale))
+            if x1 - x0 > TABLE_MIN_SIDE and y1 - y0 > TABLE_MIN_SIDE:
+                tables.append((x0, y0, x1 - x0, y1 - y0))
+        return tables
+
+    def detect_cell_boxes(self, table_binary: np.ndarray) -> List[List[CellBox]]:
+        """Detect the cell grid of a binarized table crop, as rows of (x, y, w, h) sorted by x."""
+        # Dilation để nối border kép thành một khối
+        dilated = cv2.dilate(table_binary, np.ones((3, 3), np.uint8), iterations=1)
+
+        # Phát hiện các đường kẻ dọc và ngang
+        scale = 20
+        h_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(1, table_binary.shape[1] // scale), 1))
+        v_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(1, table_binary.shape[0] // scale)))
+
+        detect_h = cv2.morphologyEx(dilated, cv2.MORPH_OPEN, h_kernel, iterations=2)
+        detect_v = cv2.morphologyEx(dilated, cv2.MORPH_OPEN, v_kernel, iterations=2)
+
+        # Kết hợp để tạo mặt nạ bảng
+        grid_mask = cv2.add(detect_h, detect_v)
+        merged_mask = cv2.dilate(grid_mask, np.ones((3, 3), np.uint8), iterations=1)
+
+        # Tìm contour của ô
+        contours, _ = cv2.findContours(merged_mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+
+        img_h, img_w = table_binary.shape[:2]
+        cell_coords = []
+        for cnt in contours:
+            x, y, w, h = cv2.boundingRect(cnt)
+            # lọc nhiễu nhỏ và khung ngoài của cả bảng
+            if w > 20 and h > 20 and w * h <= 0.9 * img_h * img_w:
+                cell_coords.append((x, y, w, h))
+
+        # Sắp xếp theo y trước, x sau
+        cell_coords = sorted(cell_coords, key=lambda b: (b[1], b[0]))
+
+        # Gom các ô thành từng hàng
+        rows = []
+        current_row: List[CellBox] = []
+        last_y = -100
+        tolerance_y = 20
+
+        for bbox in cell_coords:
+            x, y, w, h = bbox
+            if abs(y - last_y) > tolerance_y:
+                if current_row:
+                    rows.append(current_row)
+                current_row = [bbox]
+                last_y = y
+            else:
+                current_row.append(bbox)
+        if current_row:
+            rows.append(current_row)
+
+        # Sắp xếp các ô trong từng hàng theo x
+        return [sorted(row, key=lambda b: b[0]) for row in rows]
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+import numpy as np
+from pdf2image import convert_from_path
+from PIL import Image
+
+from .config import OCR_DPI
+from .config import OCR_RASTER_BATCH_PAGES
+from .config import SPOOL_DIR
+
+
+def group_page_runs(page_numbers: Iterable[int]) -> List[Tuple[int, int]]:
+    """Group page numbers into contiguous (first, last) runs."""
+    runs: List[Tuple[int, int]] = []
+    for page_number in sorted(set(page_numbers)):
+        if runs and page_number == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], page_number)
+        else:
+            runs.append((page_number, page_number))
+    return runs
+
+
+class PdfRasterizer:
+    """Renders PDF pages to grayscale numpy arrays, a few pages per poppler call.
+
+    A worker's data segment is capped (see worker_pool.limit_worker_memory),
+    and a 300 DPI grayscale page is about 9 MB, copied again by the decode
+    and the array conversion. pdftoppm therefore writes at most batch_pages
+    pages to a temporary directory, and each is loaded only when it is
+    consumed, so one decoded page is held at a time instead of a whole run.
+    """
+
+    def __init__(self, dpi: int = OCR_DPI, batch_pages: int = OCR_RASTER_BATCH_PAGES, spool_dir: str = SPOOL_DIR):
+        self.dpi = dpi
+        self.batch_pages = max(1, batch_pages)
+        self.spool_dir = spool_dir
+
+    def page_batches(self, page_numbers: Iterable[int]) -> List[Tuple[int, int]]:
+        """Contiguous (first, last) runs of the 1-based pages, at most batch_pages long."""
+        batches: List[Tuple[int, int]] = []
+        for first_page, last_page in group_page_runs(page_numbers):
+            for batch_first in range(first_page, last_page + 1, self.batch_pages):
+                batches.append((batch_first, min(batch_first + self.batch_pages - 1, last_page)))
+        return batches
+
+    def iter_pages(self, path: str, first_page: int, last_page: int) -> Iterator[Tuple[int, np.ndarray]]:
+        """Render the 1-based pages [first_page, last_page] in one call and yield them one at a time."""
+        if self.spool_dir:
+            os.makedirs(self.spool_dir, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=self.spool_dir or None) as folder:
+            try:
+                # ppm + grayscale is written by pdftoppm as raw PGM, no JPEG encode/decode
+                image_paths = convert_from_path(
+                    pdf_path=path,
+                    dpi=self.dpi,
+                    first_page=first_page,
+                    last_page=last_page,
+                    fmt='ppm',
+                    grayscale=True,
+                    output_folder=folder,
+                    paths_only=True,
+                )
+            except Exception as e:
+                raise ValueError(f'Failed to convert PDF to images: {str(e)}')
+            for page_number, image_path in zip(range(first_page, last_page + 1), image_paths):
+                with Image.open(image_path) as image:
+                    array = np.array(image)
+                os.remove(image_path)
+                yield page_number, array
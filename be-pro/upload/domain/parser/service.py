@@ -1,18 +1,48 @@
 from __future__ import annotations
 
+import asyncio
 import os
+import re
+import threading
+from typing import AsyncIterator
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from shared.disk_cache import DiskCache
 
 from .base import BaseParserService
+from .base import ExtractedSection
+from .base import ExtractionStats
 from .base import ParserInput
 from .base import ParserOutput
+from .config import HEADING_CACHE_DIR
+from .config import HEADING_CACHE_MAX_MB
+from .config import HEADING_CACHE_TTL_HOURS
+from .config import STREAM_SECTION_CHARS
 from .extractor import ExtractorService
+from .heading_windows import HeadingContext
 from .parser import Parser
 
+_END_OF_STREAM = object()
+_HEADING_PATTERN = re.compile(r'^#{1,6}\s+.+$', re.MULTILINE)
+
 
 class ParserService(BaseParserService):
     def __init__(self):
         self.extractor = ExtractorService()
-        self.parser = Parser()
+        heading_cache = None
+        if HEADING_CACHE_MAX_MB > 0:
+            heading_cache = DiskCache(
+                os.path.join(HEADING_CACHE_DIR, 'headings.sqlite3'),
+                max_bytes=HEADING_CACHE_MAX_MB * 1024 * 1024,
+                ttl_seconds=HEADING_CACHE_TTL_HOURS * 3600,
+            )
+        self.parser = Parser(cache=heading_cache)
+
+    def close(self) -> None:
+        self.extractor.close()
+        self.parser.close()
 
     async def process(self, input_data: ParserInput) -> ParserOutput:
         extracted_text = self.extractor.extract(input_data.file)
@@ -25,3 +55,116 @@ class ParserService(BaseParserService):
             filename=input_data.file.filename,
             file_extension=ext,
         )
+
+    async def stream(self, input_data: ParserInput, stats: Optional[ExtractionStats] = None) -> AsyncIterator[ParserOutput]:
+        """Parse extracted text in batches of about STREAM_SECTION_CHARS characters.
+
+        Extraction runs in a background thread, so each batch is parsed (and
+        can be chunked and embedded by the caller) while later pages are
+        still being extracted. The document's title and numbering levels are
+        carried from batch to batch, so its sections get consistent levels.
+        """
+        _, ext = os.path.splitext(input_data.file.filename.lower())
+        section_index = 0
+        last_heading: Optional[str] = None
+        heading_context = HeadingContext()
+
+        async for batch in self._iter_batches(input_data, stats):
+            if batch.table is not None:
+                # Spreadsheet rows are already structured, no markdown to generate
+                yield ParserOutput(
+                    raw_text=f'## {batch.table.title}',
+                    filename=input_data.file.filename,
+                    file_extension=ext,
+                    section_index=section_index,
+                    table=batch.table,
+                )
+                section_index += 1
+                continue
+
+            raw_text = await self.parser.parse(
+                batch.text, batch.heading_hints, stats.headings if stats is not None else None, heading_context,
+            )
+
+            # Text continuing the previous batch's section would otherwise be
+            # dropped by the chunker, which only keeps content under a heading
+            if last_heading and not raw_text.lstrip().startswith('#'):
+                raw_text = f'{last_heading}\n{raw_text}'
+            headings = _HEADING_PATTERN.findall(raw_text)
+            if headings:
+                last_heading = headings[-1]
+
+            yield ParserOutput(
+                raw_text=raw_text,
+                filename=input_data.file.filename,
+                file_extension=ext,
+                section_index=section_index,
+            )
+            section_index += 1
+
+    async def _iter_batches(
+        self, input_data: ParserInput, stats: Optional[ExtractionStats] = None,
+    ) -> AsyncIterator[ExtractedSection]:
+        """Group extracted sections into batches, extracting in a background thread.
+
+        Text sections are joined into one section per batch, with their
+        heading hints merged; table sections are passed through as is.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stopped = threading.Event()
+
+        def produce() -> None:
+            try:
+                for section in self.extractor.iter_extract(input_data.file):
+                    if stopped.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, section)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, _END_OF_STREAM)
+
+        producer = loop.run_in_executor(None, produce)
+        batch: List[str] = []
+        batch_hints: Dict[str, int] = {}
+        batch_index = 0
+        batch_chars = 0
+        try:
+            while True:
+                item = await queue.get()
+                if item is _END_OF_STREAM:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+
+                section: ExtractedSection = item
+                if stats is not None:
+                    stats.add(section)
+                if section.table is not None:
+                    if batch:
+                        yield ExtractedSection(index=batch_index, text='\n'.join(batch), heading_hints=batch_hints)
+                        batch = []
+                        batch_hints = {}
+                        batch_chars = 0
+                    yield section
+                    continue
+
+                if not section.text:
+                    continue
+                if not batch:
+                    batch_index = section.index
+                batch.append(section.text)
+                batch_hints.update(section.heading_hints)
+                batch_chars += len(section.text)
+                if batch_chars >= STREAM_SECTION_CHARS:
+                    yield ExtractedSection(index=batch_index, text='\n'.join(batch), heading_hints=batch_hints)
+                    batch = []
+                    batch_hints = {}
+                    batch_chars = 0
+
+            if batch:
+                yield ExtractedSection(index=batch_index, text='\n'.join(batch), heading_hints=batch_hints)
+        finally:
+            stopped.set()
+            await producer
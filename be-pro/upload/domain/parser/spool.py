@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator
+
+from fastapi import UploadFile
+
+from .config import SPOOL_DIR
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+@contextmanager
+def spool_upload(file: UploadFile, spool_dir: str = SPOOL_DIR) -> Iterator[str]:
+    """Copy an upload to a temporary file on disk and yield its path.
+
+    Page workers open the path themselves, so the document is neither held
+    in memory as one bytes object nor pickled to every worker. The file is
+    removed on exit.
+    """
+    if spool_dir:
+        os.makedirs(spool_dir, exist_ok=True)
+    _, suffix = os.path.splitext(file.filename or '')
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=spool_dir or None)
+    try:
+        with os.fdopen(fd, 'wb') as spooled:
+            file.file.seek(0)
+            shutil.copyfileobj(file.file, spooled, COPY_BUFFER_SIZE)
+        yield path
+    finally:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+@contextmanager
+def open_mapped(path: str) -> Iterator[mmap.mmap]:
+    """Read-only memory map of a spooled file, usable as a seekable binary file.
+
+    Mapped pages live in the shared page cache, so workers reading the same
+    document do not each hold a private copy.
+    """
+    with open(path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield mapping
+    finally:
+        mapping.close()
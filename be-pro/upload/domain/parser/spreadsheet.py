@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import os
+import pickle
+import tempfile
+from abc import ABC
+from abc import abstractmethod
+from dataclasses import dataclass
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import openpyxl
+from shared.logging.logger import get_logger
+
+from .config import SPOOL_DIR
+from .config import SPREADSHEET_READER
+from .spool import open_mapped
+from .worker_pool import PageWorkerPool
+
+logger = get_logger(__name__)
+
+# Rows pickled together when a worker spools a sheet
+SPOOL_BATCH_ROWS = 1000
+
+
+@dataclass
+class SheetData:
+    """One sheet, trimmed to its data range, its rows spooled to disk by the worker that read it.
+
+    width is the number of columns of the data range; 0 for an empty sheet.
+    """
+    index: int
+    name: str
+    path: str
+    width: int
+
+    def iter_rows(self) -> Iterator[List[str]]:
+        """Rows padded to width, read back from the spool a batch at a time."""
+        with open(self.path, 'rb') as spooled:
+            while True:
+                try:
+                    rows = pickle.load(spooled)
+                except EOFError:
+                    return
+                for row in rows:
+                    row.extend([''] * (self.width - len(row)))
+                    yield row
+
+    def discard(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def format_cell(value: Any) -> str:
+    if value is None:
+        return ''
+    # Readers return whole numbers as floats (1.0); show them as integers
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def trim_rows(values: Iterable[Iterable[Any]]) -> Iterator[List[str]]:
+    """Format rows and cut them to the data range, in a single pass.
+
+    Trailing empty rows and cells are dropped; empty rows inside the data
+    are kept. Pending empty rows are only counted, so a sheet whose used
+    range extends far below the data costs nothing. Rows are not padded to
+    a common width, which is only known once the last row is read.
+    """
+    pending_empty = 0
+    for values_row in values:
+        row = [format_cell(value) for value in values_row]
+        while row and not row[-1]:
+            row.pop()
+        if not row:
+            pending_empty += 1
+            continue
+        for _ in range(pending_empty):
+            yield []
+        pending_empty = 0
+        yield row
+
+
+def take_header(rows: Iterator[List[str]]) -> Optional[List[str]]:
+    """First row with a non-empty cell, None if there is none; the empty rows before it are dropped.
+
+    rows is left positioned on the first body row.
+    """
+    return next((row for row in rows if any(row)), None)
+
+
+def batch_rows(rows: Iterable[List[str]], max_chars: int) -> Iterator[List[List[str]]]:
+    """Split rows into batches of about max_chars characters of cell text.
+
+    Always yields at least one (possibly empty) batch.
+    """
+    batch: List[List[str]] = []
+    batch_chars = 0
+    batches = 0
+    for row in rows:
+        batch.append(row)
+        batch_chars += sum(len(cell) for cell in row)
+        if batch_chars >= max_chars:
+            yield batch
+            batches += 1
+            batch = []
+            batch_chars = 0
+    if batch or not batches:
+        yield batch
+
+
+class BaseSpreadsheetReader(ABC):
+    """Abstract base class for spreadsheet readers."""
+
+    name: str = ''
+
+    @abstractmethod
+    def sheet_names(self, path: str) -> List[str]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def iter_values(self, path: str, sheet_name: str) -> Iterator[Iterable[Any]]:
+        """Raw cell values of a sheet, row by row, from its first row and column."""
+        raise NotImplementedError()
+
+
+class OpenpyxlReader(BaseSpreadsheetReader):
+    """openpyxl in read-only mode: rows are streamed from the sheet XML. XLSX only."""
+
+    name = 'openpyxl'
+
+    def _open(self, mapping):
+        # data_only: formulas are read as their last computed value
+        return openpyxl.load_workbook(mapping, read_only=True, data_only=True)
+
+    def sheet_names(self, path: str) -> List[str]:
+        with open_mapped(path) as mapping:
+            workbook = self._open(mapping)
+            try:
+                return list(workbook.sheetnames)
+            finally:
+                workbook.close()
+
+    def iter_values(self, path: str, sheet_name: str) -> Iterator[Iterable[Any]]:
+        with open_mapped(path) as mapping:
+            workbook = self._open(mapping)
+            try:
+                sheet = workbook[sheet_name]
+                # Chartsheets have no cells
+                if hasattr(sheet, 'iter_rows'):
+                    yield from sheet.iter_rows(values_only=True)
+            finally:
+                workbook.close()
+
+
+class CalamineReader(BaseSpreadsheetReader):
+    """Rust calamine reader (python-calamine); also reads legacy .xls and .ods.
+
+    calamine loads a whole sheet at once, so its worker holds the sheet's
+    cells while reading it; openpyxl streams them.
+    """
+
+    name = 'calamine'
+
+    def __init__(self):
+        import python_calamine
+
+        self._calamine = python_calamine
+
+    def sheet_names(self, path: str) -> List[str]:
+        return list(self._calamine.CalamineWorkbook.from_path(path).sheet_names)
+
+    def iter_values(self, path: str, sheet_name: str) -> Iterator[Iterable[Any]]:
+        workbook = self._calamine.CalamineWorkbook.from_path(path)
+        sheet = workbook.get_sheet_by_name(sheet_name)
+        # Keep leading empty rows/columns so cells line up as they do with openpyxl
+        return iter(sheet.to_python(skip_empty_area=False))
+
+
+SPREADSHEET_READERS = {
+    OpenpyxlReader.name: OpenpyxlReader,
+    CalamineReader.name: CalamineReader,
+}
+
+_readers: Dict[str, BaseSpreadsheetReader] = {}
+
+
+def get_spreadsheet_reader(name: str) -> BaseSpreadsheetReader:
+    """Reader instance for name; raises ImportError if its package is missing."""
+    if name not in _readers:
+        _readers[name] = SPREADSHEET_READERS[name]()
+    return _readers[name]
+
+
+def spool_sheet(reader_name: str, path: str, sheet_name: str, spool_dir: str = SPOOL_DIR) -> Tuple[str, int]:
+    """Module-level task for the page worker pool: write a sheet's trimmed rows to a temporary file.
+
+    Rows are pickled SPOOL_BATCH_ROWS at a time, so neither the worker nor
+    the result sent back to the parent holds the whole sheet. Returns the
+    file's path and the sheet's width.
+    """
+    if spool_dir:
+        os.makedirs(spool_dir, exist_ok=True)
+    fd, spool_path = tempfile.mkstemp(suffix='.rows', dir=spool_dir or None)
+    width = 0
+    try:
+        with os.fdopen(fd, 'wb') as spooled:
+            batch: List[List[str]] = []
+            for row in trim_rows(get_spreadsheet_reader(reader_name).iter_values(path, sheet_name)):
+                batch.append(row)
+                width = max(width, len(row))
+                if len(batch) >= SPOOL_BATCH_ROWS:
+                    pickle.dump(batch, spooled, pickle.HIGHEST_PROTOCOL)
+                    batch = []
+            if batch:
+                pickle.dump(batch, spooled, pickle.HIGHEST_PROTOCOL)
+    except BaseException:
+        os.remove(spool_path)
+        raise
+    return spool_path, width
+
+
+def _discard_spooled(future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        try:
+            os.remove(future.result()[0])
+        except FileNotFoundError:
+            pass
+
+
+class SpreadsheetEngine:
+    """Reads the sheets of a workbook in parallel on the page worker pool.
+
+    Each worker spools its sheet's rows to disk and the parent reads them
+    back in batches, so a sheet with hundreds of thousands of rows is held
+    whole neither in the worker nor in the parent (calamine excepted, see
+    CalamineReader).
+    """
+
+    def __init__(self, pool: PageWorkerPool, reader_name: str = SPREADSHEET_READER, spool_dir: str = SPOOL_DIR):
+        self.pool = pool
+        self.reader_name = reader_name
+        self.spool_dir = spool_dir
+
+    def resolve_reader(self, legacy_xls: bool = False) -> str:
+        """Configured reader if installed, else openpyxl; .xls always needs calamine."""
+        preferred = CalamineReader.name if legacy_xls else self.reader_name
+        try:
+            get_spreadsheet_reader(preferred)
+            return preferred
+        except (KeyError, ImportError) as e:
+            if legacy_xls:
+                raise ValueError('Reading .xls files requires the python-calamine package') from e
+            logger.warning('Spreadsheet reader unavailable, using openpyxl', reader=preferred, error=str(e))
+            return OpenpyxlReader.name
+
+    def iter_sheets(self, path: str, legacy_xls: bool = False) -> Iterator[SheetData]:
+        """Yield sheets in workbook order; all sheets are submitted up front.
+
+        A sheet's spooled rows are removed once the next sheet is requested.
+        """
+        reader_name = self.resolve_reader(legacy_xls)
+        sheet_names = get_spreadsheet_reader(reader_name).sheet_names(path)
+
+        futures = [
+            self.pool.submit(spool_sheet, reader_name, path, name, self.spool_dir) for name in sheet_names
+        ]
+        try:
+            for index, (name, future) in enumerate(zip(sheet_names, futures)):
+                spool_path, width = future.result()
+                sheet = SheetData(index=index, name=name, path=spool_path, width=width)
+                try:
+                    yield sheet
+                finally:
+                    sheet.discard()
+        finally:
+            # Sheets still being read remove their rows when they finish
+            for future in futures:
+                if not future.cancel():
+                    future.add_done_callback(_discard_spooled)
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+from pdfplumber.utils import get_bbox_overlap
+from pdfplumber.utils import obj_to_bbox
+
+BBox = Tuple[float, float, float, float]
+
+# Height of one grid row in PDF points; roughly two lines of body text
+DEFAULT_ROW_HEIGHT = 24.0
+
+
+class TableCharIndex:
+    """Grid lookup from page coordinates to the table bboxes covering them.
+
+    Tables are bucketed by the horizontal bands they span, so each char is
+    only tested against the few tables sharing its band instead of all of
+    them.
+    """
+
+    def __init__(self, bboxes: Sequence[BBox], row_height: float = DEFAULT_ROW_HEIGHT):
+        self.bboxes = list(bboxes)
+        self.row_height = row_height
+        self.rows: Dict[int, List[int]] = defaultdict(list)
+        for table_index, (_, top, _, bottom) in enumerate(self.bboxes):
+            for row in range(self._row(top), self._row(bottom) + 1):
+                self.rows[row].append(table_index)
+
+    def _row(self, y: float) -> int:
+        return int(y // self.row_height)
+
+    def lookup(self, bbox: BBox) -> List[int]:
+        """Indexes of the tables overlapping bbox, in table order."""
+        _, top, _, bottom = bbox
+        candidates = set()
+        for row in range(self._row(top), self._row(bottom) + 1):
+            candidates.update(self.rows.get(row, ()))
+        return [
+            table_index for table_index in sorted(candidates)
+            if get_bbox_overlap(bbox, self.bboxes[table_index]) is not None
+        ]
+
+    def assign_chars(self, chars: Sequence[dict]) -> Tuple[List[dict], List[List[dict]]]:
+        """Split chars in one pass into (chars outside every table, chars per table)."""
+        outside: List[dict] = []
+        per_table: List[List[dict]] = [[] for _ in self.bboxes]
+        for char in chars:
+            table_indexes = self.lookup(obj_to_bbox(char))
+            if not table_indexes:
+                outside.append(char)
+            for table_index in table_indexes:
+                per_table[table_index].append(char)
+        return outside, per_table
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import multiprocessing
+import resource
+import threading
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable
+from typing import Optional
+
+from shared.logging.logger import get_logger
+from shared.multiworker_config import MultiWorkerConfig
+
+logger = get_logger(__name__)
+
+
+def limit_worker_memory(limit_mb: int) -> None:
+    """Process pool initializer: cap the worker's data segment at limit_mb.
+
+    RLIMIT_DATA covers the heap and private anonymous mappings but not
+    read-only file mappings, so documents read through open_mapped do not
+    count against it. An allocation past the limit raises MemoryError and
+    fails that page instead of pushing the node into swap or the OOM killer.
+    """
+    if limit_mb <= 0:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_DATA)
+    limit = limit_mb * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_DATA, (limit, hard))
+    except (ValueError, OSError) as e:
+        logger.warning('Could not limit page worker memory', limit_mb=limit_mb, error=str(e))
+
+
+class PageWorkerPool:
+    """Long-lived executor shared by every upload handled in this process.
+
+    The executor is created lazily on first use and kept until shutdown(), so
+    worker processes (and whatever they have loaded) survive across uploads.
+    """
+
+    def __init__(self, config: MultiWorkerConfig):
+        self.max_workers = config.get_page_worker_count()
+        self.use_processes = config.page_pool_mode == 'process'
+        self.memory_limit_mb = config.memory_limit_per_worker_mb
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _create_executor(self) -> Executor:
+        logger.info(
+            'Starting page worker pool',
+            max_workers=self.max_workers,
+            mode='process' if self.use_processes else 'thread',
+            memory_limit_mb=self.memory_limit_mb if self.use_processes else None,
+        )
+        if self.use_processes:
+            # spawn: the API process is multi-threaded, forking it is unsafe
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=limit_worker_memory,
+                initargs=(self.memory_limit_mb,),
+            )
+        # Threads share the API process's memory; the per-worker limit cannot apply
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='page-worker')
+
+    @property
+    def executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            return self._executor
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        try:
+            return self.executor.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); replace the pool once
+            logger.warning('Page worker pool is broken, restarting it')
+            with self._lock:
+                self._executor = None
+            return self.executor.submit(fn, *args, **kwargs)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
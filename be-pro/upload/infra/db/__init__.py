@@ -3,7 +3,8 @@ from __future__ import annotations
 from .db import Base
 from .db import Conversation
 from .db import Document
+from .db import init_db
 from .db import SessionLocal
 from .db import User
 
-__all__ = ['Conversation', 'Document', 'SessionLocal', 'User', 'Base']
+__all__ = ['Conversation', 'Document', 'SessionLocal', 'User', 'Base', 'init_db']
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import time
 import urllib.parse
 
 from shared.logging import get_logger
@@ -8,6 +9,7 @@ from sqlalchemy import Column
 from sqlalchemy import create_engine
 from sqlalchemy import Integer
 from sqlalchemy import String
+from sqlalchemy import text
 from sqlalchemy import Text
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import DeclarativeBase
@@ -22,16 +24,10 @@ POSTGRES_PASSWORD = urllib.parse.quote_plus(POSTGRES_PASSWORD)
 POSTGRES_DB = 'semantic-chunking'
 DATABASE_URL = os.getenv('DATABASE_URL', f'postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_ENDPOINT}:5432/{POSTGRES_DB}')
 
+# Connections are only opened on use; importing this module has no side effects
 engine = create_engine(DATABASE_URL, echo=True, future=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
-try:
-    with engine.connect() as connection:
-        logger.info('Connected to the database successfully.')
-except OperationalError as e:
-    logger.error('Failed to connect to the database.')
-    logger.error(f"Error details: {e}")
-
 
 class Base(DeclarativeBase):
     pass
@@ -59,21 +55,41 @@ class Document(Base):
     conversation_id = Column(Integer, nullable=False)
     name = Column(String(256), nullable=False)
     size = Column(Integer, nullable=False)
-import time
+    # SHA-256 of the uploaded bytes; identical uploads reuse the indexed chunks
+    content_hash = Column(String(64), nullable=True, index=True)
+    # Chunks indexed for this document, set once its upload completed; only such documents are reused
+    indexed_chunks = Column(Integer, nullable=True)
+
+
+def init_db() -> None:
+    """Create missing tables and columns, waiting for the database to come up.
 
-max_tries = 6
-delay = 1
-for attempt in range(1, max_tries + 1):
+    Called once at server startup, not at import: page worker processes
+    import the application modules too and must not touch the schema.
+    """
     try:
-        Base.metadata.create_all(bind=engine)
-        break
-    except OperationalError:
-        if attempt == max_tries:
-            logger.error('Failed to create tables after retries.')
-            raise
-        logger.info(f'Database not ready, retrying create_all (attempt {attempt})...')
-        time.sleep(delay)
-        delay = min(delay * 2, 5)
-
-
-Base.metadata.create_all(bind=engine)
+        with engine.connect():
+            logger.info('Connected to the database successfully.')
+    except OperationalError as e:
+        logger.error('Failed to connect to the database.')
+        logger.error(f"Error details: {e}")
+
+    max_tries = 6
+    delay = 1
+    for attempt in range(1, max_tries + 1):
+        try:
+            Base.metadata.create_all(bind=engine)
+            break
+        except OperationalError:
+            if attempt == max_tries:
+                logger.error('Failed to create tables after retries.')
+                raise
+            logger.info(f'Database not ready, retrying create_all (attempt {attempt})...')
+            time.sleep(delay)
+            delay = min(delay * 2, 5)
+
+    # create_all does not add columns to existing tables
+    with engine.begin() as connection:
+        connection.execute(text('ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)'))
+        connection.execute(text('CREATE INDEX IF NOT EXISTS ix_documents_content_hash ON documents (content_hash)'))
+        connection.execute(text('ALTER TABLE documents ADD COLUMN IF NOT EXISTS indexed_chunks INTEGER'))
@@ -13,6 +13,7 @@ from domain.embedder import OpenSearchStorage
 from domain.parser import ParserService
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from infra.db import init_db
 from shared.logging import get_logger
 from shared.logging import setup_logging
 
@@ -23,7 +24,13 @@ logger = get_logger('api')
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Lifespan event handler for the FastAPI application."""
+    """Lifespan event handler for the FastAPI application.
+
+    Startup side effects (schema migration, NLTK data) live here rather
+    than at import: the page worker pool spawns processes that re-import
+    this module as __mp_main__ when the server is started with python main.py.
+    """
+    init_db()
     logger.info('Initializing domain services...')
     parser = ParserService()
     chunker = ChunkerService()
@@ -37,6 +44,7 @@ async def lifespan(app: FastAPI):
     app.state.embedder = embedder
     logger.info('Domain services initialized successfully')
     yield
+    parser.close()
 
 app = FastAPI(
     title='Document Upload Service',
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from .utils import file_sha256
 from .utils import get_settings
 
-__all__ = ['get_settings']
+__all__ = ['file_sha256', 'get_settings']
@@ -0,0 +1,130 @@
+"""
+Size-bounded LRU cache on local disk, shared by every process on the node.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict
+from typing import Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+
+class DiskCache:
+    """Key/value cache stored in a SQLite file.
+
+    SQLite's file locking makes the cache safe to share between worker
+    processes; each thread opens its own connection. Entries are evicted
+    least-recently-used first once their total size exceeds max_bytes, and
+    expire after ttl_seconds when a TTL is set. Hit/miss counters live in
+    the same file, so they are node-wide.
+    """
+
+    def __init__(self, path: str, max_bytes: int, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+
+    def __getstate__(self) -> dict:
+        # Connections cannot be pickled; workers reconnect lazily
+        state = self.__dict__.copy()
+        del state['_local']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        row = self._conn.execute('SELECT value, created_at FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is not None and self.ttl_seconds is not None and row[1] < now - self.ttl_seconds:
+            self._conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            row = None
+
+        if row is None:
+            self.incr('misses')
+            return None
+
+        self._conn.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (now, key))
+        self.incr('hits')
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        conn = self._conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)',
+                (key, value, size, now, now),
+            )
+            self._evict(now)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _evict(self, now: float) -> None:
+        conn = self._conn
+        if self.ttl_seconds is not None:
+            conn.execute('DELETE FROM entries WHERE created_at < ?', (now - self.ttl_seconds,))
+
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in conn.execute('SELECT key, size FROM entries ORDER BY accessed_at'):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany('DELETE FROM entries WHERE key = ?', evicted)
+        self.incr('evictions', len(evicted))
+
+    def incr(self, name: str, amount: float = 1) -> None:
+        self._conn.execute(
+            'INSERT INTO counters (name, value) VALUES (?, ?) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + excluded.value',
+            (name, amount),
+        )
+
+    def stats(self) -> Dict[str, float]:
+        """Counters plus the current number of entries and their size in bytes."""
+        stats = {'hits': 0.0, 'misses': 0.0, 'evictions': 0.0}
+        stats.update(dict(self._conn.execute('SELECT name, value FROM counters').fetchall()))
+        entries, size = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        stats.update(entries=entries, size_bytes=size)
+        return stats
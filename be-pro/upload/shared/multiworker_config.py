@@ -14,8 +14,10 @@ class MultiWorkerConfig:
 
     max_workers: Optional[int] = None
     enable_multiprocessing: bool = False  # Use ProcessPoolExecutor instead of ThreadPoolExecutor
-    memory_limit_per_worker_mb: int = 512  # Memory limit per worker in MB
+    memory_limit_per_worker_mb: int = 512  # Memory limit per worker in MB (enforced on page worker processes)
     timeout_per_file_seconds: int = 300  # Timeout per file processing in seconds
+    page_workers: Optional[int] = None  # Shared page extraction pool size, defaults to CPU count
+    page_pool_mode: str = 'process'  # 'process' or 'thread' pool for page extraction
 
     @classmethod
     def from_environment(cls) -> MultiWorkerConfig:
@@ -25,6 +27,8 @@ class MultiWorkerConfig:
             enable_multiprocessing=os.getenv('UPLOAD_USE_MULTIPROCESSING', 'false').lower() == 'true',
             memory_limit_per_worker_mb=int(os.getenv('UPLOAD_MEMORY_LIMIT_MB', '512')),
             timeout_per_file_seconds=int(os.getenv('UPLOAD_TIMEOUT_SECONDS', '300')),
+            page_workers=int(os.getenv('UPLOAD_PAGE_WORKERS', '0')) or None,
+            page_pool_mode=os.getenv('UPLOAD_PAGE_POOL_MODE', 'process').lower(),
         )
 
     @classmethod
@@ -59,6 +63,16 @@ class MultiWorkerConfig:
         if self.timeout_per_file_seconds < 10:
             raise ValueError('timeout_per_file_seconds must be >= 10')
 
+        if self.page_workers is not None and self.page_workers < 1:
+            raise ValueError('page_workers must be >= 1')
+
+        if self.page_pool_mode not in ('process', 'thread'):
+            raise ValueError("page_pool_mode must be 'process' or 'thread'")
+
+    def get_page_worker_count(self) -> int:
+        """Size of the shared page extraction pool."""
+        return self.page_workers or os.cpu_count() or 1
+
 
 def get_optimal_worker_count(file_count: int, max_workers: Optional[int] = None) -> int:
     """Calculate optimal worker count based on file count and system resources."""
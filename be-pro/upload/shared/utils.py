@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 import time
 from functools import lru_cache
 from functools import wraps
@@ -7,12 +8,27 @@ from functools import wraps
 from shared.logging import get_logger
 from shared.settings import Settings
 
+HASH_BLOCK_SIZE = 1024 * 1024
+
 
 @lru_cache
 def get_settings():
     return Settings()  # type: ignore
 
 
+def file_sha256(file) -> str:
+    """SHA-256 hex digest of a binary file object, read in blocks from the start.
+
+    The file position is reset to the start afterwards.
+    """
+    digest = hashlib.sha256()
+    file.seek(0)
+    for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
 def profile(func):
     """Decorator to profile execution time. Using default logger with info level\n
     Output: [module.function] executed in: 0.0s
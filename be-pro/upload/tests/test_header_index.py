@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from domain.parser.header_index import HeaderLineIndex
+
+LINES = [
+    'BÁO CÁO TÀI CHÍNH',
+    'A. Tổng quan',
+    'Năm nay doanh nghiệp tăng trưởng ổn định.',
+    'Ghi chú',
+    'B. Kế hoạch',
+    'Mở rộng thêm hai nhà máy.',
+    'Ghi chú',
+]
+
+
+def test_repeated_header_resolves_to_its_occurrences_in_order():
+    index = HeaderLineIndex(LINES)
+
+    assert index.find('Ghi chú') == 3
+    assert index.find('Ghi chú') == 6
+    # Both occurrences are taken
+    assert index.find('Ghi chú') == -1
+
+
+def test_consumed_line_is_skipped():
+    index = HeaderLineIndex(LINES)
+    index.consume(3)
+
+    assert index.find('Ghi chú') == 6
+
+
+def test_header_differing_in_whitespace_matches_exactly():
+    index = HeaderLineIndex(LINES)
+
+    assert index.find('  B.   Kế\thoạch ') == 4
+
+
+def test_header_differing_in_case_matches_fuzzily():
+    index = HeaderLineIndex(LINES)
+
+    assert index.find('B. KẾ HOẠCH') == 4
+    assert index.find('BÁO CÁO TÀI CHÍNH'.lower()) == 0
+
+
+def test_header_with_a_different_numbering_prefix_matches_fuzzily():
+    index = HeaderLineIndex(LINES)
+
+    assert index.find('C. Tổng quan') == 1
+
+
+def test_header_without_a_match_is_not_found():
+    index = HeaderLineIndex(LINES)
+
+    assert index.find('Kết luận') == -1
+    assert index.find('A.') == -1
+    assert index.find('') == -1
+    # Too few of the header's words in any line
+    assert index.find('Tổng quan về thị trường xuất khẩu') == -1
+
+
+def test_keys_identify_lines():
+    index = HeaderLineIndex(['A. Tổng quan', 'Ghi chú', 'Ghi chú'], keys=[10, 14, 20])
+
+    assert index.find('Ghi chú') == 14
+    assert index.find('ghi chú') == 20
+    assert index.find('tổng quan') == 10
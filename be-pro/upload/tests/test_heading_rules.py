@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from domain.parser.heading_candidates import find_heading_candidates
+from domain.parser.heading_candidates import is_heading_candidate
+from domain.parser.heading_rules import detect_rule_headings
+from domain.parser.heading_windows import HeadingContext
+from domain.parser.heading_windows import HeadingLine
+from domain.parser.heading_windows import numbering_signature
+from domain.parser.heading_windows import parse_numbering
+
+# Default UPLOAD_HEADING_RULES_MIN_CONFIDENCE: at or above it the LLM is skipped
+MIN_CONFIDENCE = 0.9
+
+
+def _detect(text, context=None):
+    lines = text.split('\n')
+    detection = detect_rule_headings(find_heading_candidates(lines), context)
+    headings = detection.headings if context is None else context.apply(detection.headings)
+    return {lines[heading.line_index]: heading.level for heading in headings}, detection.confidence
+
+
+def test_strict_numbering_is_trusted():
+    headings, confidence = _detect(
+        'BÁO CÁO TÀI CHÍNH\n'
+        'A. Tổng quan\n'
+        'Năm nay doanh nghiệp tăng trưởng ổn định trên mọi mảng kinh doanh.\n'
+        'A.1. Doanh thu\n'
+        'Doanh thu tăng 12% so với cùng kỳ nhờ mảng xuất khẩu.\n'
+        'A.2. Chi phí\n'
+        'Chi phí vận hành giảm 5% sau khi tối ưu chuỗi cung ứng.\n'
+        'B. Kế hoạch\n'
+        'Mở rộng thêm hai nhà máy trong năm tới tại miền Trung.\n',
+    )
+
+    assert headings == {
+        'BÁO CÁO TÀI CHÍNH': 1,
+        'A. Tổng quan': 2,
+        'A.1. Doanh thu': 3,
+        'A.2. Chi phí': 3,
+        'B. Kế hoạch': 2,
+    }
+    assert confidence == 1.0
+
+
+def test_numbered_list_under_a_section_is_not_headings():
+    headings, confidence = _detect(
+        'A. Tổng quan\n'
+        '1. Doanh thu tăng\n'
+        '2. Chi phí giảm\n',
+    )
+
+    assert '1. Doanh thu tăng' not in headings
+    assert '2. Chi phí giảm' not in headings
+    assert confidence < MIN_CONFIDENCE
+
+
+def test_numbered_list_stays_body_text_between_sections():
+    headings, confidence = _detect(
+        'A. Tổng quan\n'
+        'Kết quả kinh doanh trong năm có hai điểm chính như sau:\n'
+        '1. Doanh thu tăng\n'
+        '2. Chi phí giảm\n'
+        'B. Kế hoạch\n'
+        'Mở rộng thêm hai nhà máy trong năm tới tại miền Trung.\n'
+        'C. Kiến nghị\n'
+        'Tăng vốn điều lệ để tài trợ cho kế hoạch mở rộng sản xuất.\n',
+    )
+
+    assert headings == {'A. Tổng quan': 2, 'B. Kế hoạch': 2, 'C. Kiến nghị': 2}
+    assert confidence == 1.0
+
+
+def test_numbering_kinds_sharing_a_level_go_to_the_model():
+    # '1.' lands on h3 like 'A.1.': a subsection or a sibling of A.1.?
+    _, confidence = _detect(
+        'A. Tổng quan\n'
+        'Năm nay doanh nghiệp tăng trưởng ổn định trên mọi mảng kinh doanh.\n'
+        'A.1. Doanh thu\n'
+        'Doanh thu tăng 12% so với cùng kỳ nhờ mảng xuất khẩu.\n'
+        '1. Thị trường trong nước\n'
+        'Sức mua phục hồi chậm ở các tỉnh phía Bắc và miền Trung.\n'
+        'B. Kế hoạch\n'
+        'Mở rộng thêm hai nhà máy trong năm tới tại miền Trung.\n',
+    )
+
+    assert confidence < MIN_CONFIDENCE
+
+
+def test_batches_of_a_document_keep_its_levels():
+    context = HeadingContext()
+    first, first_confidence = _detect(
+        'BÁO CÁO TÀI CHÍNH\n'
+        'I. Kết quả\n'
+        'Năm nay doanh nghiệp tăng trưởng ổn định trên mọi mảng kinh doanh.\n'
+        'A. Doanh thu\n'
+        'Doanh thu tăng 12% so với cùng kỳ nhờ mảng xuất khẩu.\n'
+        'II. Phân tích\n'
+        'Các chỉ số tài chính chính được so sánh với trung bình ngành.\n'
+        'A. Thanh khoản\n'
+        'Hệ số thanh toán hiện hành duy trì trên mức an toàn.\n',
+        context,
+    )
+    # Opens in the middle of section II, without its title; alone, 'B.' would be h2
+    second, second_confidence = _detect(
+        'B. Đòn bẩy\n'
+        'Tỷ lệ nợ trên vốn chủ sở hữu giảm nhờ trả bớt nợ vay ngắn hạn.\n'
+        'C. Hiệu quả\n'
+        'Vòng quay tài sản cải thiện so với năm trước ở mọi mảng.\n'
+        'III. Kế hoạch\n'
+        'Mở rộng thêm hai nhà máy trong năm tới tại miền Trung.\n',
+        context,
+    )
+
+    assert first == {
+        'BÁO CÁO TÀI CHÍNH': 1, 'I. Kết quả': 2, 'A. Doanh thu': 3, 'II. Phân tích': 2, 'A. Thanh khoản': 3,
+    }
+    assert second == {'B. Đòn bẩy': 3, 'C. Hiệu quả': 3, 'III. Kế hoạch': 2}
+    assert first_confidence == second_confidence == 1.0
+
+
+def test_later_batch_classified_as_its_own_document_is_demoted():
+    context = HeadingContext()
+    context.apply([HeadingLine(0, 1, 'BÁO CÁO TÀI CHÍNH'), HeadingLine(1, 2, 'A. Tổng quan')])
+
+    # The model saw no title in this batch and promoted its sections
+    headings = context.apply([
+        HeadingLine(0, 1, 'B. Kế hoạch'),
+        HeadingLine(4, 2, 'Các dự án mới'),
+        HeadingLine(9, 1, 'C. Kiến nghị'),
+    ])
+
+    assert [heading.level for heading in headings] == [2, 3, 2]
+
+
+def test_single_letter_roman_numerals_read_the_same_on_both_paths():
+    # 'I.' and 'V.' are roman once the document has 'II.', letters otherwise
+    assert parse_numbering('I. Kết quả', roman=True) == ('roman', (1,))
+    assert parse_numbering('V. Kiến nghị', roman=True) == ('roman', (5,))
+    assert parse_numbering('I. Kết quả', roman=False) == ('letter', (9,))
+    assert parse_numbering('I. Kết quả') is None
+    assert numbering_signature('V. Kiến nghị', roman=True) == 'roman'
+
+    context = HeadingContext()
+    headings, _ = _detect(
+        'I. Kết quả\n'
+        'Năm nay doanh nghiệp tăng trưởng ổn định trên mọi mảng kinh doanh.\n'
+        'II. Phân tích\n'
+        'Các chỉ số tài chính chính được so sánh với trung bình ngành.\n',
+        context,
+    )
+    # A model heading placed one level too deep is aligned with the rules' roman level
+    model_headings = context.apply([HeadingLine(0, 3, 'V. Kiến nghị')])
+
+    assert headings == {'I. Kết quả': 2, 'II. Phân tích': 2}
+    assert [heading.level for heading in model_headings] == [2]
+
+
+def test_lines_are_candidates_exactly_when_they_have_a_section_number():
+    # Longer than a short line, so only the section number can make them candidates
+    body = ' kết quả kinh doanh của toàn bộ các đơn vị thành viên trong năm tài chính'
+    for number in ('I.', 'V.', 'IV.', 'A.', 'A.1', 'A.1.', '1.', '1.2', '3.2.1'):
+        assert is_heading_candidate(number + body)
+        assert parse_numbering(number + body, roman=False) is not None
+    for number in ('1', 'A', 'IV', '2024'):
+        assert not is_heading_candidate(number + body)
+        assert parse_numbering(number + body, roman=False) is None
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from domain.parser.heading_stream import HeadingJsonScanner
+
+
+def _feed(*chunks):
+    scanner = HeadingJsonScanner()
+    return [scanner.feed(chunk) for chunk in chunks], scanner
+
+
+def test_items_split_across_chunks_are_returned_once_complete():
+    found, scanner = _feed('{"h1": [0, "Ti', 'tle"], "h', '2": [12', '3, 4]', '}')
+
+    assert found == [[('h1', 0)], [('h1', 'Title')], [], [('h2', 123), ('h2', 4)], []]
+    assert scanner.started
+    assert scanner.complete
+
+
+def test_quotes_and_brackets_inside_strings_are_text():
+    found, scanner = _feed('{"h1": ["Say \\"hi\\" {now}", "a], b\\\\"], "h2": ["x"]}')
+
+    assert found == [[('h1', 'Say "hi" {now}'), ('h1', 'a], b\\'), ('h2', 'x')]]
+    assert scanner.complete
+
+
+def test_escape_split_across_chunks():
+    found, _ = _feed('{"h3": ["a\\', '"b", "\\u00', 'e9"]}')
+
+    assert found == [[], [('h3', 'a"b')], [('h3', 'é')]]
+
+
+def test_text_around_the_object_is_ignored():
+    found, scanner = _feed('Here you go:\n```json\n{"h1": [0]}\n```\n{"h1": [1]}')
+
+    assert found == [[('h1', 0)]]
+    assert scanner.complete
+
+
+def test_only_heading_levels_and_their_items_are_returned():
+    found, _ = _feed('{"note": ["x", 1], "h5": [2], "h2": [true, null, 3.5, 3, {"h1": [4]}], "h4": []}')
+
+    assert found == [[('h2', 3)]]
+
+
+def test_truncated_tail_returns_only_completed_items():
+    found, scanner = _feed('{"h1": [1, "Tổng', ' quan"], "h2": [2, "Kế ho')
+
+    assert found == [[('h1', 1)], [('h1', 'Tổng quan'), ('h2', 2)]]
+    assert scanner.started
+    assert not scanner.complete
+
+
+def test_number_cut_off_by_the_stream_is_not_returned():
+    found, scanner = _feed('{"h1": [12')
+
+    assert found == [[]]
+    assert not scanner.complete
+
+
+def test_invalid_token_is_skipped():
+    found, scanner = _feed('{"h1": [1-, 2, 3e], "h2": [4]}')
+
+    assert found == [[('h1', 2), ('h2', 4)]]
+    assert scanner.complete
+
+
+def test_no_object_is_not_started():
+    found, scanner = _feed('I cannot find any headings.')
+
+    assert found == [[]]
+    assert not scanner.started
+    assert not scanner.complete
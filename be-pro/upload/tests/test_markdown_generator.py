@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from domain.parser import markdown_generator
+from domain.parser.markdown_generator import NovaMarkdownGenerator
+
+CALL_SECONDS = 0.2
+
+
+class _FakeStream:
+    def __init__(self, texts):
+        self.texts = texts
+        self.closed = False
+
+    def __iter__(self):
+        for text in self.texts:
+            # A blocking read, like botocore's
+            time.sleep(CALL_SECONDS / len(self.texts))
+            delta = {'contentBlockDelta': {'delta': {'text': text}}}
+            yield {'chunk': {'bytes': json.dumps(delta).encode()}}
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeBedrockClient:
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        with self.lock:
+            self.calls += 1
+        return {'body': _FakeStream(['{"h1": ', '[0]}'])}
+
+
+async def _answer(generator, prompt):
+    return ''.join([text async for text in generator.stream_from_prompt(prompt)])
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    client = _FakeBedrockClient()
+    monkeypatch.setattr(markdown_generator.boto3, 'client', lambda *args, **kwargs: client)
+    generator = NovaMarkdownGenerator(region_name='us-east-1', model_id='test-model', max_concurrency=2)
+    yield generator
+    generator.close()
+
+
+def test_event_loop_stays_responsive_during_calls(generator):
+    async def run():
+        ticks = 0
+        done = asyncio.Event()
+
+        async def ticker():
+            nonlocal ticks
+            while not done.is_set():
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.create_task(ticker())
+        answers = await asyncio.gather(*(_answer(generator, 'prompt') for _ in range(4)))
+        done.set()
+        await ticking
+        return answers, ticks
+
+    started = time.monotonic()
+    answers, ticks = asyncio.run(run())
+    elapsed = time.monotonic() - started
+
+    assert answers == ['{"h1": [0]}'] * 4
+    # Four calls, two at a time
+    assert elapsed >= 2 * CALL_SECONDS
+    # The loop kept running while the calls blocked their threads
+    assert ticks >= 2 * CALL_SECONDS / 0.01 / 2
+
+
+def test_generator_is_shared_by_event_loops_in_threads(generator):
+    errors = []
+    answers = []
+
+    def upload():
+        async def run():
+            return await asyncio.gather(*(_answer(generator, 'prompt') for _ in range(3)))
+
+        try:
+            answers.extend(asyncio.run(run()))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=upload) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert errors == []
+    assert answers == ['{"h1": [0]}'] * 9
+    assert generator.client.calls == 9
+
+
+def test_closing_the_stream_early_stops_the_call(generator):
+    async def run():
+        stream = generator.stream_from_prompt('prompt')
+        first = await stream.__anext__()
+        await stream.aclose()
+        return first
+
+    assert asyncio.run(run()) == '{"h1": '
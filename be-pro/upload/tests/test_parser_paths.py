@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import asyncio
+
+from domain.parser import markdown_generator
+from domain.parser.base import HeadingStats
+from domain.parser.parser import Parser
+
+
+class _RecordingCache:
+    def __init__(self):
+        self.calls = []
+
+    def get(self, key):
+        self.calls.append(('get', key))
+        return None
+
+    def set(self, key, value):
+        self.calls.append(('set', key))
+
+
+def test_text_without_candidates_skips_rules_model_and_cache(monkeypatch):
+    monkeypatch.setattr(markdown_generator.boto3, 'client', lambda *args, **kwargs: object())
+    cache = _RecordingCache()
+    parser = Parser(region_name='us-east-1', model_id='test-model', cache=cache)
+    stats = HeadingStats()
+
+    try:
+        markdown = asyncio.run(parser.parse(
+            'doanh thu tăng 12% so với cùng kỳ nhờ mảng xuất khẩu.\n'
+            'chi phí vận hành giảm 5% sau khi tối ưu chuỗi cung ứng.',
+            stats=stats,
+        ))
+    finally:
+        parser.close()
+
+    assert '#' not in markdown
+    assert stats.paths == {'none': 1}
+    assert stats.rule_confidences == []
+    assert (stats.llm_calls, stats.cache_hits, stats.cache_misses) == (0, 0, 0)
+    assert cache.calls == []
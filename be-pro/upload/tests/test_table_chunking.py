@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from domain.chunker.service import Chunker
+from domain.parser.spreadsheet import batch_rows
+from domain.parser.spreadsheet import take_header
+
+HEADER = ['Mã', 'Tên']
+HEADER_LINES = ['| Mã | Tên |', '| --- | --- |']
+# Token counts of the header lines and of one '| n | x |' row
+HEADER_TOKENS = 13
+ROW_TOKENS = 7
+
+
+def _rows(count):
+    return [[str(i), f'x{i}'] for i in range(count)]
+
+
+def _chunk(rows, header=HEADER, max_tokens=2048):
+    return Chunker().chunk_table_rows(header, rows, filename='bang.xlsx', section_title='Sheet1', max_tokens=max_tokens)
+
+
+def test_rows_are_split_at_the_token_limit_with_the_header_repeated():
+    # Room for exactly two rows per chunk
+    chunks = _chunk(_rows(5), max_tokens=HEADER_TOKENS + 2 * ROW_TOKENS)
+
+    assert [chunk.content.split('\n') for chunk in chunks] == [
+        HEADER_LINES + ['| 0 | x0 |', '| 1 | x1 |'],
+        HEADER_LINES + ['| 2 | x2 |', '| 3 | x3 |'],
+        HEADER_LINES + ['| 4 | x4 |'],
+    ]
+    assert [chunk.content_json for chunk in chunks] == [
+        [{'Mã': '0', 'Tên': 'x0'}, {'Mã': '1', 'Tên': 'x1'}],
+        [{'Mã': '2', 'Tên': 'x2'}, {'Mã': '3', 'Tên': 'x3'}],
+        [{'Mã': '4', 'Tên': 'x4'}],
+    ]
+    assert [chunk.tokens for chunk in chunks] == [
+        HEADER_TOKENS + 2 * ROW_TOKENS, HEADER_TOKENS + 2 * ROW_TOKENS, HEADER_TOKENS + ROW_TOKENS,
+    ]
+    assert [chunk.position for chunk in chunks] == [0, 1, 2]
+    assert [chunk.id for chunk in chunks] == [0, 1, 2]
+    assert {(chunk.type, chunk.section_title, chunk.filename, chunk.heading_level) for chunk in chunks} == {
+        ('table', 'Sheet1', 'bang.xlsx', 2),
+    }
+
+
+def test_chunk_ids_continue_across_tables():
+    chunker = Chunker()
+    first = chunker.chunk_table_rows(HEADER, _rows(1), filename='bang.xlsx', section_title='Sheet1')
+    second = chunker.chunk_table_rows(HEADER, _rows(1), filename='bang.xlsx', section_title='Sheet2')
+
+    assert [chunk.id for chunk in first + second] == [0, 1]
+    assert [chunk.position for chunk in first + second] == [0, 0]
+
+
+def test_row_over_the_limit_gets_its_own_chunk():
+    long_row = ['9', ' '.join(['từ'] * 50)]
+    chunks = _chunk(_rows(1) + [long_row] + _rows(1), max_tokens=HEADER_TOKENS + 2 * ROW_TOKENS)
+
+    assert [len(chunk.content_json) for chunk in chunks] == [1, 1, 1]
+    assert chunks[1].content_json == [{'Mã': '9', 'Tên': long_row[1]}]
+    assert all(chunk.content.startswith('\n'.join(HEADER_LINES)) for chunk in chunks)
+
+
+def test_table_without_rows_is_one_header_chunk():
+    chunks = _chunk([])
+
+    assert [(chunk.content, chunk.content_json) for chunk in chunks] == [('\n'.join(HEADER_LINES), [])]
+
+
+def test_blank_and_duplicate_headers_and_cells_are_kept():
+    chunks = _chunk([['1', None, ' a\nb ', '']], header=['Tên', '', 'Tên', 'Ghi\nchú'])
+
+    assert chunks[0].content.split('\n') == ['| Tên |  | Tên | Ghi chú |', '| --- | --- | --- | --- |', '| 1 |  | a b |  |']
+    assert chunks[0].content_json == [{'Tên': '1', 'Column 2': '', 'Tên (2)': 'a b', 'Ghi chú': ''}]
+
+
+def test_content_matches_chunking_the_markdown_table():
+    rows = [[str(i), f'giá trị {i}'] for i in range(40)]
+    max_tokens = 120
+    markdown = '\n'.join(HEADER_LINES + [f'| {code} | {name} |' for code, name in rows])
+
+    from_rows = _chunk(rows, max_tokens=max_tokens)
+    from_markdown = Chunker().handle_table_chunking(markdown, 'bang.xlsx', 'Sheet1', max_tokens=max_tokens)
+
+    assert len(from_rows) > 1
+    assert [chunk.content for chunk in from_rows] == [chunk.content for chunk in from_markdown]
+    assert [chunk.content_json for chunk in from_rows] == [chunk.content_json for chunk in from_markdown]
+
+
+def test_blank_rows_above_the_header_are_skipped():
+    # calamine keeps the empty rows above a sheet's data
+    rows = iter([['', ''], ['', '']] + [HEADER] + _rows(2))
+
+    header = take_header(rows)
+    chunks = [chunk for batch in batch_rows(rows, max_chars=20000) for chunk in _chunk(batch, header=header)]
+
+    assert header == HEADER
+    assert chunks[0].content.split('\n') == HEADER_LINES + ['| 0 | x0 |', '| 1 | x1 |']
+    assert chunks[0].content_json == [{'Mã': '0', 'Tên': 'x0'}, {'Mã': '1', 'Tên': 'x1'}]
+
+
+def test_sheet_of_blank_rows_has_no_header():
+    assert take_header(iter([['', ''], []])) is None
+
+
+def test_table_streamed_in_batches_is_chunked_as_one_table():
+    max_tokens = HEADER_TOKENS + 3 * ROW_TOKENS
+    rows = _rows(10)
+    whole = _chunk(rows, max_tokens=max_tokens)
+
+    # Batches of 4 rows do not line up with chunks of 3
+    chunker = Chunker()
+    chunks, open_rows = [], []
+    batches = [rows[start:start + 4] for start in range(0, len(rows), 4)]
+    for number, batch in enumerate(batches):
+        batch_chunks, open_rows = chunker.split_table_rows(
+            HEADER, open_rows + batch, filename='bang.xlsx', section_title='Sheet1', max_tokens=max_tokens,
+            start_position=len(chunks), last=number == len(batches) - 1,
+        )
+        chunks.extend(batch_chunks)
+
+    assert [chunk.content for chunk in chunks] == [chunk.content for chunk in whole]
+    assert [len(chunk.content_json) for chunk in chunks] == [3, 3, 3, 1]
+    assert [chunk.position for chunk in chunks] == [0, 1, 2, 3]
+    assert [chunk.id for chunk in chunks] == [0, 1, 2, 3]
+    assert open_rows == []
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import pdfplumber
+from domain.parser.pdf_text_backend import extract_page_text
+from domain.parser.table_index import TableCharIndex
+
+# Two tables side by side, a third further down the page
+LEFT = (50.0, 100.0, 250.0, 200.0)
+RIGHT = (300.0, 100.0, 500.0, 200.0)
+BOTTOM = (50.0, 400.0, 500.0, 600.0)
+
+
+def _char(text, x0, top, width=5.0, height=10.0):
+    return {'text': text, 'x0': x0, 'top': top, 'x1': x0 + width, 'bottom': top + height}
+
+
+def _texts(chars):
+    return ''.join(char['text'] for char in chars)
+
+
+def test_chars_are_assigned_to_the_table_containing_them():
+    index = TableCharIndex([LEFT, RIGHT, BOTTOM])
+    chars = [
+        _char('a', 60, 110), _char('b', 310, 110), _char('c', 60, 500),
+        _char('d', 60, 50), _char('e', 270, 150), _char('f', 60, 300),
+        _char('g', 490, 590),
+    ]
+
+    outside, per_table = index.assign_chars(chars)
+
+    assert [_texts(table_chars) for table_chars in per_table] == ['a', 'b', 'cg']
+    assert _texts(outside) == 'def'
+
+
+def test_every_table_keeps_its_chars():
+    # One table per band, many bands: none is dropped in favour of the last
+    bboxes = [(50.0, 100.0 * i, 500.0, 100.0 * i + 50) for i in range(8)]
+    index = TableCharIndex(bboxes)
+    chars = [_char(str(i), 60, 100 * i + 20) for i in range(8)]
+
+    outside, per_table = index.assign_chars(chars)
+
+    assert [_texts(table_chars) for table_chars in per_table] == [str(i) for i in range(8)]
+    assert outside == []
+
+
+def test_char_across_two_tables_goes_to_both():
+    touching = (50.0, 200.0, 250.0, 300.0)
+    index = TableCharIndex([LEFT, touching])
+
+    assert index.lookup((60.0, 195.0, 65.0, 205.0)) == [0, 1]
+
+
+def test_tables_spanning_several_rows_are_found_in_each():
+    index = TableCharIndex([BOTTOM], row_height=24.0)
+
+    for top in (400.0, 455.0, 590.0):
+        assert index.lookup((60.0, top, 65.0, top + 5)) == [0]
+    assert index.lookup((60.0, 601.0, 65.0, 610.0)) == []
+    # In the table's rows, but left of it
+    assert index.lookup((10.0, 450.0, 20.0, 460.0)) == []
+
+
+def test_no_tables():
+    chars = [_char('a', 60, 110)]
+
+    assert TableCharIndex([]).assign_chars(chars) == (chars, [])
+
+
+def _build_pdf(content):
+    objects = [
+        '<< /Type /Catalog /Pages 2 0 R >>',
+        '<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        '<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R '
+        '/Resources << /Font << /F1 5 0 R >> >> >>',
+        f'<< /Length {len(content)} >>\nstream\n{content}\nendstream',
+        '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    body = '%PDF-1.4\n'
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += f'{number} 0 obj\n{obj}\nendobj\n'
+    xref = len(body)
+    body += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'
+    body += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets)
+    body += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'
+    return body.encode('latin-1')
+
+
+def _ruled_table(top, rows):
+    """Content stream of a two-column grid whose top rule is at PDF y = top."""
+    ops = [f'72 {top - 20 * i} m 372 {top - 20 * i} l S' for i in range(len(rows) + 1)]
+    ops += [f'{x} {top} m {x} {top - 20 * len(rows)} l S' for x in (72, 222, 372)]
+    for i, row in enumerate(rows):
+        for j, cell in enumerate(row):
+            ops.append(f'BT /F1 10 Tf {78 + 150 * j} {top - 20 * i - 14} Td ({cell}) Tj ET')
+    return '\n'.join(ops)
+
+
+def test_page_text_keeps_the_markdown_of_every_table(tmp_path):
+    path = tmp_path / 'tables.pdf'
+    path.write_bytes(_build_pdf('\n'.join([
+        'BT /F1 12 Tf 72 740 Td (Revenue by region) Tj ET',
+        _ruled_table(720, [('Region', 'Revenue'), ('North', '120')]),
+        'BT /F1 12 Tf 72 640 Td (Costs by region) Tj ET',
+        _ruled_table(620, [('Region', 'Cost'), ('South', '80')]),
+    ])))
+
+    with pdfplumber.open(path) as pdf:
+        text = extract_page_text(pdf.pages[0])
+
+    assert '| Region | Revenue |' in text
+    assert '| North | 120 |' in text
+    assert '| Region | Cost |' in text
+    assert '| South | 80 |' in text
+    # Body text between the tables stays in place, table cells are not repeated as text
+    assert text.index('Revenue by region') < text.index('| North | 120 |') < text.index('Costs by region')
+    assert text.count('North') == 1
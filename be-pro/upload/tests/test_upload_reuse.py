@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import threading
+
+import application.upload as upload_module
+from application.upload import IndexedCopy
+from application.upload import UploadDocumentApplication
+from application.upload import UploadDocumentInput
+from domain.embedder import EmbedderService
+from fastapi import UploadFile
+
+CONTENT_HASH = 'a' * 64
+SOURCE_CONVERSATION = 1
+CONVERSATION = 2
+
+
+class _FakeStorage:
+    def __init__(self, chunk_count):
+        self.chunk_count = chunk_count
+        self.attached = []
+        self.threads = set()
+
+    def count_chunks_by_content_hash(self, content_hash, conversation_id):
+        self.threads.add(threading.current_thread())
+        return self.chunk_count if conversation_id == SOURCE_CONVERSATION else 0
+
+    def attach_conversation(self, content_hash, source_conversation_id, conversation_id):
+        self.attached.append((content_hash, source_conversation_id, conversation_id))
+        return self.chunk_count
+
+
+def _reuse(storage, indexed_copy, conversation_id=CONVERSATION):
+    embedder = EmbedderService(embedding_generator=object(), storage=storage)
+    application = UploadDocumentApplication(settings=None, parser=None, chunker=None, embedder=embedder)
+    return asyncio.run(application._reuse_indexed_chunks(CONTENT_HASH, indexed_copy, conversation_id))
+
+
+def test_complete_copy_is_reused():
+    storage = _FakeStorage(chunk_count=12)
+
+    assert _reuse(storage, IndexedCopy(conversation_id=SOURCE_CONVERSATION, chunk_count=12)) == 12
+    assert storage.attached == [(CONTENT_HASH, SOURCE_CONVERSATION, CONVERSATION)]
+    # The blocking OpenSearch calls stay off the event loop's thread
+    assert threading.main_thread() not in storage.threads
+
+
+def test_copy_whose_count_drifted_is_processed_again():
+    # Chunks deleted since the upload completed, or left behind by a later failed one
+    for chunk_count in (7, 15, 0):
+        storage = _FakeStorage(chunk_count=chunk_count)
+
+        assert _reuse(storage, IndexedCopy(conversation_id=SOURCE_CONVERSATION, chunk_count=12)) == 0
+        assert storage.attached == []
+
+
+def test_nothing_is_reused_without_a_copy_or_a_conversation():
+    storage = _FakeStorage(chunk_count=12)
+
+    assert _reuse(storage, None) == 0
+    assert _reuse(storage, IndexedCopy(conversation_id=SOURCE_CONVERSATION, chunk_count=12), None) == 0
+    assert storage.attached == []
+
+
+def test_storage_error_falls_back_to_processing():
+    class _FailingStorage(_FakeStorage):
+        def count_chunks_by_content_hash(self, content_hash, conversation_id):
+            raise ConnectionError('OpenSearch unavailable')
+
+    assert _reuse(_FailingStorage(chunk_count=12), IndexedCopy(conversation_id=SOURCE_CONVERSATION, chunk_count=12)) == 0
+
+
+def test_upload_is_hashed_off_the_event_loop(monkeypatch):
+    hash_threads = set()
+
+    def fake_sha256(file):
+        hash_threads.add(threading.current_thread())
+        return CONTENT_HASH
+
+    monkeypatch.setattr(upload_module, 'file_sha256', fake_sha256)
+    storage = _FakeStorage(chunk_count=12)
+    embedder = EmbedderService(embedding_generator=object(), storage=storage)
+    application = UploadDocumentApplication(settings=None, parser=None, chunker=None, embedder=embedder)
+    input_data = UploadDocumentInput(
+        file=UploadFile(file=io.BytesIO(b'%PDF-1.7'), filename='report.pdf'),
+        conversation_id=CONVERSATION,
+        indexed_copy=IndexedCopy(conversation_id=SOURCE_CONVERSATION, chunk_count=12),
+    )
+
+    output = asyncio.run(application.upload_document(input_data))
+
+    assert output.content_hash == CONTENT_HASH
+    assert output.reused_chunks == 12
+    assert hash_threads and threading.main_thread() not in hash_threads